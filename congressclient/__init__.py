@@ -10,12 +10,31 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import sys
+
 import pbr.version
 
 __all__ = ['__version__']
 
 version_info = pbr.version.VersionInfo('python-congressclient')
-try:
-    __version__ = version_info.version_string()
-except AttributeError:
-    __version__ = None
+
+
+def _version_string():
+    try:
+        return version_info.version_string()
+    except AttributeError:
+        return None
+
+
+if sys.version_info >= (3, 7):
+    # looking the version up loads pkg_resources, which dominates the
+    # import time of the package; only do it when __version__ is used
+    def __getattr__(name):
+        if name == '__version__':
+            global __version__
+            __version__ = _version_string()
+            return __version__
+        raise AttributeError("module %r has no attribute %r" %
+                             (__name__, name))
+else:
+    __version__ = _version_string()
@@ -0,0 +1,115 @@
+#   Licensed under the Apache License, Version 2.0 (the "License"); you may
+#   not use this file except in compliance with the License. You may obtain
+#   a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#   WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#   License for the specific language governing permissions and limitations
+#   under the License.
+
+"""On-disk cache of keystone tokens and policy endpoints.
+
+Each CLI process otherwise issues a new token and looks the policy
+endpoint up in the service catalog.  Entries hold the keystoneauth auth
+state and the resolved endpoint, are keyed by a hash of the auth options,
+region and interface, and are only readable by their owner.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import time
+
+LOG = logging.getLogger(__name__)
+
+# entries are not used when the token expires sooner than this
+MIN_REMAINING = 60
+
+
+def default_directory():
+    cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.join(
+        os.path.expanduser('~'), '.cache')
+    return os.path.join(cache_home, 'congressclient', 'auth')
+
+
+class AuthCache(object):
+    """Stores token and endpoint of authenticated clients between runs.
+
+    :param directory: directory holding the entries, created with mode
+        0700 when missing
+    :param min_remaining: seconds of token validity an entry must have
+        left to be used
+    """
+
+    def __init__(self, directory=None, min_remaining=MIN_REMAINING):
+        self.directory = directory or default_directory()
+        self.min_remaining = min_remaining
+
+    @staticmethod
+    def key(auth, region_name=None, interface=None):
+        """Return the cache key of an auth plugin, None if not cacheable."""
+        get_cache_id = getattr(auth, 'get_cache_id', None)
+        cache_id = get_cache_id() if get_cache_id else None
+        if not cache_id or not hasattr(auth, 'set_auth_state'):
+            return None
+        hasher = hashlib.sha256()
+        for element in (cache_id, region_name or '', interface or ''):
+            hasher.update(element.encode('utf-8'))
+            hasher.update(b'\x00')
+        return hasher.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.json')
+
+    def load(self, key):
+        """Return the unexpired (auth state, endpoint) of key, or None."""
+        path = self._path(key)
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except OSError:
+            return None
+        with os.fdopen(fd, 'r') as f:
+            stat = os.fstat(f.fileno())
+            if stat.st_uid != os.getuid() or stat.st_mode & 0o077:
+                LOG.warning('Ignoring %s: not private to the current user',
+                            path)
+                return None
+            try:
+                entry = json.load(f)
+            except ValueError:
+                return None
+        if entry.get('expires', 0) - time.time() < self.min_remaining:
+            self.invalidate(key)
+            return None
+        return entry['auth_state'], entry.get('endpoint')
+
+    def store(self, key, auth, endpoint):
+        """Save the auth state of an authenticated plugin and its endpoint."""
+        auth_ref = getattr(auth, 'auth_ref', None)
+        if auth_ref is None or auth_ref.expires is None:
+            return
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory, 0o700)
+        entry = {'auth_state': auth.get_auth_state(),
+                 'endpoint': endpoint,
+                 'expires': auth_ref.expires.timestamp()}
+        path = self._path(key)
+        tmp_path = '%s.%d.tmp' % (path, os.getpid())
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+
+    def invalidate(self, key):
+        try:
+            os.unlink(self._path(key))
+        except OSError:
+            pass
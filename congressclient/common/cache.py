@@ -0,0 +1,127 @@
+#   Licensed under the Apache License, Version 2.0 (the "License"); you may
+#   not use this file except in compliance with the License. You may obtain
+#   a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#   WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#   License for the specific language governing permissions and limitations
+#   under the License.
+
+"""Client side cache for read-only Congress API responses."""
+
+import collections
+import copy
+import threading
+import time
+
+# Seconds a response stays fresh, keyed by the name of the
+# congressclient.v1.client.Client URL template it was fetched from.
+DEFAULT_TTLS = {
+    'policies': 30,
+    'datasources': 30,
+    'datasource_schema': 300,
+    'datasource_table_schema': 300,
+    'driver': 300,
+    'driver_path': 300,
+    'policy_api_versions': 300,
+}
+
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+
+
+class CacheEntry(object):
+    """A cached response body and its validators."""
+
+    def __init__(self, endpoint, body, size, expires, etag=None):
+        self.endpoint = endpoint
+        self.body = body
+        self.size = size
+        self.expires = expires
+        self.etag = etag
+
+    def is_fresh(self, now=None):
+        return (now or time.monotonic()) < self.expires
+
+
+class ResponseCache(object):
+    """Thread-safe LRU cache of response bodies with per-endpoint TTLs.
+
+    :param ttls: dict mapping URL template names to time-to-live in
+        seconds; responses of other endpoints are never cached
+    :param max_bytes: upper bound on the summed size of the cached
+        response payloads; least recently used entries are evicted
+        first
+    """
+
+    def __init__(self, ttls=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def caches(self, endpoint):
+        return endpoint in self.ttls
+
+    def lookup(self, url):
+        """Return the entry cached for url, fresh or stale, or None."""
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is not None:
+                self._entries.move_to_end(url)
+            return entry
+
+    def get(self, url):
+        """Return a copy of the cached body if it is still fresh.
+
+        :raises KeyError: when nothing fresh is cached for url
+        """
+        entry = self.lookup(url)
+        if entry is None or not entry.is_fresh():
+            self.misses += 1
+            raise KeyError(url)
+        self.hits += 1
+        return copy.deepcopy(entry.body)
+
+    def store(self, endpoint, url, body, size, etag=None):
+        if size > self.max_bytes:
+            return
+        entry = CacheEntry(endpoint, copy.deepcopy(body), size,
+                           time.monotonic() + self.ttls[endpoint], etag)
+        with self._lock:
+            self._pop(url)
+            self._entries[url] = entry
+            self.size += size
+            while self.size > self.max_bytes:
+                self._pop(next(iter(self._entries)))
+
+    def refresh(self, url):
+        """Mark the entry for url fresh again after a 304 Not Modified."""
+        self.revalidations += 1
+        with self._lock:
+            entry = self._entries[url]
+            entry.expires = time.monotonic() + self.ttls[entry.endpoint]
+            return copy.deepcopy(entry.body)
+
+    def invalidate(self, *endpoints):
+        """Drop the cached responses of the given endpoints."""
+        with self._lock:
+            for url in [url for url, entry in self._entries.items()
+                        if entry.endpoint in endpoints]:
+                self._pop(url)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def _pop(self, url):
+        entry = self._entries.pop(url, None)
+        if entry is not None:
+            self.size -= entry.size
@@ -0,0 +1,149 @@
+#   Licensed under the Apache License, Version 2.0 (the "License"); you may
+#   not use this file except in compliance with the License. You may obtain
+#   a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#   WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#   License for the specific language governing permissions and limitations
+#   under the License.
+
+"""Compact column-wise storage of table rows."""
+
+import array
+import sys
+
+
+def _new_column(value):
+    if isinstance(value, bool):
+        return []
+    if isinstance(value, int):
+        return array.array('q')
+    if isinstance(value, float):
+        return array.array('d')
+    return []
+
+
+def _append(column, value):
+    """Append value to column, returning the column it ended up in.
+
+    Typed arrays are converted to plain lists the first time a value
+    does not fit them, including integers appended to float arrays which
+    would otherwise come back as floats.
+    """
+    if isinstance(column, array.array):
+        if isinstance(value, bool) or value is None or (
+                column.typecode == 'd' and not isinstance(value, float)):
+            column = list(column)
+        else:
+            try:
+                column.append(value)
+                return column
+            except (TypeError, OverflowError):
+                column = list(column)
+    if isinstance(value, str):
+        value = sys.intern(value)
+    column.append(value)
+    return column
+
+
+class ColumnarRows(object):
+    """Table rows stored column by column.
+
+    Integer and float columns are kept in typed arrays and strings are
+    interned, which is much smaller than a list of ``{'data': [...]}``
+    dicts for large tables.  Rows are materialized as tuples only when
+    they are accessed, so an instance can be handed directly to a cliff
+    lister as its data.
+
+    :param columns: the column names
+    :param data: optional list of columns, one sequence per column name
+    :param length: number of rows, needed only when there are no columns
+    """
+
+    def __init__(self, columns, data=None, length=None):
+        self.columns = list(columns)
+        if data is None:
+            data = [[] for column in self.columns]
+        self._data = data
+        if length is None:
+            length = len(data[0]) if data else 0
+        self._length = length
+
+    @classmethod
+    def from_rows(cls, rows, columns=None):
+        """Build from an iterable of API rows ({'data': [...]}) or tuples.
+
+        :param rows: the rows; consumed one at a time
+        :param columns: the column names, defaults to Col0..ColN
+        """
+        data = None
+        for row in rows:
+            if isinstance(row, dict):
+                row = row['data']
+            if data is None:
+                if columns is None:
+                    columns = ['Col%s' % i for i in range(len(row))]
+                if len(row) != len(columns):
+                    raise ValueError('Expected %d columns, got %d' %
+                                     (len(columns), len(row)))
+                data = [_new_column(value) for value in row]
+            elif len(row) != len(data):
+                raise ValueError('Expected %d columns, got %d' %
+                                 (len(data), len(row)))
+            for index, value in enumerate(row):
+                data[index] = _append(data[index], value)
+        return cls(columns or [], data)
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        if not self._data:
+            return iter([()] * self._length)
+        return zip(*self._data)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return ColumnarRows(self.columns,
+                                [column[index] for column in self._data],
+                                len(range(self._length)[index]))
+        if not -self._length <= index < self._length:
+            raise IndexError('row index out of range')
+        return tuple(column[index] for column in self._data)
+
+    def __repr__(self):
+        return '<ColumnarRows columns=%s rows=%d>' % (self.columns,
+                                                      self._length)
+
+    def column(self, name):
+        """Return the values of one column."""
+        return self._data[self.columns.index(name)]
+
+    def project(self, *names):
+        """Return the rows restricted to the named columns.
+
+        The column storage is shared, not copied.
+        """
+        indexes = [self.columns.index(name) for name in names]
+        return ColumnarRows(names, [self._data[i] for i in indexes],
+                            self._length)
+
+    def select(self, **filters):
+        """Return the rows whose columns equal the given values."""
+        if not filters or not self._length:
+            return self
+        tests = [(self.column(name), value)
+                 for name, value in filters.items()]
+        keep = [index for index in range(self._length)
+                if all(column[index] == value for column, value in tests)]
+        data = []
+        for column in self._data:
+            if isinstance(column, array.array):
+                data.append(array.array(column.typecode,
+                                        (column[i] for i in keep)))
+            else:
+                data.append([column[i] for i in keep])
+        return ColumnarRows(self.columns, data, len(keep))
@@ -0,0 +1,258 @@
+#   Licensed under the Apache License, Version 2.0 (the "License"); you may
+#   not use this file except in compliance with the License. You may obtain
+#   a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#   WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#   License for the specific language governing permissions and limitations
+#   under the License.
+
+"""HTTP transport helpers for the Congress client."""
+
+import threading
+import time
+import zlib
+
+from keystoneauth1 import adapter
+from requests import adapters
+
+
+class PooledHTTPAdapter(adapters.HTTPAdapter):
+    """A requests transport adapter with idle connection expiry.
+
+    Behaves like :class:`requests.adapters.HTTPAdapter` but drops every
+    pooled connection once the adapter has been idle for longer than
+    ``idle_timeout`` seconds, so that keep-alive connections the server
+    has most likely closed are not handed out to a request.
+    """
+
+    def __init__(self, pool_connections=adapters.DEFAULT_POOLSIZE,
+                 pool_maxsize=adapters.DEFAULT_POOLSIZE,
+                 pool_block=adapters.DEFAULT_POOLBLOCK,
+                 idle_timeout=None):
+        self.idle_timeout = idle_timeout
+        self._last_used = None
+        self._idle_lock = threading.Lock()
+        super(PooledHTTPAdapter, self).__init__(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block)
+
+    def send(self, request, **kwargs):
+        self._expire_idle()
+        return super(PooledHTTPAdapter, self).send(request, **kwargs)
+
+    def _expire_idle(self):
+        now = time.monotonic()
+        with self._idle_lock:
+            last_used = self._last_used
+            self._last_used = now
+        if (self.idle_timeout is not None and last_used is not None and
+                now - last_used > self.idle_timeout):
+            self.poolmanager.clear()
+
+    def pool_stats(self):
+        """Return usage counters for every host pool of this adapter.
+
+        :rtype: a list of dicts, one per (scheme, host, port) pool
+        """
+        pools = self.poolmanager.pools
+        with pools.lock:
+            pool_list = [pools[key] for key in pools.keys()]
+        stats = []
+        for pool in pool_list:
+            stats.append({
+                'scheme': pool.scheme,
+                'host': pool.host,
+                'port': pool.port,
+                'maxsize': self._pool_maxsize,
+                'block': self._pool_block,
+                'connections_created': pool.num_connections,
+                'requests': pool.num_requests,
+                'idle_connections': pool.pool.qsize() if pool.pool else 0,
+            })
+        return stats
+
+
+def mount_pool(session, pool_connections=adapters.DEFAULT_POOLSIZE,
+               pool_maxsize=adapters.DEFAULT_POOLSIZE,
+               pool_block=adapters.DEFAULT_POOLBLOCK, idle_timeout=None,
+               prefix=None):
+    """Install a tuned connection pool on a requests session.
+
+    :param session: a :class:`requests.Session`
+    :param pool_connections: number of per-host pools to cache
+    :param pool_maxsize: maximum number of connections kept per host
+    :param pool_block: block when all connections to a host are in use
+        instead of opening throw-away connections
+    :param idle_timeout: seconds after which idle connections are dropped
+    :param prefix: URL prefix the pool is used for; by default it is used
+        for every http:// and https:// URL, including the requests of
+        the other clients sharing the session
+    :rtype: the mounted :class:`PooledHTTPAdapter`
+    """
+    http_adapter = PooledHTTPAdapter(pool_connections=pool_connections,
+                                     pool_maxsize=pool_maxsize,
+                                     pool_block=pool_block,
+                                     idle_timeout=idle_timeout)
+    for mount_prefix in (prefix,) if prefix else ('https://', 'http://'):
+        session.mount(mount_prefix, http_adapter)
+    return http_adapter
+
+
+class EndpointPool(object):
+    """A connection pool only used for the requests to an endpoint.
+
+    Keystone sessions are usually shared with other clients, starting
+    with the identity plugin authenticating them, so the pool is not
+    mounted on the whole session but on the endpoint URL, which is only
+    known once the service catalog is fetched: adapters created with the
+    pool mount it before their first request.  Clients sharing a session
+    and an endpoint share the pool mounted first.
+
+    :param session: a :class:`requests.Session`
+    :param pool_kwargs: the arguments of :func:`mount_pool`
+    """
+
+    def __init__(self, session, **pool_kwargs):
+        self.session = session
+        self.pool_kwargs = pool_kwargs
+        self.http_adapter = None
+        self._lock = threading.Lock()
+
+    def mount(self, endpoint):
+        """Use the pool for the URLs under endpoint, once."""
+        if self.http_adapter is not None:
+            return
+        prefix = endpoint.rstrip('/') + '/'
+        with self._lock:
+            if self.http_adapter is not None:
+                return
+            mounted = self.session.adapters.get(prefix)
+            if isinstance(mounted, PooledHTTPAdapter):
+                self.http_adapter = mounted
+            else:
+                self.http_adapter = mount_pool(
+                    self.session, prefix=prefix, **self.pool_kwargs)
+
+    def pool_stats(self):
+        if self.http_adapter is None:
+            return []
+        return self.http_adapter.pool_stats()
+
+
+# requested explicitly so that responses are compressed whatever the
+# default headers of the session are
+ACCEPT_ENCODING = 'gzip, deflate'
+
+
+def wire_bytes(resp):
+    """Return the number of body bytes of resp read from the network.
+
+    This is the compressed size for compressed responses.  Returns None
+    when it cannot be determined.
+    """
+    try:
+        size = resp.raw.tell()
+    except (AttributeError, ValueError):
+        size = None
+    if isinstance(size, int):
+        return size
+    length = resp.headers.get('Content-Length')
+    return int(length) if length and length.isdigit() else None
+
+
+class RetryAdapter(adapter.Adapter):
+    """Adapter retrying failed requests according to a retry policy.
+
+    :param retry_policy: optional
+        :class:`congressclient.common.retry.RetryPolicy`
+    :param pool: optional :class:`EndpointPool` mounted on the endpoint
+        before the first request
+    """
+
+    def __init__(self, retry_policy=None, pool=None, **kwargs):
+        super(RetryAdapter, self).__init__(**kwargs)
+        self.retry_policy = retry_policy
+        self.pool = pool
+
+    def request(self, url, method, **kwargs):
+        if self.pool is not None and self.pool.http_adapter is None:
+            endpoint = self.get_endpoint()
+            if endpoint:
+                self.pool.mount(endpoint)
+        send = super(RetryAdapter, self).request
+        data = kwargs.get('data')
+        if self.retry_policy is None or not (
+                data is None or isinstance(data, (bytes, str))):
+            # a streamed body cannot be sent twice
+            return send(url, method, **kwargs)
+        return self.retry_policy.call(
+            method, lambda: send(url, method, **kwargs))
+
+
+class JsonAdapter(RetryAdapter):
+    """Adapter returning the decoded JSON body along with the response.
+
+    Works like :class:`keystoneauth1.adapter.LegacyJsonAdapter` and
+    additionally retries failed requests like :class:`RetryAdapter` and
+    reports every request to an
+    :class:`congressclient.common.instrumentation.Instrumentation`.
+    """
+
+    def __init__(self, instrumentation=None, **kwargs):
+        super(JsonAdapter, self).__init__(**kwargs)
+        self.instrumentation = instrumentation
+
+    def request(self, url, method, **kwargs):
+        headers = kwargs.setdefault('headers', {})
+        headers.setdefault('Accept', 'application/json')
+        headers.setdefault('Accept-Encoding', ACCEPT_ENCODING)
+        try:
+            kwargs['json'] = kwargs.pop('body')
+        except KeyError:
+            pass
+
+        instrumentation = self.instrumentation
+        if instrumentation is None or not instrumentation.enabled:
+            resp = super(JsonAdapter, self).request(url, method, **kwargs)
+            return resp, _decode(resp)
+
+        record = instrumentation.start(method, url)
+        start = time.perf_counter()
+        try:
+            resp = super(JsonAdapter, self).request(url, method, **kwargs)
+            record.status = resp.status_code
+            record.bytes = len(resp.content)
+            record.wire_bytes = wire_bytes(resp)
+            decode_start = time.perf_counter()
+            body = _decode(resp)
+            record.decode_time = time.perf_counter() - decode_start
+            return resp, body
+        except Exception as e:
+            record.error = e
+            record.status = getattr(e, 'http_status', None)
+            raise
+        finally:
+            record.wall_time = time.perf_counter() - start
+            instrumentation.finish(record)
+
+
+def _decode(resp):
+    try:
+        return resp.json()
+    except ValueError:
+        return None
+
+
+def gzip_chunks(chunks, level=6):
+    """Compress an iterable of byte chunks into a gzip stream."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
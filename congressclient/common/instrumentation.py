@@ -0,0 +1,282 @@
+#   Licensed under the Apache License, Version 2.0 (the "License"); you may
+#   not use this file except in compliance with the License. You may obtain
+#   a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#   WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#   License for the specific language governing permissions and limitations
+#   under the License.
+
+"""Per-request timing and metrics for the Congress client."""
+
+import bisect
+import logging
+import re
+import socket
+import threading
+from urllib import parse
+
+LOG = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0)
+
+
+class RequestRecord(object):
+    """Measurements of a single API request.
+
+    :ivar endpoint: name of the client URL template, e.g. 'datasource_rows'
+    :ivar method: HTTP method
+    :ivar url: requested URL
+    :ivar status: HTTP status code, None when no response was received
+    :ivar bytes: size of the response body
+    :ivar wire_bytes: size of the response body as received, i.e. before
+        decompression; None when unknown
+    :ivar decode_time: seconds spent decoding the JSON body
+    :ivar wall_time: seconds from sending the request to the decoded body
+    :ivar error: the exception raised by the request, if any
+    """
+
+    def __init__(self, endpoint, method, url):
+        self.endpoint = endpoint
+        self.method = method
+        self.url = url
+        self.status = None
+        self.bytes = 0
+        self.wire_bytes = None
+        self.decode_time = 0.0
+        self.wall_time = 0.0
+        self.error = None
+
+    def __repr__(self):
+        return ('<RequestRecord %s %s status=%s bytes=%d wall=%.6f '
+                'decode=%.6f>' % (self.method, self.endpoint, self.status,
+                                  self.bytes, self.wall_time,
+                                  self.decode_time))
+
+
+class Instrumentation(object):
+    """Registry of the hooks called around every request of a client.
+
+    Pre hooks are called with a :class:`RequestRecord` holding only the
+    endpoint, method and URL before the request is sent; post hooks are
+    called with the completed record, including for failed requests.
+    Exceptions raised by hooks are logged and otherwise ignored.
+
+    :param endpoints: list of (name, URL template) pairs used to find the
+        endpoint name of a requested URL
+    """
+
+    def __init__(self, endpoints=()):
+        self.pre_hooks = []
+        self.post_hooks = []
+        self._patterns = []
+        for name, template in endpoints:
+            if '?' in template:
+                continue
+            pattern = '^%s$' % re.escape(template).replace(
+                re.escape('%s'), '[^/]+')
+            self._patterns.append((re.compile(pattern), name))
+        # the most specific templates first
+        self._patterns.sort(key=lambda item: -len(item[0].pattern))
+
+    @property
+    def enabled(self):
+        return bool(self.pre_hooks or self.post_hooks)
+
+    def add_pre_hook(self, hook):
+        self.pre_hooks.append(hook)
+
+    def add_post_hook(self, hook):
+        self.post_hooks.append(hook)
+
+    def remove_hook(self, hook):
+        for hooks in (self.pre_hooks, self.post_hooks):
+            if hook in hooks:
+                hooks.remove(hook)
+
+    def endpoint_for(self, url):
+        """Return the name of the URL template matching url."""
+        path = parse.urlsplit(url).path or '/'
+        for pattern, name in self._patterns:
+            if pattern.match(path):
+                return name
+        return path
+
+    def start(self, method, url):
+        record = RequestRecord(self.endpoint_for(url), method, url)
+        self._call(self.pre_hooks, record)
+        return record
+
+    def finish(self, record):
+        self._call(self.post_hooks, record)
+
+    @staticmethod
+    def _call(hooks, record):
+        for hook in hooks:
+            try:
+                hook(record)
+            except Exception:
+                LOG.exception('Request hook %s failed', hook)
+
+
+class _Series(object):
+
+    def __init__(self, buckets):
+        self.bucket_counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.wall_time = 0.0
+        self.decode_time = 0.0
+        self.bytes = 0
+        self.wire_bytes = 0
+        self.errors = 0
+        self.statuses = {}
+
+
+class HistogramCollector(object):
+    """In-process latency histograms per endpoint and method.
+
+    Register an instance as a post hook::
+
+        collector = instrumentation.HistogramCollector()
+        congress.instrumentation.add_post_hook(collector)
+
+    :param buckets: upper bounds, in seconds, of the latency buckets
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, record):
+        key = (record.endpoint, record.method)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _Series(self.buckets)
+            series.bucket_counts[
+                bisect.bisect_left(self.buckets, record.wall_time)] += 1
+            series.count += 1
+            series.wall_time += record.wall_time
+            series.decode_time += record.decode_time
+            series.bytes += record.bytes
+            series.wire_bytes += (record.bytes if record.wire_bytes is None
+                                  else record.wire_bytes)
+            if record.error is not None:
+                series.errors += 1
+            status = str(record.status)
+            series.statuses[status] = series.statuses.get(status, 0) + 1
+
+    def snapshot(self):
+        """Return the collected metrics as a dict keyed by (endpoint, method).
+
+        Bucket counts are cumulative, the last bucket counting every request.
+        """
+        with self._lock:
+            result = {}
+            for key, series in self._series.items():
+                cumulative = []
+                total = 0
+                for count in series.bucket_counts:
+                    total += count
+                    cumulative.append(total)
+                result[key] = {
+                    'buckets': list(zip(self.buckets + (float('inf'),),
+                                        cumulative)),
+                    'count': series.count,
+                    'wall_time': series.wall_time,
+                    'decode_time': series.decode_time,
+                    'bytes': series.bytes,
+                    'wire_bytes': series.wire_bytes,
+                    'errors': series.errors,
+                    'statuses': dict(series.statuses),
+                }
+            return result
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"')
+
+
+def prometheus_text(collector, prefix='congressclient'):
+    """Render a HistogramCollector in the Prometheus text format."""
+    snapshot = collector.snapshot()
+    lines = []
+
+    def family(name, kind, help_text):
+        lines.append('# HELP %s_%s %s' % (prefix, name, help_text))
+        lines.append('# TYPE %s_%s %s' % (prefix, name, kind))
+
+    family('request_duration_seconds', 'histogram',
+           'Wall time of Congress API requests.')
+    for (endpoint, method), series in sorted(snapshot.items()):
+        labels = 'endpoint="%s",method="%s"' % (
+            _label(endpoint), _label(method))
+        for bound, count in series['buckets']:
+            le = '+Inf' if bound == float('inf') else repr(bound)
+            lines.append('%s_request_duration_seconds_bucket{%s,le="%s"} %d'
+                         % (prefix, labels, le, count))
+        lines.append('%s_request_duration_seconds_sum{%s} %r'
+                     % (prefix, labels, series['wall_time']))
+        lines.append('%s_request_duration_seconds_count{%s} %d'
+                     % (prefix, labels, series['count']))
+
+    for name, key, help_text in (
+            ('decode_seconds_total', 'decode_time',
+             'Time spent decoding Congress API responses.'),
+            ('response_bytes_total', 'bytes',
+             'Bytes of decoded Congress API response bodies.'),
+            ('response_wire_bytes_total', 'wire_bytes',
+             'Bytes of Congress API response bodies as received, before '
+             'decompression.'),
+            ('request_errors_total', 'errors',
+             'Failed Congress API requests.')):
+        family(name, 'counter', help_text)
+        for (endpoint, method), series in sorted(snapshot.items()):
+            lines.append('%s_%s{endpoint="%s",method="%s"} %r'
+                         % (prefix, name, _label(endpoint), _label(method),
+                            series[key]))
+    return '\n'.join(lines) + '\n'
+
+
+class StatsdExporter(object):
+    """Post hook sending every request's metrics to a StatsD daemon.
+
+    :param host: StatsD host
+    :param port: StatsD UDP port
+    :param prefix: metric name prefix
+    """
+
+    def __init__(self, host='127.0.0.1', port=8125, prefix='congressclient'):
+        self.address = (host, port)
+        self.prefix = prefix
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def format(self, record):
+        name = '%s.%s.%s' % (self.prefix,
+                             re.sub(r'[^\w-]', '_', record.endpoint),
+                             record.method.lower())
+        return '\n'.join([
+            '%s.time:%.3f|ms' % (name, record.wall_time * 1000),
+            '%s.decode_time:%.3f|ms' % (name, record.decode_time * 1000),
+            '%s.bytes:%d|c' % (name, record.bytes),
+            '%s.wire_bytes:%d|c' % (name, record.bytes
+                                    if record.wire_bytes is None
+                                    else record.wire_bytes),
+            '%s.status.%s:1|c' % (name, record.status),
+        ])
+
+    def __call__(self, record):
+        self._socket.sendto(self.format(record).encode('utf-8'),
+                            self.address)
+
+    def close(self):
+        self._socket.close()
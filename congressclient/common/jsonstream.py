@@ -0,0 +1,186 @@
+#   Licensed under the Apache License, Version 2.0 (the "License"); you may
+#   not use this file except in compliance with the License. You may obtain
+#   a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#   WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#   License for the specific language governing permissions and limitations
+#   under the License.
+
+"""Incremental decoding and encoding of large JSON API bodies."""
+
+import codecs
+import json
+
+_WHITESPACE = ' \t\n\r'
+
+
+class _Reader(object):
+    """Buffers decoded text from an iterable of byte chunks."""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        """Read one more chunk; return False at end of input."""
+        if self.eof:
+            return False
+        # drop what has been consumed so the buffer stays bounded
+        self.buf = self.buf[self.pos:]
+        self.pos = 0
+        for chunk in self._chunks:
+            if isinstance(chunk, bytes):
+                chunk = self._decoder.decode(chunk)
+            if chunk:
+                self.buf += chunk
+                return True
+        self.buf += self._decoder.decode(b'', final=True)
+        self.eof = True
+        return True
+
+    def peek(self):
+        """Return the next non-whitespace character without consuming it."""
+        while True:
+            while self.pos < len(self.buf):
+                if self.buf[self.pos] not in _WHITESPACE:
+                    return self.buf[self.pos]
+                self.pos += 1
+            if not self.fill():
+                raise ValueError('Unexpected end of JSON document')
+
+    def end(self):
+        """Check that nothing but whitespace is left."""
+        try:
+            char = self.peek()
+        except ValueError:
+            return
+        raise ValueError('Unexpected %r after the end of the JSON document'
+                         % char)
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError('Expected %r at offset %d of JSON chunk, '
+                             'found %r' % (char, self.pos,
+                                           self.buf[self.pos]))
+        self.pos += 1
+
+    def value(self, decoder):
+        """Decode and consume one complete JSON value."""
+        self.peek()
+        while True:
+            try:
+                value, end = decoder.raw_decode(self.buf, self.pos)
+            except ValueError:
+                if not self.fill():
+                    raise
+                continue
+            # a number or literal may continue in the next chunk
+            if end < len(self.buf) or self.eof:
+                self.pos = end
+                return value
+            self.fill()
+
+
+def iter_items(chunks, key='results', extra=None):
+    """Yield the elements of one array of a streamed JSON object.
+
+    Only the current element is held in memory, so arbitrarily large
+    listings such as ``{"results": [{"data": [...]}, ...]}`` can be
+    consumed row by row while they are still being downloaded.
+
+    :param chunks: iterable of bytes or str pieces of the JSON document
+    :param key: top-level key of the array to stream
+    :param extra: optional dict receiving the other top-level members of
+        the object; it is complete once the generator is exhausted
+    """
+    decoder = json.JSONDecoder()
+    reader = _Reader(chunks)
+    reader.expect('{')
+    if reader.peek() == '}':
+        return
+    while True:
+        name = reader.value(decoder)
+        reader.expect(':')
+        if name == key and reader.peek() == '[':
+            reader.expect('[')
+            if reader.peek() == ']':
+                reader.pos += 1
+            else:
+                while True:
+                    yield reader.value(decoder)
+                    if reader.peek() == ',':
+                        reader.pos += 1
+                        continue
+                    reader.expect(']')
+                    break
+        else:
+            value = reader.value(decoder)
+            if extra is not None:
+                extra[name] = value
+        if reader.peek() == ',':
+            reader.pos += 1
+            continue
+        reader.expect('}')
+        return
+
+
+def iter_array(chunks):
+    """Yield the elements of a streamed top-level JSON array.
+
+    ValueError is raised when anything but whitespace follows the array.
+    """
+    decoder = json.JSONDecoder()
+    reader = _Reader(chunks)
+    reader.expect('[')
+    if reader.peek() == ']':
+        reader.pos += 1
+    else:
+        while True:
+            yield reader.value(decoder)
+            if reader.peek() == ',':
+                reader.pos += 1
+                continue
+            reader.expect(']')
+            break
+    reader.end()
+
+
+def iter_encoded(items, chunk_size=64 * 1024, progress=None):
+    """Encode an iterable as a JSON list, yielding chunks of UTF-8 bytes.
+
+    Only one chunk is held in memory at a time, so items may come from a
+    generator producing an arbitrarily large list.
+
+    :param items: the list items, each encodable by json.dumps
+    :param chunk_size: approximate size of the yielded chunks
+    :param progress: optional callable called with the number of items
+        encoded so far each time a chunk is produced
+    """
+    encode = json.JSONEncoder().encode
+    parts = ['[']
+    size = 1
+    count = 0
+    for item in items:
+        if count:
+            parts.append(', ')
+        part = encode(item)
+        parts.append(part)
+        size += len(part) + 2
+        count += 1
+        if size >= chunk_size:
+            if progress is not None:
+                progress(count)
+            yield ''.join(parts).encode('utf-8')
+            parts = []
+            size = 0
+    parts.append(']')
+    if progress is not None:
+        progress(count)
+    yield ''.join(parts).encode('utf-8')
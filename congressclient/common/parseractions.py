@@ -18,6 +18,18 @@
 import argparse
 
 
+def positive_float(value):
+    """Argument type accepting numbers greater than zero."""
+    try:
+        number = float(value)
+    except ValueError:
+        number = 0
+    if not number > 0:
+        raise argparse.ArgumentTypeError(
+            "%s is not a positive number" % value)
+    return number
+
+
 class KeyValueAction(argparse.Action):
     """A custom action to parse arguments as key=value pairs
 
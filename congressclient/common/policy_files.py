@@ -0,0 +1,192 @@
+#   Licensed under the Apache License, Version 2.0 (the "License"); you may
+#   not use this file except in compliance with the License. You may obtain
+#   a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#   WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#   License for the specific language governing permissions and limitations
+#   under the License.
+
+"""Loading and validation of YAML policy files."""
+
+import collections
+import os
+import re
+
+import yaml
+
+from congressclient import exceptions
+
+# the libyaml based loader is an order of magnitude faster
+Loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+SUFFIXES = ('.yaml', '.yml')
+
+
+def find_files(paths):
+    """Return the policy files named by paths, in a stable order.
+
+    Files are returned as given; directories are searched recursively for
+    files ending in .yaml or .yml.
+    """
+    files = []
+    for path in paths:
+        if not os.path.isdir(path):
+            files.append(path)
+            continue
+        found = []
+        for root, dirs, names in os.walk(path):
+            found.extend(os.path.join(root, name) for name in names
+                         if name.endswith(SUFFIXES))
+        files.extend(sorted(found))
+    return files
+
+
+def load_documents(path):
+    """Return the YAML documents of a file, skipping empty ones."""
+    with open(path, 'r') as stream:
+        return [document for document in yaml.load_all(stream, Loader=Loader)
+                if document is not None]
+
+
+def validate_policy(document):
+    """Return a list of problems of a policy document, empty if valid."""
+    if not isinstance(document, dict):
+        return ['policy must be a mapping']
+    problems = []
+    if not isinstance(document.get('name'), str) or not document['name']:
+        problems.append('policy has no name')
+    rules = document.get('rules', [])
+    if not isinstance(rules, list):
+        return problems + ['rules must be a list']
+    for number, rule in enumerate(rules, 1):
+        if not isinstance(rule, dict) or not isinstance(rule.get('rule'),
+                                                        str):
+            problems.append('rule %d has no rule text' % number)
+    return problems
+
+
+def load_policies(paths):
+    """Load and validate every policy of the given files and directories.
+
+    All documents are checked before returning, so that nothing is
+    imported from a set of files containing a single invalid policy.
+
+    :param paths: file or directory paths
+    :rtype: a list of (file path, policy document) pairs
+    :raises: congressclient.exceptions.ValidationError listing every
+        problem found
+    """
+    policies = []
+    problems = []
+    seen = {}
+    for path in find_files(paths):
+        try:
+            documents = load_documents(path)
+        except (IOError, yaml.YAMLError) as e:
+            problems.append('%s: %s' % (path, e))
+            continue
+        for number, document in enumerate(documents, 1):
+            where = '%s (document %d)' % (path, number)
+            for problem in validate_policy(document):
+                problems.append('%s: %s' % (where, problem))
+            name = isinstance(document, dict) and document.get('name')
+            if isinstance(name, str) and name:
+                if name in seen:
+                    problems.append('%s: policy %s is also defined in %s' %
+                                    (where, name, seen[name]))
+                seen.setdefault(name, where)
+            policies.append((path, document))
+    if not policies and not problems:
+        problems.append('No policy found in %s.' % ', '.join(paths))
+    if problems:
+        raise exceptions.ValidationError('\n'.join(problems))
+    return policies
+
+
+def load_rules(path):
+    """Load and validate the rules of a YAML or JSON file.
+
+    Documents may be single rules, lists of rules or policies, whose
+    'rules' are taken.  Only the 'rule', 'name' and 'comment' of each
+    rule are kept.
+
+    :rtype: a list of rule dicts
+    :raises: congressclient.exceptions.ValidationError listing every
+        problem found
+    """
+    try:
+        documents = load_documents(path)
+    except (IOError, yaml.YAMLError) as e:
+        raise exceptions.ValidationError('%s: %s' % (path, e))
+    rules = []
+    for document in documents:
+        if isinstance(document, dict) and 'rules' in document:
+            document = document['rules']
+        if isinstance(document, list):
+            rules.extend(document)
+        else:
+            rules.append(document)
+    problems = []
+    for number, rule in enumerate(rules, 1):
+        if not isinstance(rule, dict) or not isinstance(rule.get('rule'),
+                                                        str):
+            problems.append('%s: rule %d has no rule text' % (path, number))
+    if not rules and not problems:
+        problems.append('No rule found in %s.' % path)
+    if problems:
+        raise exceptions.ValidationError('\n'.join(problems))
+    return [dict((key, rule[key]) for key in ('rule', 'name', 'comment')
+                 if rule.get(key) is not None)
+            for rule in rules]
+
+
+# quoted strings are kept verbatim, whitespace elsewhere is insignificant
+_QUOTED = re.compile(r"""("(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')""")
+_SPACED_PUNCTUATION = re.compile(r'\s*(:-|[(),;=])\s*')
+
+
+def normalize_rule(text):
+    """Return rule text with insignificant whitespace removed."""
+    parts = _QUOTED.split(text.strip())
+    for index in range(0, len(parts), 2):
+        parts[index] = _SPACED_PUNCTUATION.sub(
+            r'\1', ' '.join(parts[index].split()))
+    return ''.join(parts)
+
+
+def rule_key(rule):
+    """Return the identity of a rule dict: its name and normalized text."""
+    return rule.get('name') or '', normalize_rule(rule.get('rule', ''))
+
+
+def diff_rules(current, desired):
+    """Compute the changes turning a set of rules into another.
+
+    Rules are matched by :func:`rule_key`, so reformatting a rule or
+    changing only its comment is not a change.
+
+    :param current: rule dicts as returned by the API, holding an 'id'
+    :param desired: rule dicts as found in a policy file
+    :rtype: a (rules to delete, rules to create, unchanged rules) tuple of
+        lists, the rules to delete and the unchanged ones taken from
+        current
+    """
+    remaining = collections.defaultdict(list)
+    for rule in current:
+        remaining[rule_key(rule)].append(rule)
+    to_create = []
+    unchanged = []
+    for rule in desired:
+        matches = remaining.get(rule_key(rule))
+        if matches:
+            unchanged.append(matches.pop(0))
+        else:
+            to_create.append(rule)
+    # keep the server order of the rules to delete
+    leftover = set(id(rule) for rules in remaining.values() for rule in rules)
+    to_delete = [rule for rule in current if id(rule) in leftover]
+    return to_delete, to_create, unchanged
@@ -0,0 +1,233 @@
+#   Licensed under the Apache License, Version 2.0 (the "License"); you may
+#   not use this file except in compliance with the License. You may obtain
+#   a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#   WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#   License for the specific language governing permissions and limitations
+#   under the License.
+
+"""Retries of transient Congress API errors and circuit breaking."""
+
+import datetime
+import email.utils
+import logging
+import random
+import threading
+import time
+
+from keystoneauth1 import exceptions as ks_exceptions
+import requests
+from urllib3 import exceptions as urllib3_exceptions
+
+from congressclient import exceptions
+
+LOG = logging.getLogger(__name__)
+
+# statuses meaning the request may succeed later
+DEFAULT_STATUSES = (exceptions.BadGateway, exceptions.ServiceUnavailable,
+                    exceptions.GatewayTimeout, 429)
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'OPTIONS', 'PUT')
+
+
+def _status_code(status):
+    """Return the HTTP status of a congressclient exception class or int."""
+    return getattr(status, 'http_status', status)
+
+
+def retry_after(error):
+    """Return the seconds to wait requested by an error response, or None."""
+    response = getattr(error, 'response', None)
+    value = response.headers.get('Retry-After') if response is not None \
+        else None
+    if not value:
+        return None
+    if value.strip().isdigit():
+        return int(value)
+    try:
+        date = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if date is None:
+        return None
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=datetime.timezone.utc)
+    return max(date.timestamp() - time.time(), 0)
+
+
+def not_sent(error):
+    """Whether a connection error happened before the request was sent.
+
+    keystoneauth raises the same exceptions for connections that could
+    not be established and for connections lost or timing out after the
+    request was sent, so the requests exception it was raised from is
+    looked at.
+    """
+    while error is not None:
+        if isinstance(error, requests.exceptions.ConnectTimeout):
+            return True
+        if isinstance(error, requests.exceptions.ConnectionError):
+            reason = getattr(error.args[0] if error.args else None,
+                             'reason', None)
+            return isinstance(reason, urllib3_exceptions.NewConnectionError)
+        error = error.__cause__ or error.__context__
+    return False
+
+
+class CircuitBreaker(object):
+    """Fails requests fast while the Congress API looks down.
+
+    After failure_threshold consecutive failed requests the circuit opens
+    and requests fail with :class:`congressclient.exceptions.CircuitOpen`
+    without being sent.  Once reset_timeout seconds have passed a single
+    trial request is let through: the circuit closes if it succeeds and
+    opens again if it fails.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self.opened_at is None:
+                return 'closed'
+            if time.monotonic() - self.opened_at >= self.reset_timeout:
+                return 'half-open'
+            return 'open'
+
+    def before_request(self):
+        with self._lock:
+            if self.opened_at is None:
+                return
+            waited = time.monotonic() - self.opened_at
+            if waited >= self.reset_timeout and not self._trial:
+                self._trial = True
+                return
+        raise exceptions.CircuitOpen(
+            'Congress API unavailable, not retrying for %d seconds' %
+            max(self.reset_timeout - waited, 0))
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial or self.failures >= self.failure_threshold:
+                if self.opened_at is None:
+                    LOG.warning('Congress API failing, opening the circuit '
+                                'for %d seconds', self.reset_timeout)
+                self.opened_at = time.monotonic()
+                self._trial = False
+
+
+class RetryPolicy(object):
+    """When and how long to wait before retrying a failed request.
+
+    Failed idempotent requests are retried after a random delay between 0
+    and backoff * 2 ** attempt seconds, capped at max_backoff, or after
+    the delay of the Retry-After header of the response when longer.
+    Requests which could not connect are retried whatever their method
+    since they were not sent (see :func:`not_sent`); other connection
+    failures are only retried for the idempotent methods.
+
+    :param retries: maximum number of retries of a request
+    :param statuses: HTTP statuses to retry, given as
+        :mod:`congressclient.exceptions` classes, e.g.
+        ``exceptions.ServiceUnavailable``, or status codes; a dict maps
+        each of them to its own maximum number of retries
+    :param backoff: base delay in seconds
+    :param max_backoff: longest delay between two attempts
+    :param max_retry_after: requests whose Retry-After is longer than this
+        are not retried
+    :param methods: HTTP methods safe to retry
+    :param circuit_breaker: optional :class:`CircuitBreaker` shared by the
+        requests
+    """
+
+    def __init__(self, retries=3, statuses=DEFAULT_STATUSES, backoff=0.5,
+                 max_backoff=30, max_retry_after=60,
+                 methods=IDEMPOTENT_METHODS, circuit_breaker=None,
+                 sleep=time.sleep):
+        if not isinstance(statuses, dict):
+            statuses = dict((status, retries) for status in statuses)
+        self.statuses = dict((_status_code(status), count)
+                             for status, count in statuses.items())
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_retry_after = max_retry_after
+        self.methods = frozenset(method.upper() for method in methods)
+        self.circuit_breaker = circuit_breaker
+        self.sleep = sleep
+
+    def _retries_for(self, method, error):
+        if isinstance(error, ks_exceptions.ConnectionError) and \
+                not_sent(error):
+            return self.retries
+        if method.upper() not in self.methods:
+            return 0
+        if isinstance(error, ks_exceptions.HttpError):
+            return self.statuses.get(error.http_status, 0)
+        if isinstance(error, ks_exceptions.ConnectionError):
+            return self.retries
+        return 0
+
+    def _is_outage(self, error):
+        """Whether an error counts towards opening the circuit."""
+        if isinstance(error, ks_exceptions.HttpError):
+            return error.http_status in self.statuses or \
+                error.http_status >= 500
+        return isinstance(error, ks_exceptions.ConnectionError)
+
+    def delay(self, attempt, error=None):
+        """Return the seconds to wait before a retry, None to not retry."""
+        delay = random.uniform(0, min(self.backoff * 2 ** attempt,
+                                      self.max_backoff))
+        requested = retry_after(error) if error is not None else None
+        if requested is not None:
+            if requested > self.max_retry_after:
+                return None
+            delay = max(delay, requested)
+        return delay
+
+    def call(self, method, func):
+        """Call func, which sends a method request, retrying failures."""
+        breaker = self.circuit_breaker
+        attempt = 0
+        while True:
+            if breaker is not None:
+                breaker.before_request()
+            try:
+                result = func()
+            except Exception as e:
+                if breaker is not None:
+                    if self._is_outage(e):
+                        breaker.record_failure()
+                    else:
+                        breaker.record_success()
+                if attempt >= self._retries_for(method, e):
+                    raise
+                delay = self.delay(attempt, e)
+                if delay is None:
+                    raise
+                attempt += 1
+                LOG.debug('%s request failed (%s), retry %d in %.1fs',
+                          method, e, attempt, delay)
+                self.sleep(delay)
+                continue
+            if breaker is not None:
+                breaker.record_success()
+            return result
@@ -0,0 +1,132 @@
+#   Licensed under the Apache License, Version 2.0 (the "License"); you may
+#   not use this file except in compliance with the License. You may obtain
+#   a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#   WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#   License for the specific language governing permissions and limitations
+#   under the License.
+
+"""Persistent cache of datasource table column names."""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+LOG = logging.getLogger(__name__)
+
+# bumped whenever the layout of the cache files changes
+FORMAT_VERSION = 1
+DEFAULT_TTL = 24 * 3600
+
+
+def default_directory():
+    cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.join(
+        os.path.expanduser('~'), '.cache')
+    return os.path.join(cache_home, 'congressclient', 'schemas')
+
+
+class SchemaCache(object):
+    """Column names of datasource tables, kept in memory and on disk.
+
+    The tables of a datasource are stored in one file per API endpoint
+    and datasource, which is dropped when the datasource is deleted or
+    created again, possibly with another driver.
+
+    :param directory: directory of the cache files, None to only cache
+        in memory
+    :param ttl: seconds after which a cached schema is fetched again
+    """
+
+    def __init__(self, directory=None, ttl=DEFAULT_TTL):
+        self.directory = directory
+        self.ttl = ttl
+        self._datasources = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(scope, datasource):
+        hasher = hashlib.sha256()
+        for element in (scope, datasource):
+            hasher.update(element.encode('utf-8'))
+            hasher.update(b'\x00')
+        return hasher.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.json')
+
+    def _load(self, key):
+        tables = self._datasources.get(key)
+        if tables is not None:
+            return tables
+        if self.directory is None:
+            return {}
+        try:
+            with open(self._path(key), 'r') as f:
+                document = json.load(f)
+        except (IOError, OSError, ValueError):
+            document = None
+        if not isinstance(document, dict) or \
+                document.get('version') != FORMAT_VERSION:
+            tables = {}
+        else:
+            tables = document.get('tables') or {}
+        self._datasources[key] = tables
+        return tables
+
+    def _save(self, key, tables):
+        if self.directory is None:
+            return
+        path = self._path(key)
+        tmp_path = '%s.%d.tmp' % (path, os.getpid())
+        try:
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory, 0o700)
+            with open(tmp_path, 'w') as f:
+                json.dump({'version': FORMAT_VERSION, 'tables': tables}, f)
+            os.replace(tmp_path, path)
+        except (IOError, OSError) as e:
+            LOG.debug('Cannot save the schema cache to %s: %s', path, e)
+
+    def get(self, scope, datasource, table):
+        """Return the cached column names of a table, or None.
+
+        :param scope: identifies the Congress deployment, e.g. its URL
+        """
+        key = self._key(scope, datasource)
+        with self._lock:
+            entry = self._load(key).get(table)
+        if entry is None or time.time() - entry['fetched'] > self.ttl:
+            return None
+        return list(entry['columns'])
+
+    def set(self, scope, datasource, table, columns):
+        self.set_tables(scope, datasource, {table: columns})
+
+    def set_tables(self, scope, datasource, columns):
+        """Cache the columns of many tables, given as a dict by table."""
+        key = self._key(scope, datasource)
+        now = time.time()
+        with self._lock:
+            tables = dict(self._load(key))
+            for table, names in columns.items():
+                tables[table] = {'columns': list(names), 'fetched': now}
+            self._datasources[key] = tables
+            self._save(key, tables)
+
+    def invalidate(self, scope, datasource):
+        """Forget the tables of a datasource."""
+        key = self._key(scope, datasource)
+        with self._lock:
+            self._datasources.pop(key, None)
+            if self.directory is not None:
+                try:
+                    os.unlink(self._path(key))
+                except OSError:
+                    pass
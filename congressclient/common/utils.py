@@ -12,12 +12,40 @@
 #   License for the specific language governing permissions and limitations
 #   under the License.
 
+import datetime
 import importlib
+import json
 import os
+import threading
+import time
+import weakref
 
+from congressclient.common import parseractions
 from congressclient import exceptions
 
 
+class LazyModule(object):
+    """Stand-in for a module that is imported on first attribute access.
+
+    Command modules use it for dependencies only some commands need, so
+    that loading the CLI plugin does not pay for them.
+
+    :param name: absolute name of the module
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+    def __repr__(self):
+        return '<LazyModule %s>' % self._name
+
+
 def env(*vars, **kwargs):
     """Search for the first defined of possibly many env vars
 
@@ -115,26 +143,260 @@ def get_dict_properties(item, fields, mixed_case_fields=[], formatters={}):
     return tuple(row)
 
 
+def add_listing_arguments(parser, item='row'):
+    """Add paging and filtering options to a listing command parser."""
+    parser.add_argument(
+        '--limit',
+        metavar='<limit>',
+        type=int,
+        help="Maximum number of %ss to list" % item)
+    parser.add_argument(
+        '--offset',
+        metavar='<offset>',
+        type=int,
+        help="Number of %ss to skip" % item)
+    parser.add_argument(
+        '--marker',
+        metavar='<marker>',
+        help="List %ss after this paging marker" % item)
+    parser.add_argument(
+        '--filter',
+        metavar='<column=value>',
+        dest='filters',
+        action=parseractions.KeyValueAction,
+        help="Only list %ss whose column equals value "
+             "(repeat option to filter on several columns)" % item)
+    return parser
+
+
+def get_listing_args(parsed_args):
+    """Return the paging and filtering options that were given.
+
+    :rtype: a tuple of the paging keyword arguments (limit, offset, marker)
+       and the filter keyword arguments
+    """
+    paging = dict((name, getattr(parsed_args, name))
+                  for name in ('limit', 'offset', 'marker')
+                  if getattr(parsed_args, name, None) is not None)
+    filters = {}
+    if getattr(parsed_args, 'filters', None):
+        filters['filters'] = parsed_args.filters
+    return paging, filters
+
+
+def add_watch_arguments(parser):
+    """Add the options of a listing command polling for changes."""
+    parser.add_argument(
+        '--watch',
+        metavar='<interval>',
+        type=parseractions.positive_float,
+        help="Poll the rows every <interval> seconds and only print the "
+             "rows inserted (+) or deleted (-) since the previous poll, "
+             "until interrupted. The interval doubles, up to "
+             "--watch-max-interval, while the rows do not change. Use "
+             "with -f csv or -f value to print the changes as they come")
+    parser.add_argument(
+        '--watch-max-interval',
+        metavar='<seconds>',
+        type=parseractions.positive_float,
+        help="Longest interval between polls while the rows do not "
+             "change (default: 8 times the --watch interval)")
+    parser.add_argument(
+        '--watch-count',
+        metavar='<count>',
+        type=int,
+        help="Stop watching after <count> polls")
+    return parser
+
+
+def row_key(row):
+    """Return a hashable key identifying a table row."""
+    key = tuple(row)
+    try:
+        hash(key)
+    except TypeError:
+        # rows holding lists or dicts
+        key = json.dumps(row, sort_keys=True)
+    return key
+
+
+def watch_rows(fetch, interval, max_interval=None, count=None,
+               sleep=time.sleep):
+    """Poll a table and yield the rows inserted or deleted between polls.
+
+    The rows of the previous poll are kept as a dict keyed by
+    :func:`row_key`, so each poll costs one pass over the new rows.  The
+    rows of the first poll are all reported as inserted.  The interval
+    doubles after each poll finding no change, up to max_interval, and
+    goes back to interval on the first change.  Iteration stops quietly
+    on KeyboardInterrupt.
+
+    :param fetch: callable returning an iterable of the rows of the table
+    :param interval: seconds between polls
+    :param max_interval: longest interval between polls, 8 * interval by
+        default
+    :param count: number of polls after which to stop, None to never stop
+    :rtype: generator of (UTC ISO 8601 time, '+' or '-', row) tuples
+    """
+    if not interval > 0:
+        raise ValueError('The polling interval must be positive')
+    if max_interval is None:
+        max_interval = 8 * interval
+    previous = {}
+    delay = interval
+    polls = 0
+    try:
+        while True:
+            current = {}
+            for row in fetch():
+                current.setdefault(row_key(row), row)
+            now = datetime.datetime.utcnow().isoformat(
+                timespec='seconds') + 'Z'
+            changed = False
+            for key, row in current.items():
+                if key not in previous:
+                    changed = True
+                    yield now, '+', row
+            for key, row in previous.items():
+                if key not in current:
+                    changed = True
+                    yield now, '-', row
+            previous = current
+            polls += 1
+            if count is not None and polls >= count:
+                return
+            delay = interval if changed else min(delay * 2, max_interval)
+            sleep(delay)
+    except KeyboardInterrupt:
+        return
+
+
+class ResourceIndex(object):
+    """Name and ID lookup table built from a single resource listing.
+
+    :param results: a listing as returned by the API, i.e. a dict whose
+       'results' item is a list of resources with 'id' and 'name' keys
+    """
+
+    def __init__(self, results):
+        self.ids = set()
+        self.names = {}
+        for result in results['results']:
+            self.ids.add(result['id'])
+            self.names.setdefault(result.get('name'), []).append(result['id'])
+
+    def get_id(self, name):
+        """Return the ID of the resource with the given name or ID.
+
+        A unique name match takes precedence over an ID match.
+        """
+        name_matches = self.names.get(name, [])
+        if len(name_matches) == 1:
+            return name_matches[0]
+        if name in self.ids:
+            return name
+        if name_matches:
+            # NOTE(arosen): this should only occur is using congress
+            # as admin and multiple projects use the same datsource name.
+            raise exceptions.Conflict(
+                "Multiple resources have this name %s. Please specify id." %
+                name)
+        raise exceptions.NotFound("Resource %s not found" % name)
+
+
 def get_resource_id_from_name(name, results):
-    # FIXME(arosen): move to common lib and add tests...
-    name_match = None
-    id_match = None
-    double_name_match = False
-    for result in results['results']:
-        if result['id'] == name:
-            id_match = result['id']
-        if result['name'] == name:
-            if name_match:
-                double_name_match = True
-            name_match = result['id']
-    if not double_name_match and name_match:
-        return name_match
-    if double_name_match and not id_match:
-        # NOTE(arosen): this should only occur is using congress
-        # as admin and multiple projects use the same datsource name.
-        raise exceptions.Conflict(
-            "Multiple resources have this name %s. Please specify id." % name)
-    if id_match:
-        return id_match
-
-    raise exceptions.NotFound("Resource %s not found" % name)
+    return ResourceIndex(results).get_id(name)
+
+
+DEFAULT_RESOLVER_TTL = 60
+
+
+class NameResolver(object):
+    """Resolves resource names to IDs using cached listings.
+
+    Indexes are kept per resource type (e.g. ``'datasources'`` or
+    ``('policy_rules', policy_name)``) for ``ttl`` seconds, so that
+    successive commands of an interactive shell do not list the resources
+    again for every name they resolve.  A lookup that fails against a
+    cached index is retried once against a fresh listing.
+    """
+
+    def __init__(self, ttl=DEFAULT_RESOLVER_TTL):
+        self.ttl = ttl
+        self._indexes = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, resource_type, name, lister):
+        """Return the ID of the named resource.
+
+        :param resource_type: hashable key naming the listing
+        :param name: name or ID of the resource
+        :param lister: callable returning the listing of resource_type
+        """
+        with self._lock:
+            index, expires = self._indexes.get(resource_type, (None, 0))
+        if index is not None and time.monotonic() < expires:
+            try:
+                return index.get_id(name)
+            except (exceptions.NotFound, exceptions.Conflict):
+                pass
+        index = ResourceIndex(lister())
+        with self._lock:
+            self._indexes[resource_type] = (index,
+                                            time.monotonic() + self.ttl)
+        return index.get_id(name)
+
+    def resolve_many(self, resource_type, names, lister):
+        """Return the IDs of many named resources, in the order of names.
+
+        The resources are listed at most once, and only when the cached
+        index of resource_type cannot resolve every name.
+
+        :param resource_type: hashable key naming the listing
+        :param names: names or IDs of the resources
+        :param lister: callable returning the listing of resource_type
+        """
+        with self._lock:
+            index, expires = self._indexes.get(resource_type, (None, 0))
+        if index is None or time.monotonic() >= expires or not all(
+                self._resolves(index, name) for name in names):
+            index = ResourceIndex(lister())
+            with self._lock:
+                self._indexes[resource_type] = (index,
+                                                time.monotonic() + self.ttl)
+        missing = [name for name in names
+                   if name not in index.names and name not in index.ids]
+        if missing:
+            raise exceptions.NotFound("Resources %s not found" %
+                                      ', '.join(missing))
+        return [index.get_id(name) for name in names]
+
+    @staticmethod
+    def _resolves(index, name):
+        try:
+            index.get_id(name)
+            return True
+        except (exceptions.NotFound, exceptions.Conflict):
+            return False
+
+    def invalidate(self, resource_type=None):
+        """Forget the index of resource_type, or all indexes."""
+        with self._lock:
+            if resource_type is None:
+                self._indexes.clear()
+            else:
+                self._indexes.pop(resource_type, None)
+
+
+_resolvers = weakref.WeakKeyDictionary()
+_resolvers_lock = threading.Lock()
+
+
+def get_resolver(client):
+    """Return the NameResolver shared by all commands using client."""
+    with _resolvers_lock:
+        try:
+            return _resolvers[client]
+        except KeyError:
+            resolver = _resolvers[client] = NameResolver()
+            return resolver
@@ -56,6 +56,16 @@ class CommandError(ClientException):
     pass
 
 
+class WaitTimeout(ClientException):
+    """The server did not reach the awaited state in time."""
+    pass
+
+
+class CircuitOpen(ClientException):
+    """Requests are failed without being sent while the API is down."""
+    pass
+
+
 class AuthorizationFailure(ClientException):
     """Cannot authorize API client."""
     pass
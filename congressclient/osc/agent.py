@@ -0,0 +1,303 @@
+#   Licensed under the Apache License, Version 2.0 (the "License"); you may
+#   not use this file except in compliance with the License. You may obtain
+#   a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#   WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#   License for the specific language governing permissions and limitations
+#   under the License.
+
+"""Local agent running congress commands with a warm, authenticated client.
+
+Scripts running many congress commands pay, for every process, the
+import of the CLI, a keystone authentication and new TLS connections.
+The agent keeps one authenticated client with its connection pool alive
+and runs the commands it receives on a unix socket::
+
+    congress-agent serve --os-auth-type password ... &
+    congress-agent run policy list
+    congress-agent run policy rule list classification -f json
+    congress-agent stop
+
+The socket is created in a directory only the current user can access.
+Commands are run one at a time, so commands which would never end, with
+``--watch``, or read stdin, with ``--from-file -`` or ``--batch -``,
+are rejected.  ``congress-agent run`` itself only imports the standard
+library, so it starts in a few milliseconds.
+"""
+
+import argparse
+import io
+import json
+import os
+import socket
+import sys
+
+COMMAND_NAMESPACE = 'openstack.congressclient.v1'
+DEFAULT_IDLE_TIMEOUT = 3600
+
+
+def default_socket_path():
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if not runtime_dir:
+        runtime_dir = os.path.join(os.path.expanduser('~'), '.congressclient')
+    return os.path.join(runtime_dir, 'agent.sock')
+
+
+class _ClientManager(object):
+
+    def __init__(self, congressclient):
+        self.congressclient = congressclient
+
+
+class _App(object):
+    """The part of a cliff App congress commands use."""
+
+    def __init__(self, client, command_manager):
+        self.client_manager = _ClientManager(client)
+        self.command_manager = command_manager
+        self.stdin = io.StringIO()
+        self.stdout = io.StringIO()
+        self.stderr = io.StringIO()
+
+
+class Agent(object):
+    """Runs congress commands received on a unix socket.
+
+    :param client: the congressclient.v1.client.Client commands use
+    :param socket_path: path of the unix socket to listen on
+    :param command_manager: cliff CommandManager of the congress commands,
+        loaded from the installed entry points by default
+    :param idle_timeout: seconds without request after which the agent
+        exits, None to run until stopped
+    """
+
+    def __init__(self, client, socket_path, command_manager=None,
+                 idle_timeout=DEFAULT_IDLE_TIMEOUT):
+        if command_manager is None:
+            from cliff import commandmanager
+            command_manager = commandmanager.CommandManager(
+                COMMAND_NAMESPACE)
+        self.client = client
+        self.socket_path = socket_path
+        self.command_manager = command_manager
+        self.idle_timeout = idle_timeout
+        self._socket = None
+        self._stopped = False
+
+    def run_command(self, argv):
+        """Run one command, returning its exit status, stdout and stderr."""
+        import contextlib
+
+        if not argv or argv[0] != 'congress':
+            argv = ['congress'] + list(argv)
+        app = _App(self.client, self.command_manager)
+        try:
+            # parser errors and help are written to sys.stdout/sys.stderr
+            with contextlib.redirect_stdout(app.stdout), \
+                    contextlib.redirect_stderr(app.stderr):
+                cmd_factory, cmd_name, sub_argv = (
+                    self.command_manager.find_command(argv))
+                cmd = cmd_factory(app, None, cmd_name=cmd_name)
+                parser = cmd.get_parser(cmd_name)
+                parsed_args = parser.parse_args(sub_argv)
+                option = _unsupported_option(parsed_args)
+                if option is not None:
+                    raise Exception('%s is not supported by the agent, run '
+                                    'the command directly.' % option)
+                status = cmd.run(parsed_args)
+        except SystemExit as e:
+            status = e.code if isinstance(e.code, int) else 1
+        except Exception as e:
+            app.stderr.write('%s\n' % e)
+            status = 1
+        return status, app.stdout.getvalue(), app.stderr.getvalue()
+
+    def listen(self):
+        directory = os.path.dirname(self.socket_path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory, 0o700)
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        umask = os.umask(0o177)
+        try:
+            self._socket.bind(self.socket_path)
+        finally:
+            os.umask(umask)
+        self._socket.listen(16)
+        self._socket.settimeout(self.idle_timeout)
+
+    def serve(self):
+        """Handle requests until stopped or idle for idle_timeout."""
+        if self._socket is None:
+            self.listen()
+        try:
+            while not self._stopped:
+                try:
+                    conn, _ = self._socket.accept()
+                except socket.timeout:
+                    break
+                with conn:
+                    conn.settimeout(None)
+                    self._handle(conn)
+        finally:
+            self.close()
+
+    def close(self):
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+    def _handle(self, conn):
+        try:
+            request = json.loads(_read_message(conn))
+        except ValueError as e:
+            _write_message(conn, {'status': 1, 'stdout': '',
+                                  'stderr': 'Invalid request: %s\n' % e})
+            return
+        if request.get('action') == 'stop':
+            self._stopped = True
+            response = {'status': 0, 'stdout': '', 'stderr': ''}
+        else:
+            status, stdout, stderr = self.run_command(
+                request.get('argv') or [])
+            response = {'status': status, 'stdout': stdout,
+                        'stderr': stderr}
+        _write_message(conn, response)
+
+
+def _unsupported_option(parsed_args):
+    """Return the option the agent cannot run a command with, or None."""
+    if getattr(parsed_args, 'watch', None) is not None:
+        return '--watch'
+    # stdin is not forwarded, the command would wait for it forever
+    for name in ('from_file', 'batch'):
+        if getattr(parsed_args, name, None) == '-':
+            return '--%s -' % name.replace('_', '-')
+    return None
+
+
+def _read_message(conn):
+    chunks = []
+    while True:
+        chunk = conn.recv(65536)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        if chunk.endswith(b'\n'):
+            break
+    return b''.join(chunks).decode('utf-8')
+
+
+def _write_message(conn, message):
+    conn.sendall(json.dumps(message).encode('utf-8') + b'\n')
+
+
+def send(request, socket_path=None):
+    """Send a request to a running agent and return its response."""
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    with conn:
+        conn.connect(socket_path or default_socket_path())
+        _write_message(conn, request)
+        return json.loads(_read_message(conn))
+
+
+def _make_client(options):
+    from keystoneauth1 import loading
+
+    from congressclient.v1 import client
+
+    auth = loading.load_auth_from_argparse_arguments(options)
+    sess = loading.load_session_from_argparse_arguments(options, auth=auth)
+    return client.Client(session=sess,
+                         interface=options.os_interface,
+                         service_type='policy',
+                         region_name=options.os_region_name,
+                         endpoint_override=options.os_endpoint_override,
+                         pool_idle_timeout=options.pool_idle_timeout,
+                         retry_policy=True)
+
+
+def _serve(argv):
+    from keystoneauth1 import loading
+
+    from congressclient.common import utils
+
+    parser = argparse.ArgumentParser(prog='congress-agent serve')
+    parser.add_argument('--socket', default=default_socket_path(),
+                        help='Path of the unix socket to listen on')
+    parser.add_argument('--idle-timeout', type=int,
+                        default=DEFAULT_IDLE_TIMEOUT,
+                        help='Exit after this many seconds without request '
+                             '(default: %d, 0 to never exit)' %
+                             DEFAULT_IDLE_TIMEOUT)
+    parser.add_argument('--pool-idle-timeout', type=int, default=60,
+                        help='Drop pooled connections idle for this many '
+                             'seconds (default: 60)')
+    parser.add_argument('--os-region-name',
+                        default=utils.env('OS_REGION_NAME'),
+                        help='Region of the policy endpoint '
+                             '(Env: OS_REGION_NAME)')
+    parser.add_argument('--os-interface',
+                        default=utils.env('OS_INTERFACE',
+                                          default='publicURL'),
+                        help='Interface of the policy endpoint '
+                             '(Env: OS_INTERFACE)')
+    parser.add_argument('--os-endpoint-override',
+                        default=utils.env('OS_POLICY_ENDPOINT') or None,
+                        help='Policy endpoint to use instead of the one of '
+                             'the catalog (Env: OS_POLICY_ENDPOINT)')
+    loading.register_session_argparse_arguments(parser)
+    loading.register_auth_argparse_arguments(parser, argv,
+                                             default='password')
+    options = parser.parse_args(argv)
+    agent = Agent(_make_client(options), options.socket,
+                  idle_timeout=options.idle_timeout or None)
+    agent.listen()
+    sys.stderr.write('congress agent listening on %s\n' % options.socket)
+    agent.serve()
+    return 0
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == 'serve':
+        return _serve(argv[1:])
+    parser = argparse.ArgumentParser(
+        prog='congress-agent',
+        description='Run congress commands through a local agent holding '
+                    'an authenticated client.',
+        epilog="Start the agent with 'congress-agent serve --help'.")
+    parser.add_argument('--socket', default=default_socket_path(),
+                        help='Path of the agent unix socket')
+    parser.add_argument('action', choices=['serve', 'run', 'stop'])
+    parser.add_argument('command', nargs=argparse.REMAINDER,
+                        help='The congress command to run, e.g. '
+                             "'policy list'")
+    options = parser.parse_args(argv)
+    if options.action == 'serve':
+        # options of serve given after it take precedence
+        return _serve(['--socket', options.socket] + options.command)
+    if options.action == 'stop':
+        request = {'action': 'stop'}
+    else:
+        request = {'argv': options.command}
+    try:
+        response = send(request, options.socket)
+    except (IOError, OSError) as e:
+        sys.stderr.write('Cannot reach the congress agent on %s: %s\n' %
+                         (options.socket, e))
+        return 1
+    sys.stdout.write(response['stdout'])
+    sys.stderr.write(response['stderr'])
+    return response['status']
+
+
+if __name__ == '__main__':
+    sys.exit(main())
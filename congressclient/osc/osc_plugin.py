@@ -14,7 +14,7 @@
 
 """OpenStackClient plugin for Governance service."""
 
-from oslo_log import log as logging
+import logging
 
 from congressclient.common import utils
 
@@ -26,6 +26,26 @@ API_NAME = 'congressclient'
 API_VERSIONS = {
     '1': 'congressclient.v1.client.Client',
 }
+INTERFACE = 'publicURL'
+TOKEN_CACHE_OPTION = 'os_policy_token_cache'
+
+
+def _token_cache_enabled(instance):
+    cli_options = getattr(instance, '_cli_options', None)
+    config = getattr(cli_options, 'config', None) or {}
+    # openstack.config drops the os_ prefix of the argparse options
+    for name in (TOKEN_CACHE_OPTION, TOKEN_CACHE_OPTION[3:]):
+        if name in config:
+            return bool(config[name])
+    return _env_flag('OS_POLICY_TOKEN_CACHE')
+
+
+def _env_flag(name):
+    return utils.env(name).lower() in ('1', 'true', 'yes')
+
+
+def _region_name(instance):
+    return getattr(instance, '_region_name', None) or instance.region_name
 
 
 def make_client(instance):
@@ -35,11 +55,92 @@ def make_client(instance):
         instance._api_version[API_NAME],
         API_VERSIONS)
     LOG.debug('instantiating congress client: %s', congress_client)
-    return congress_client(session=instance.session,
-                           auth=None,
-                           interface='publicURL',
-                           service_type='policy',
-                           region_name=instance._region_name)
+    if not _token_cache_enabled(instance):
+        return congress_client(session=instance.session,
+                               auth=None,
+                               interface=INTERFACE,
+                               service_type='policy',
+                               region_name=_region_name(instance),
+                               schema_cache=True,
+                               retry_policy=True)
+    return _make_cached_client(congress_client, instance)
+
+
+def _load_cached_auth(instance):
+    """Return the token cache, key and entry of the auth of instance.
+
+    The cached auth state is set on the auth plugin unless it already
+    holds a token, which is never replaced by an older one.
+    """
+    from congressclient.common import auth_cache
+
+    auth = instance.session.auth
+    cache = auth_cache.AuthCache()
+    key = cache.key(auth, _region_name(instance), INTERFACE)
+    entry = cache.load(key) if key is not None else None
+    if entry is not None and getattr(auth, 'auth_ref', None) is None:
+        LOG.debug('using cached token')
+        auth.set_auth_state(entry[0])
+    return cache, key, entry
+
+
+def _make_cached_client(congress_client, instance):
+    auth = instance.session.auth
+    cache, key, entry = _load_cached_auth(instance)
+    endpoint = None
+    if entry is not None and entry[0] == auth.get_auth_state():
+        LOG.debug('using cached policy endpoint')
+        endpoint = entry[1]
+    client = congress_client(session=instance.session,
+                             auth=None,
+                             interface=INTERFACE,
+                             service_type='policy',
+                             region_name=_region_name(instance),
+                             endpoint_override=endpoint,
+                             schema_cache=True,
+                             retry_policy=True)
+    if key is not None and endpoint is None:
+        # authenticates and looks the endpoint up in the catalog
+        endpoint = client.httpclient.get_endpoint()
+        try:
+            cache.store(key, auth, endpoint)
+        except (IOError, OSError) as e:
+            LOG.warning('Cannot cache the token: %s', e)
+    return client
+
+
+def use_token_cache(client_manager):
+    """Authenticate the commands of client_manager with the cached token.
+
+    OpenStackClient authenticates before running a command, and so before
+    make_client is called.  The setup_auth method of its client manager
+    is wrapped to set the cached auth state on the auth plugin as soon as
+    it is loaded, which keeps it from requesting a new token.
+    """
+    setup_auth = getattr(client_manager, 'setup_auth', None)
+    if setup_auth is None or getattr(setup_auth, 'token_cache', False):
+        return
+
+    def _setup_auth():
+        completed = getattr(client_manager, '_auth_setup_completed', False)
+        setup_auth()
+        if completed or not _token_cache_enabled(client_manager):
+            return
+        _load_cached_auth(client_manager)
+        if client_manager.auth.auth_ref is not None:
+            client_manager._auth_ref = client_manager.auth.auth_ref
+
+    _setup_auth.token_cache = True
+    client_manager.setup_auth = _setup_auth
+
+
+class TokenCacheMixin(object):
+    """Base of the commands, letting them use the cached token."""
+
+    def __init__(self, app, app_args, cmd_name=None):
+        super(TokenCacheMixin, self).__init__(app, app_args,
+                                              cmd_name=cmd_name)
+        use_token_cache(getattr(app, 'client_manager', None))
 
 
 def build_option_parser(parser):
@@ -52,4 +153,12 @@ def build_option_parser(parser):
             default=DEFAULT_POLICY_API_VERSION),
         help=('Policy API version, default=%s (Env: OS_POLICY_API_VERSION)' %
               DEFAULT_POLICY_API_VERSION))
+    parser.add_argument(
+        '--os-policy-token-cache',
+        action='store_true',
+        default=_env_flag('OS_POLICY_TOKEN_CACHE'),
+        help=('Cache the token and policy endpoint on disk, readable only '
+              'by the current user, so that following commands do not '
+              'authenticate again until the token expires '
+              '(Env: OS_POLICY_TOKEN_CACHE)'))
     return parser
@@ -15,13 +15,15 @@
 
 """List API versions implemenations"""
 
+import logging
+
 from cliff import lister
-from oslo_log import log as logging
 
 from congressclient.common import utils
+from congressclient.osc import osc_plugin
 
 
-class ListAPIVersions(lister.Lister):
+class ListAPIVersions(osc_plugin.TokenCacheMixin, lister.Lister):
     """List API Versions."""
 
     log = logging.getLogger(__name__ + '.ListAPIVersions')
@@ -14,18 +14,30 @@
 
 """Datasource action implemenations"""
 
+from concurrent import futures
+import itertools
+import logging
+import sys
+
 from cliff import command
 from cliff import lister
 from cliff import show
-from oslo_log import log as logging
-from oslo_serialization import jsonutils
 import six
 
+from congressclient.common import jsonstream
 from congressclient.common import parseractions
 from congressclient.common import utils
+from congressclient.osc import osc_plugin
+
+# imported when a command needs it, to keep the CLI startup fast
+jsonutils = utils.LazyModule('oslo_serialization.jsonutils')
 
+STREAM_CHUNK_SIZE = 64 * 1024
+DEFAULT_REFRESH_WORKERS = 8
+DEFAULT_REFRESH_TIMEOUT = 300
 
-class ListDatasources(lister.Lister):
+
+class ListDatasources(osc_plugin.TokenCacheMixin, lister.Lister):
     """List Datasources."""
 
     log = logging.getLogger(__name__ + '.ListDatasources')
@@ -49,7 +61,7 @@ class ListDatasources(lister.Lister):
                  for s in data))
 
 
-class ListDatasourceTables(lister.Lister):
+class ListDatasourceTables(osc_plugin.TokenCacheMixin, lister.Lister):
     """List datasource tables."""
 
     log = logging.getLogger(__name__ + '.ListDatasourceTables')
@@ -78,7 +90,7 @@ class ListDatasourceTables(lister.Lister):
                  for s in data))
 
 
-class ShowDatasourceStatus(show.ShowOne):
+class ShowDatasourceStatus(osc_plugin.TokenCacheMixin, show.ShowOne):
     """List status for datasource."""
 
     log = logging.getLogger(__name__ + '.ShowDatasourceStatus')
@@ -102,7 +114,7 @@ class ShowDatasourceStatus(show.ShowOne):
         return zip(*sorted(six.iteritems(data)))
 
 
-class ShowDatasourceActions(lister.Lister):
+class ShowDatasourceActions(osc_plugin.TokenCacheMixin, lister.Lister):
     """List supported actions for datasource."""
 
     log = logging.getLogger(__name__ + '.ShowDatasourceActions')
@@ -136,7 +148,7 @@ class ShowDatasourceActions(lister.Lister):
                 for s in newdata))
 
 
-class ShowDatasourceSchema(lister.Lister):
+class ShowDatasourceSchema(osc_plugin.TokenCacheMixin, lister.Lister):
     """Show schema for datasource."""
 
     log = logging.getLogger(__name__ + '.ShowDatasourceSchema')
@@ -168,7 +180,7 @@ class ShowDatasourceSchema(lister.Lister):
                  for s in newdata))
 
 
-class ShowDatasourceTableSchema(lister.Lister):
+class ShowDatasourceTableSchema(osc_plugin.TokenCacheMixin, lister.Lister):
     """Show schema for datasource table."""
 
     log = logging.getLogger(__name__ + '.ShowDatasourceTableSchema')
@@ -201,7 +213,7 @@ class ShowDatasourceTableSchema(lister.Lister):
                  for s in data['columns']))
 
 
-class ListDatasourceRows(lister.Lister):
+class ListDatasourceRows(osc_plugin.TokenCacheMixin, lister.Lister):
     """List datasource rows."""
 
     log = logging.getLogger(__name__ + '.ListDatasourceRows')
@@ -216,8 +228,41 @@ class ListDatasourceRows(lister.Lister):
             'table',
             metavar="<table>",
             help="Table to get the datasource rows from")
+        parser.add_argument(
+            '--refresh-schema',
+            action='store_true',
+            default=False,
+            help="Fetch the table columns again instead of using the "
+                 "cached ones")
+        utils.add_listing_arguments(parser)
+        utils.add_watch_arguments(parser)
         return parser
 
+    def _watch(self, client, parsed_args, paging, filters):
+        if paging:
+            raise Exception('--watch cannot be combined with paging '
+                            'options.')
+        datasource_id = parsed_args.datasource_name
+        table = parsed_args.table
+
+        def fetch():
+            return [row['data'] for row in client.iter_datasource_rows(
+                datasource_id, table, **filters)]
+
+        snapshots = [fetch()]
+        columns = None
+        if not parsed_args.refresh_schema:
+            columns = client.cached_table_columns(datasource_id, table)
+        if columns is None or (snapshots[0] and
+                               len(columns) != len(snapshots[0][0])):
+            columns = client.fetch_table_columns(datasource_id, table)
+        changes = utils.watch_rows(
+            lambda: snapshots.pop() if snapshots else fetch(),
+            parsed_args.watch, parsed_args.watch_max_interval,
+            parsed_args.watch_count)
+        return (['time', 'change'] + columns,
+                ([now, change] + list(row) for now, change, row in changes))
+
     def take_action(self, parsed_args):
         self.log.debug('take_action(%s)' % parsed_args)
         # set default max-width
@@ -225,18 +270,47 @@ class ListDatasourceRows(lister.Lister):
             parsed_args.max_width = 80
         client = self.app.client_manager.congressclient
         datasource_id = parsed_args.datasource_name
-        results = client.list_datasource_rows(datasource_id,
-                                              parsed_args.table)['results']
-        if results:
-            columns = client.show_datasource_table_schema(
-                datasource_id, parsed_args.table)['columns']
-            columns = [col['name'] for col in columns]
+        paging, filters = utils.get_listing_args(parsed_args)
+        if parsed_args.watch is not None:
+            return self._watch(client, parsed_args, paging, filters)
+        if paging:
+            results = iter(client.list_datasource_rows(
+                datasource_id, parsed_args.table, **dict(paging, **filters)
+            )['results'])
         else:
-            columns = ['data']  # doesn't matter because the rows are empty
+            results = client.iter_datasource_rows(datasource_id,
+                                                  parsed_args.table,
+                                                  **filters)
+        columns = None
+        if not parsed_args.refresh_schema:
+            columns = client.cached_table_columns(datasource_id,
+                                                  parsed_args.table)
+        pending = None
+        if columns is None:
+            # fetch the schema while the rows are being requested
+            executor = futures.ThreadPoolExecutor(1)
+            pending = executor.submit(client.fetch_table_columns,
+                                      datasource_id, parsed_args.table)
+            executor.shutdown(wait=False)
+        # rows are printed while they are still being downloaded, so only
+        # peek at the first one to know the number of columns
+        first = next(results, None)
+        if first is None:
+            # doesn't matter because the rows are empty
+            return (['data'], iter([]))
+        if pending is not None:
+            columns = pending.result()
+        elif len(columns) != len(first['data']):
+            # the datasource was recreated with another driver
+            self.log.debug('cached schema of %s is outdated',
+                           parsed_args.table)
+            columns = client.fetch_table_columns(datasource_id,
+                                                 parsed_args.table)
+        results = itertools.chain([first], results)
         return (columns, (x['data'] for x in results))
 
 
-class ShowDatasourceTable(show.ShowOne):
+class ShowDatasourceTable(osc_plugin.TokenCacheMixin, show.ShowOne):
     """Show Datasource Table properties."""
 
     log = logging.getLogger(__name__ + '.ShowDatasourceTable')
@@ -265,7 +339,7 @@ class ShowDatasourceTable(show.ShowOne):
         return zip(*sorted(six.iteritems(data)))
 
 
-class CreateDatasource(show.ShowOne):
+class CreateDatasource(osc_plugin.TokenCacheMixin, show.ShowOne):
     """Create a datasource."""
 
     log = logging.getLogger(__name__ + '.CreateDatasource')
@@ -308,7 +382,7 @@ class CreateDatasource(show.ShowOne):
         return zip(*sorted(six.iteritems(results)))
 
 
-class DeleteDatasource(command.Command):
+class DeleteDatasource(osc_plugin.TokenCacheMixin, command.Command):
     """Delete a datasource."""
 
     log = logging.getLogger(__name__ + '.DeleteDatasource')
@@ -324,19 +398,21 @@ class DeleteDatasource(command.Command):
     def take_action(self, parsed_args):
         self.log.debug('take_action(%s)' % parsed_args)
         client = self.app.client_manager.congressclient
+        resolver = utils.get_resolver(client)
         try:
             datasource_id = parsed_args.datasource
             client.delete_datasource(datasource_id)
         except Exception:
             # for backwards compatibility with pre-Ocata congress server,
             # try old method of explicit conversion from name to UUID
-            results = client.list_datasources()
-            datasource_id = utils.get_resource_id_from_name(
-                parsed_args.datasource, results)
+            datasource_id = resolver.resolve(
+                'datasources', parsed_args.datasource,
+                client.list_datasources)
             client.delete_datasource(datasource_id)
+        resolver.invalidate('datasources')
 
 
-class UpdateDatasourceRow(command.Command):
+class UpdateDatasourceRow(osc_plugin.TokenCacheMixin, command.Command):
     """Update rows to a datasource table."""
 
     log = logging.getLogger(__name__ + '.UpdateDatasourceRow')
@@ -355,20 +431,93 @@ class UpdateDatasourceRow(command.Command):
             'rows',
             type=jsonutils.loads,
             metavar="<rows>",
+            nargs='?',
             help=("List of Rows should be formmated json style."
                   " ex. [[row1], [row2]]"))
+        parser.add_argument(
+            '--from-file',
+            metavar="<file>",
+            help="Read the rows from a file ('-' for stdin) holding a JSON "
+                 "list of rows, or one JSON row per line with --jsonl")
+        parser.add_argument(
+            '--jsonl',
+            action='store_true',
+            default=False,
+            help="The file given with --from-file holds one JSON row per "
+                 "line")
+        parser.add_argument(
+            '--delta',
+            action='store_true',
+            default=False,
+            help="Compare the rows with the current table rows and send "
+                 "only the added and removed rows, or the full set when "
+                 "the server does not support delta updates")
+        parser.add_argument(
+            '--compress',
+            action='store_true',
+            default=False,
+            help="Send the rows gzip compressed")
         return parser
 
     def take_action(self, parsed_args):
         self.log.debug('take_action(%s)' % parsed_args)
+        if parsed_args.from_file == '-':
+            return self._update(parsed_args,
+                                _iter_rows(sys.stdin, parsed_args.jsonl))
+        elif parsed_args.from_file is not None:
+            with open(parsed_args.from_file, 'r') as stream:
+                return self._update(parsed_args,
+                                    _iter_rows(stream, parsed_args.jsonl))
+        elif parsed_args.rows is not None:
+            return self._update(parsed_args, parsed_args.rows)
+        raise Exception('Rows are required unless --from-file is given.')
+
+    def _update(self, parsed_args, body):
         client = self.app.client_manager.congressclient
-        body = parsed_args.rows
-        client.update_datasource_rows(
+        if not parsed_args.delta:
+            # rows given on the command line are sent in a single request,
+            # which can be retried, rather than streamed
+            progress = None if isinstance(body, list) else self._log_progress
+            client.update_datasource_rows(
+                parsed_args.datasource, parsed_args.table, body,
+                compress=parsed_args.compress, progress=progress)
+            return
+        result = client.update_datasource_rows_delta(
             parsed_args.datasource, parsed_args.table, body)
+        self.app.stdout.write(
+            '%(added)d rows added, %(removed)d removed (%(mode)s update): '
+            'sent %(bytes_sent)d bytes instead of %(bytes_full)d\n' % result)
+
+    def _log_progress(self, rows, sent):
+        self.log.debug('%d rows, %d bytes sent', rows, sent)
+
+
+def _iter_rows(stream, jsonl=False):
+    """Iterate over a JSON list of rows, or over one JSON row per line.
+
+    Rows are read as they are needed so that large files can be uploaded
+    without loading them first.  Since the rows replace those of the
+    table, anything that is not a row makes the whole file invalid.
+    """
+    if not jsonl:
+        chunks = iter(lambda: stream.read(STREAM_CHUNK_SIZE), '')
+        for row in jsonstream.iter_array(chunks):
+            yield row
+        return
+    for number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            row = jsonutils.loads(line)
+        except ValueError as e:
+            raise ValueError('Line %d: %s' % (number, e))
+        if not isinstance(row, list):
+            raise ValueError('Line %d: a row must be a JSON list' % number)
+        yield row
 
 
-class DatasourceRequestRefresh(command.Command):
-    """Trigger a datasource to poll."""
+class DatasourceRequestRefresh(osc_plugin.TokenCacheMixin, command.Command):
+    """Trigger datasources to poll."""
 
     log = logging.getLogger(__name__ + '.DatasourceRequestRefresh')
 
@@ -377,13 +526,55 @@ class DatasourceRequestRefresh(command.Command):
         parser.add_argument(
             'datasource',
             metavar="<datasource>",
-            help="Name or ID of the datasource to poll")
+            nargs='+',
+            help="Name or ID of the datasource(s) to poll")
+        parser.add_argument(
+            '--wait',
+            action='store_true',
+            default=False,
+            help="Wait until the datasources have polled")
+        parser.add_argument(
+            '--timeout',
+            metavar="<seconds>",
+            type=float,
+            default=DEFAULT_REFRESH_TIMEOUT,
+            help="Seconds to wait for each datasource with --wait "
+                 "(default: %d)" % DEFAULT_REFRESH_TIMEOUT)
+        parser.add_argument(
+            '--max-workers',
+            metavar="<count>",
+            type=int,
+            default=DEFAULT_REFRESH_WORKERS,
+            help="Maximum number of datasources refreshed concurrently "
+                 "(default: %d)" % DEFAULT_REFRESH_WORKERS)
         return parser
 
     def take_action(self, parsed_args):
         self.log.debug('take_action(%s)' % parsed_args)
         client = self.app.client_manager.congressclient
-        results = client.list_datasources()
-        datasource_id = utils.get_resource_id_from_name(
-            parsed_args.datasource, results)
-        client.request_refresh(datasource_id, {})
+        resolver = utils.get_resolver(client)
+        if len(parsed_args.datasource) == 1:
+            datasource_ids = [resolver.resolve(
+                'datasources', parsed_args.datasource[0],
+                client.list_datasources)]
+        else:
+            datasource_ids = resolver.resolve_many(
+                'datasources', parsed_args.datasource,
+                client.list_datasources)
+        if len(datasource_ids) == 1 and not parsed_args.wait:
+            client.request_refresh(datasource_ids[0], {})
+            return
+        failed = 0
+        for outcome in client.refresh_datasources(
+                datasource_ids, wait=parsed_args.wait,
+                timeout=parsed_args.timeout,
+                max_workers=parsed_args.max_workers):
+            name = parsed_args.datasource[outcome['index']]
+            if outcome['error'] is not None:
+                failed += 1
+                self.app.stderr.write('Failed to refresh %s: %s\n' %
+                                      (name, outcome['error']))
+            elif parsed_args.wait:
+                self.app.stdout.write('%s refreshed in %.1fs\n' %
+                                      (name, outcome['elapsed']))
+        return 1 if failed else None
@@ -14,15 +14,17 @@
 
 """Driver action implemenations"""
 
+import logging
+
 from cliff import lister
 from cliff import show
-from oslo_log import log as logging
 import six
 
 from congressclient.common import utils
+from congressclient.osc import osc_plugin
 
 
-class ListDrivers(lister.Lister):
+class ListDrivers(osc_plugin.TokenCacheMixin, lister.Lister):
     """List drivers."""
 
     log = logging.getLogger(__name__ + '.ListDrivers')
@@ -45,7 +47,7 @@ class ListDrivers(lister.Lister):
                  for s in data))
 
 
-class ShowDriverConfig(show.ShowOne):
+class ShowDriverConfig(osc_plugin.TokenCacheMixin, show.ShowOne):
     """List driver tables."""
 
     log = logging.getLogger(__name__ + '.ShowDriverConfig')
@@ -77,7 +79,7 @@ class ShowDriverConfig(show.ShowOne):
                  for s in data))
 
 
-class ShowDriverSchema(lister.Lister):
+class ShowDriverSchema(osc_plugin.TokenCacheMixin, lister.Lister):
     """List datasource tables."""
 
     log = logging.getLogger(__name__ + '.ShowDriverSchema')
@@ -14,18 +14,26 @@
 
 """Policy action implemenations"""
 
+import itertools
+import logging
 import sys
+import time
 
 from cliff import command
 from cliff import lister
 from cliff import show
-from keystoneauth1 import exceptions
-from oslo_log import log as logging
-from oslo_serialization import jsonutils
 import six
-import yaml
 
 from congressclient.common import utils
+from congressclient.osc import osc_plugin
+
+# imported when a command needs them, to keep the CLI startup fast
+exceptions = utils.LazyModule('keystoneauth1.exceptions')
+jsonutils = utils.LazyModule('oslo_serialization.jsonutils')
+policy_files = utils.LazyModule('congressclient.common.policy_files')
+yaml = utils.LazyModule('yaml')
+
+DEFAULT_BATCH_WORKERS = 8
 
 
 def _format_rule(rule):
@@ -38,6 +46,20 @@ def _format_rule(rule):
     return formatted_string
 
 
+class _FailureStatusMixin(object):
+    """Exits with 1 after showing the output when some items failed.
+
+    take_action sets failed when an item of a batch fails; the results
+    of the other items are still shown.
+    """
+
+    failed = False
+
+    def run(self, parsed_args):
+        status = super(_FailureStatusMixin, self).run(parsed_args)
+        return 1 if self.failed else status
+
+
 def get_rule_id_from_name(client, parsed_args):
     results = client.list_policy_rules(parsed_args.policy_name)['results']
     rule_id = None
@@ -55,7 +77,8 @@ def get_rule_id_from_name(client, parsed_args):
     return rule_id
 
 
-class CreatePolicyRule(show.ShowOne):
+class CreatePolicyRule(osc_plugin.TokenCacheMixin, _FailureStatusMixin,
+                       show.ShowOne):
     """Create a policy rule."""
 
     log = logging.getLogger(__name__ + '.CreatePolicyRule')
@@ -69,6 +92,7 @@ class CreatePolicyRule(show.ShowOne):
         parser.add_argument(
             'rule',
             metavar="<rule>",
+            nargs='?',
             help="Policy rule")
         parser.add_argument(
             '--name', dest="rule_name",
@@ -76,6 +100,19 @@ class CreatePolicyRule(show.ShowOne):
         parser.add_argument(
             '--comment', dest="comment",
             help="Comment about policy rule")
+        parser.add_argument(
+            '--from-file',
+            metavar="<file>",
+            help="Create every rule of a YAML or JSON file instead of a "
+                 "single rule; the file holds rules with a rule and "
+                 "optionally a name and comment, or a policy")
+        parser.add_argument(
+            '--max-workers',
+            metavar="<count>",
+            type=int,
+            default=DEFAULT_BATCH_WORKERS,
+            help="Maximum number of rules created concurrently with "
+                 "--from-file (default: %d)" % DEFAULT_BATCH_WORKERS)
         return parser
 
     def take_action(self, parsed_args):
@@ -84,6 +121,11 @@ class CreatePolicyRule(show.ShowOne):
         if parsed_args.max_width == 0:
             parsed_args.max_width = 80
         client = self.app.client_manager.congressclient
+        if parsed_args.from_file is not None:
+            return self._create_from_file(client, parsed_args)
+        if parsed_args.rule is None:
+            raise Exception('A rule is required unless --from-file is '
+                            'given.')
         body = {'rule': parsed_args.rule}
         if parsed_args.rule_name:
             body['name'] = parsed_args.rule_name
@@ -92,8 +134,33 @@ class CreatePolicyRule(show.ShowOne):
         data = client.create_policy_rule(parsed_args.policy_name, body)
         return zip(*sorted(six.iteritems(data)))
 
+    def _create_from_file(self, client, parsed_args):
+        rules = policy_files.load_rules(parsed_args.from_file)
+        start = time.monotonic()
+        ids = [None] * len(rules)
+        errors = []
+        for outcome in client.create_policy_rules(
+                parsed_args.policy_name, rules,
+                max_workers=parsed_args.max_workers):
+            if outcome['error'] is not None:
+                errors.append((outcome['index'], outcome['error']))
+            else:
+                ids[outcome['index']] = outcome['result'].get('id')
+        utils.get_resolver(client).invalidate(
+            ('policy_rules', parsed_args.policy_name))
+        self.failed = bool(errors)
+        data = {
+            'created': len(rules) - len(errors),
+            'failed': len(errors),
+            'ids': '\n'.join(rule_id for rule_id in ids if rule_id),
+            'errors': '\n'.join('rule %d: %s' % (index + 1, error)
+                                for index, error in sorted(errors)),
+            'elapsed': '%.3f' % (time.monotonic() - start),
+        }
+        return zip(*sorted(six.iteritems(data)))
+
 
-class DeletePolicyRule(command.Command):
+class DeletePolicyRule(osc_plugin.TokenCacheMixin, command.Command):
     """Delete a policy rule."""
 
     log = logging.getLogger(__name__ + '.DeletePolicyRule')
@@ -107,19 +174,46 @@ class DeletePolicyRule(command.Command):
         parser.add_argument(
             'rule_id',
             metavar="<rule-id/rule-name>",
-            help="ID/Name of the policy rule to delete")
+            nargs='+',
+            help="ID/Name of the policy rule(s) to delete")
+        parser.add_argument(
+            '--max-workers',
+            metavar="<count>",
+            type=int,
+            default=DEFAULT_BATCH_WORKERS,
+            help="Maximum number of rules deleted concurrently "
+                 "(default: %d)" % DEFAULT_BATCH_WORKERS)
         return parser
 
     def take_action(self, parsed_args):
         self.log.debug('take_action(%s)' % parsed_args)
         client = self.app.client_manager.congressclient
-        results = client.list_policy_rules(parsed_args.policy_name)
-        rule_id = utils.get_resource_id_from_name(
-            parsed_args.rule_id, results)
-        client.delete_policy_rule(parsed_args.policy_name, rule_id)
-
-
-class ListPolicyRules(command.Command):
+        resolver = utils.get_resolver(client)
+        rule_type = ('policy_rules', parsed_args.policy_name)
+        # a single listing resolves every name
+        rule_ids = resolver.resolve_many(
+            rule_type, parsed_args.rule_id,
+            lambda: client.list_policy_rules(parsed_args.policy_name))
+        try:
+            if len(rule_ids) == 1:
+                client.delete_policy_rule(parsed_args.policy_name,
+                                          rule_ids[0])
+                return
+            failed = 0
+            for outcome in client.delete_policy_rules(
+                    parsed_args.policy_name, rule_ids,
+                    max_workers=parsed_args.max_workers):
+                if outcome['error'] is not None:
+                    failed += 1
+                    name = parsed_args.rule_id[outcome['index']]
+                    self.app.stderr.write('Failed to delete rule %s: %s\n'
+                                          % (name, outcome['error']))
+            return 1 if failed else None
+        finally:
+            resolver.invalidate(rule_type)
+
+
+class ListPolicyRules(osc_plugin.TokenCacheMixin, command.Command):
     """List policy rules."""
 
     log = logging.getLogger(__name__ + '.ListPolicyRules')
@@ -130,12 +224,16 @@ class ListPolicyRules(command.Command):
             'policy_name',
             metavar="<policy-name>",
             help="Name of the policy")
+        utils.add_listing_arguments(parser, item='rule')
         return parser
 
     def take_action(self, parsed_args):
         self.log.debug('take_action(%s)' % parsed_args)
         client = self.app.client_manager.congressclient
-        results = client.list_policy_rules(parsed_args.policy_name)['results']
+        paging, filters = utils.get_listing_args(parsed_args)
+        results = client.list_policy_rules(parsed_args.policy_name,
+                                           **dict(paging, **filters)
+                                           )['results']
         for result in results:
             print("// ID: %s" % str(result['id']))
             print("// Name: %s" % str(result.get('name')))
@@ -146,7 +244,7 @@ class ListPolicyRules(command.Command):
         return 0
 
 
-class SimulatePolicy(command.Command):
+class SimulatePolicy(osc_plugin.TokenCacheMixin, command.Command):
     """Show the result of simulation."""
 
     log = logging.getLogger(__name__ + '.SimulatePolicy')
@@ -160,14 +258,17 @@ class SimulatePolicy(command.Command):
         parser.add_argument(
             'query',
             metavar="<query>",
+            nargs='?',
             help="String representing query (policy rule or literal)")
         parser.add_argument(
             'sequence',
             metavar="<sequence>",
+            nargs='?',
             help="String representing sequence of updates/actions")
         parser.add_argument(
             'action_policy',
             metavar="<action_policy>",
+            nargs='?',
             help="Name of the policy with actions",
             default=None)
         parser.add_argument(
@@ -180,10 +281,29 @@ class SimulatePolicy(command.Command):
             action='store_true',
             default=False,
             help="Include trace describing computation")
+        parser.add_argument(
+            '--batch',
+            metavar="<file>",
+            help="Run every simulation case of a JSON-lines or YAML file "
+                 "('-' for stdin) instead of a single query; each case "
+                 "holds a query, a sequence and optionally an "
+                 "action_policy")
+        parser.add_argument(
+            '--max-workers',
+            metavar="<count>",
+            type=int,
+            default=DEFAULT_BATCH_WORKERS,
+            help="Maximum number of simulations run concurrently in batch "
+                 "mode (default: %d)" % DEFAULT_BATCH_WORKERS)
         return parser
 
     def take_action(self, parsed_args):
         self.log.debug('take_action(%s)' % parsed_args)
+        if parsed_args.batch is not None:
+            return self._take_batch_action(parsed_args)
+        if parsed_args.query is None or parsed_args.sequence is None:
+            raise Exception('A query and a sequence are required unless '
+                            '--batch is given.')
         client = self.app.client_manager.congressclient
         args = {}
         args['query'] = parsed_args.query
@@ -211,8 +331,65 @@ class SimulatePolicy(command.Command):
             print(results['trace'])
         return 0
 
-
-class ListPolicyTables(lister.Lister):
+    def _take_batch_action(self, parsed_args):
+        client = self.app.client_manager.congressclient
+        if parsed_args.batch == '-':
+            cases = _load_cases(sys.stdin, '-')
+            return self._print_batch(client, parsed_args, cases)
+        with open(parsed_args.batch, 'r') as stream:
+            cases = _load_cases(stream, parsed_args.batch)
+            return self._print_batch(client, parsed_args, cases)
+
+    def _print_batch(self, client, parsed_args, cases):
+        failed = 0
+        for outcome in client.simulate_many(
+                parsed_args.policy, cases, trace=parsed_args.trace,
+                delta=parsed_args.delta,
+                max_workers=parsed_args.max_workers):
+            case = outcome['case']
+            # invalid cases are reported as failed
+            line = {'index': outcome['index'],
+                    'query': case.get('query') if isinstance(case, dict)
+                    else None,
+                    'elapsed': round(outcome['elapsed'], 6)}
+            if outcome['error'] is not None:
+                failed += 1
+                line['error'] = six.text_type(outcome['error'])
+            else:
+                line['result'] = outcome['result'].get('result')
+                if 'trace' in outcome['result']:
+                    line['trace'] = outcome['result']['trace']
+            self.app.stdout.write(jsonutils.dumps(line) + '\n')
+            self.app.stdout.flush()
+        return 1 if failed else 0
+
+
+def _load_cases(stream, name):
+    """Yield the simulation cases of a JSON-lines or YAML stream.
+
+    YAML files (.yaml/.yml) may hold one case per document or lists of
+    cases; anything else is read as one JSON object per line.
+    """
+    if name.endswith(('.yaml', '.yml')):
+        for document in yaml.safe_load_all(stream):
+            if isinstance(document, list):
+                for case in document:
+                    yield case
+            elif document is not None:
+                yield document
+        return
+    for number, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield jsonutils.loads(line)
+        except ValueError as e:
+            raise Exception('Invalid simulation case on line %d of %s: %s'
+                            % (number, name, e))
+
+
+class ListPolicyTables(osc_plugin.TokenCacheMixin, lister.Lister):
     """List policy tables."""
 
     log = logging.getLogger(__name__ + '.ListPolicyTables')
@@ -240,7 +417,7 @@ class ListPolicyTables(lister.Lister):
                  for s in data))
 
 
-class ListPolicy(lister.Lister):
+class ListPolicy(osc_plugin.TokenCacheMixin, lister.Lister):
     """List Policy."""
 
     log = logging.getLogger(__name__ + '.ListPolicy')
@@ -263,7 +440,7 @@ class ListPolicy(lister.Lister):
                  for s in data))
 
 
-class CreatePolicy(show.ShowOne):
+class CreatePolicy(osc_plugin.TokenCacheMixin, show.ShowOne):
     """Create a policy."""
 
     log = logging.getLogger(__name__ + '.CreatePolicy')
@@ -307,7 +484,7 @@ class CreatePolicy(show.ShowOne):
         return zip(*sorted(six.iteritems(data)))
 
 
-class CreatePolicyFromFile(show.ShowOne):
+class CreatePolicyFromFile(osc_plugin.TokenCacheMixin, show.ShowOne):
     """Create a policy."""
 
     log = logging.getLogger(__name__ + '.CreatePolicy')
@@ -327,7 +504,7 @@ class CreatePolicyFromFile(show.ShowOne):
             parsed_args.max_width = 80
         client = self.app.client_manager.congressclient
         with open(parsed_args.policy_file_path, "r") as stream:
-            policies = yaml.load_all(stream)
+            policies = yaml.load_all(stream, Loader=policy_files.Loader)
             try:
                 body = next(policies)
             except StopIteration:
@@ -348,7 +525,162 @@ class CreatePolicyFromFile(show.ShowOne):
         return zip(*sorted(six.iteritems(data)))
 
 
-class DeletePolicy(command.Command):
+class ImportPolicies(osc_plugin.TokenCacheMixin, _FailureStatusMixin,
+                     lister.Lister):
+    """Create the policies of many YAML files concurrently."""
+
+    log = logging.getLogger(__name__ + '.ImportPolicies')
+
+    def get_parser(self, prog_name):
+        parser = super(ImportPolicies, self).get_parser(prog_name)
+        parser.add_argument(
+            'paths',
+            metavar="<path>",
+            nargs='+',
+            help="Policy file, possibly holding many YAML documents, or "
+                 "directory searched for .yaml and .yml files")
+        parser.add_argument(
+            '--max-workers',
+            metavar="<count>",
+            type=int,
+            default=DEFAULT_BATCH_WORKERS,
+            help="Maximum number of policies created concurrently "
+                 "(default: %d)" % DEFAULT_BATCH_WORKERS)
+        return parser
+
+    def take_action(self, parsed_args):
+        self.log.debug('take_action(%s)' % parsed_args)
+        client = self.app.client_manager.congressclient
+        # validate everything before creating anything
+        policies = policy_files.load_policies(parsed_args.paths)
+
+        start = time.monotonic()
+        data = [None] * len(policies)
+        failed = 0
+        for outcome in client.create_policies(
+                [body for path, body in policies],
+                max_workers=parsed_args.max_workers):
+            index = outcome['index']
+            if outcome['error'] is not None:
+                failed += 1
+                status = 'error: %s' % outcome['error']
+                policy_id = None
+            else:
+                status = 'created'
+                policy_id = outcome['result'].get('id')
+            data[index] = (policies[index][0], outcome['policy']['name'],
+                           policy_id, status, '%.3f' % outcome['elapsed'])
+        self.app.stderr.write(
+            'Imported %d of %d policies in %.3f seconds, %d failed\n' %
+            (len(policies) - failed, len(policies),
+             time.monotonic() - start, failed))
+        self.failed = bool(failed)
+        return (['file', 'name', 'id', 'status', 'elapsed'], data)
+
+
+class SyncPolicy(osc_plugin.TokenCacheMixin, _FailureStatusMixin,
+                 lister.Lister):
+    """Update the rules of a policy to match a policy file.
+
+    Only the rules that differ, by name and rule text ignoring
+    whitespace, are deleted or created.  The policy is created when it
+    does not exist yet.
+    """
+
+    log = logging.getLogger(__name__ + '.SyncPolicy')
+
+    def get_parser(self, prog_name):
+        parser = super(SyncPolicy, self).get_parser(prog_name)
+        parser.add_argument(
+            'policy_file_path',
+            metavar="<policy_file_path>",
+            help="Path to a file holding a single policy")
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            default=False,
+            help="Show the changes without making them")
+        parser.add_argument(
+            '--max-workers',
+            metavar="<count>",
+            type=int,
+            default=DEFAULT_BATCH_WORKERS,
+            help="Maximum number of rules changed concurrently "
+                 "(default: %d)" % DEFAULT_BATCH_WORKERS)
+        return parser
+
+    def take_action(self, parsed_args):
+        self.log.debug('take_action(%s)' % parsed_args)
+        client = self.app.client_manager.congressclient
+        policies = policy_files.load_policies([parsed_args.policy_file_path])
+        if len(policies) != 1:
+            raise Exception('Expected a single policy in %s, found %d.' %
+                            (parsed_args.policy_file_path, len(policies)))
+        body = policies[0][1]
+        policy_name = body['name']
+        columns = ['action', 'id', 'name', 'rule', 'status']
+
+        try:
+            current = client.list_policy_rules(policy_name)['results']
+        except exceptions.NotFound:
+            return columns, self._create_policy(client, body, parsed_args)
+
+        to_delete, to_create, unchanged = policy_files.diff_rules(
+            current, body.get('rules', []))
+        deleted = [(rule, 'pending') for rule in to_delete]
+        created = [(rule, 'pending') for rule in to_create]
+        if not parsed_args.dry_run:
+            # deletions first, a changed rule may keep its name
+            deleted = self._apply(client.delete_policy_rules(
+                policy_name, [rule['id'] for rule in to_delete],
+                max_workers=parsed_args.max_workers), to_delete, 'deleted')
+            created = self._apply(client.create_policy_rules(
+                policy_name, to_create,
+                max_workers=parsed_args.max_workers), to_create, 'created')
+            utils.get_resolver(client).invalidate(
+                ('policy_rules', policy_name))
+            self.failed = any(status.startswith('error')
+                              for rule, status in deleted + created)
+
+        data = [('delete', rule.get('id'), rule.get('name'), rule['rule'],
+                 status) for rule, status in deleted]
+        data.extend(('create', rule.get('id'), rule.get('name'),
+                     rule['rule'], status) for rule, status in created)
+        self.app.stderr.write(
+            'Policy %s: %d rules deleted, %d created, %d unchanged%s\n' %
+            (policy_name, len(to_delete), len(to_create), len(unchanged),
+             ' (dry run)' if parsed_args.dry_run else ''))
+        return columns, data
+
+    @staticmethod
+    def _apply(outcomes, rules, done):
+        applied = [None] * len(rules)
+        for outcome in outcomes:
+            rule = rules[outcome['index']]
+            if outcome['error'] is not None:
+                applied[outcome['index']] = (
+                    rule, 'error: %s' % outcome['error'])
+            else:
+                if isinstance(outcome['result'], dict) and (
+                        'id' in outcome['result']):
+                    rule = dict(rule, id=outcome['result']['id'])
+                applied[outcome['index']] = (rule, done)
+        return applied
+
+    def _create_policy(self, client, body, parsed_args):
+        rules = body.get('rules', [])
+        status = 'pending'
+        if not parsed_args.dry_run:
+            client.create_policy(body)
+            status = 'created'
+        self.app.stderr.write('Policy %s: created with %d rules%s\n' % (
+            body['name'], len(rules),
+            ' (dry run)' if parsed_args.dry_run else ''))
+        return [('create', None, rule.get('name'), rule['rule'], status)
+                for rule in rules]
+
+
+class DeletePolicy(osc_plugin.TokenCacheMixin, command.Command):
     """Delete a policy."""
 
     log = logging.getLogger(__name__ + '.DeletePolicy')
@@ -366,9 +698,10 @@ class DeletePolicy(command.Command):
         client = self.app.client_manager.congressclient
 
         client.delete_policy(parsed_args.policy)
+        utils.get_resolver(client).invalidate('policies')
 
 
-class ListPolicyRows(lister.Lister):
+class ListPolicyRows(osc_plugin.TokenCacheMixin, lister.Lister):
     """List policy rows."""
 
     log = logging.getLogger(__name__ + '.ListPolicyRows')
@@ -388,30 +721,116 @@ class ListPolicyRows(lister.Lister):
             action='store_true',
             default=False,
             help="Display explanation of result")
+        parser.add_argument(
+            '--refresh-schema',
+            action='store_true',
+            default=False,
+            help="Derive the column names from the policy rules again "
+                 "instead of using the cached ones")
+        utils.add_listing_arguments(parser)
+        utils.add_watch_arguments(parser)
         return parser
 
+    def _get_columns(self, client, parsed_args, width):
+        """Name the columns after the variables of the rule heads."""
+        refresh = parsed_args.refresh_schema
+        while True:
+            try:
+                names = client.policy_table_columns(
+                    parsed_args.policy_name, parsed_args.table,
+                    refresh=refresh)
+            except exceptions.ClientException as e:
+                self.log.debug('cannot get the columns of %s: %s',
+                               parsed_args.table, e)
+                names = []
+            if len(names) == width or not names or refresh:
+                break
+            # rules changed since the names were cached
+            refresh = True
+        if len(names) != width:
+            names = ['Col%s' % (i) for i in range(0, width)]
+        return names
+
+    def _watch(self, client, parsed_args, paging, filters):
+        if paging or parsed_args.trace:
+            raise Exception('--watch cannot be combined with --trace or '
+                            'paging options.')
+
+        def fetch():
+            return [row['data'] for row in client.iter_policy_rows(
+                parsed_args.policy_name, parsed_args.table, **filters)]
+
+        changes = utils.watch_rows(
+            fetch, parsed_args.watch, parsed_args.watch_max_interval,
+            parsed_args.watch_count)
+        # the width of the rows is only known once one is found, tables
+        # holding only facts having no rule to name their columns after
+        first = next(changes, None)
+        if first is None:
+            return (['time', 'change'], [])
+        columns = self._get_columns(client, parsed_args, len(first[2]))
+        return (['time', 'change'] + columns,
+                ([now, change] + list(row) for now, change, row in
+                 itertools.chain([first], changes)))
+
     def take_action(self, parsed_args):
         self.log.debug('take_action(%s)' % parsed_args)
         # set default max-width
         if parsed_args.max_width == 0:
             parsed_args.max_width = 80
         client = self.app.client_manager.congressclient
-        answer = client.list_policy_rows(parsed_args.policy_name,
-                                         parsed_args.table,
-                                         parsed_args.trace)
-
-        if 'trace' in answer:
-            sys.stdout.write(answer['trace'] + '\n')
-        results = answer['results']
+        paging, filters = utils.get_listing_args(parsed_args)
+        if parsed_args.watch is not None:
+            return self._watch(client, parsed_args, paging, filters)
+        if parsed_args.trace or paging:
+            # the trace is printed ahead of the rows, so the whole answer
+            # has to be received first
+            answer = client.list_policy_rows(parsed_args.policy_name,
+                                             parsed_args.table,
+                                             parsed_args.trace,
+                                             **dict(paging, **filters))
+            if 'trace' in answer:
+                sys.stdout.write(answer['trace'] + '\n')
+            results = iter(answer['results'])
+        else:
+            results = client.iter_policy_rows(parsed_args.policy_name,
+                                              parsed_args.table, **filters)
+        first = next(results, None)
         columns = []
-        if results:
-            columns = ['Col%s' % (i)
-                       for i in range(0, len(results[0]['data']))]
+        if first is not None:
+            columns = self._get_columns(client, parsed_args,
+                                        len(first['data']))
+            results = itertools.chain([first], results)
         self.log.debug("Columns: " + str(columns))
-        return (columns, (x['data'] for x in results))
-
-
-class ShowPolicyRule(show.ShowOne):
+        rows = (x['data'] for x in results)
+        if parsed_args.columns and columns:
+            columns, rows = _project(columns, rows, parsed_args.columns)
+        return (columns, rows)
+
+
+def _project(columns, rows, selected):
+    """Keep only the selected columns of the rows before formatting.
+
+    Columns are selected by name or, as before they were named, as
+    Col0..ColN.  Unknown names are left for cliff to report.
+    """
+    positions = []
+    names = []
+    for name in selected:
+        if name in columns:
+            positions.append(columns.index(name))
+        elif name.startswith('Col') and name[3:].isdigit() and \
+                int(name[3:]) < len(columns):
+            positions.append(int(name[3:]))
+        else:
+            continue
+        names.append(name)
+    if not positions:
+        return columns, rows
+    return names, ([row[i] for i in positions] for row in rows)
+
+
+class ShowPolicyRule(osc_plugin.TokenCacheMixin, show.ShowOne):
     """Show a policy rule."""
 
     log = logging.getLogger(__name__ + '.ShowPolicyRule')
@@ -435,14 +854,14 @@ class ShowPolicyRule(show.ShowOne):
         if parsed_args.max_width == 0:
             parsed_args.max_width = 80
         client = self.app.client_manager.congressclient
-        results = client.list_policy_rules(parsed_args.policy_name)
-        rule_id = utils.get_resource_id_from_name(
-            parsed_args.rule_id, results)
+        rule_id = utils.get_resolver(client).resolve(
+            ('policy_rules', parsed_args.policy_name), parsed_args.rule_id,
+            lambda: client.list_policy_rules(parsed_args.policy_name))
         data = client.show_policy_rule(parsed_args.policy_name, rule_id)
         return zip(*sorted(six.iteritems(data)))
 
 
-class ShowPolicyTable(show.ShowOne):
+class ShowPolicyTable(osc_plugin.TokenCacheMixin, show.ShowOne):
     """Show policy table properties."""
 
     log = logging.getLogger(__name__ + '.ShowPolicyTable')
@@ -471,7 +890,7 @@ class ShowPolicyTable(show.ShowOne):
         return zip(*sorted(six.iteritems(data)))
 
 
-class ShowPolicy(show.ShowOne):
+class ShowPolicy(osc_plugin.TokenCacheMixin, show.ShowOne):
     """Show policy properties."""
 
     log = logging.getLogger(__name__ + '.ShowPolicy')
@@ -491,8 +910,7 @@ class ShowPolicy(show.ShowOne):
         if parsed_args.max_width == 0:
             parsed_args.max_width = 80
         client = self.app.client_manager.congressclient
-        results = client.list_policy()
-        policy_id = utils.get_resource_id_from_name(
-            parsed_args.policy_name, results)
+        policy_id = utils.get_resolver(client).resolve(
+            'policies', parsed_args.policy_name, client.list_policy)
         data = client.show_policy(policy_id)
         return zip(*sorted(six.iteritems(data)))
@@ -0,0 +1,224 @@
+#   Licensed under the Apache License, Version 2.0 (the "License"); you may
+#   not use this file except in compliance with the License. You may obtain
+#   a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#   WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#   License for the specific language governing permissions and limitations
+#   under the License.
+#
+
+"""A local stand-in for the Congress API serving synthetic data.
+
+Used by functional tests and by tools/benchmark.py to exercise the
+client over real HTTP without a Congress deployment.
+"""
+
+import gzip
+from http import server
+import json
+import re
+import socketserver
+import threading
+from urllib import parse
+
+
+class FakeCongressData(object):
+    """Synthetic policies, rules and datasource tables.
+
+    :param policies: number of policies, named policy0..policyN
+    :param rules: number of rules per policy
+    :param tables: number of tables per policy and per datasource
+    :param rows: number of rows per table
+    :param columns: number of columns per table
+    :param datasources: number of datasources, named ds0..dsN
+    """
+
+    def __init__(self, policies=2, rules=10, tables=2, rows=100, columns=4,
+                 datasources=2):
+        self.policies = ['policy%d' % i for i in range(policies)]
+        self.datasources = ['ds%d' % i for i in range(datasources)]
+        self.tables = ['table%d' % i for i in range(tables)]
+        self.columns = ['col%d' % i for i in range(columns)]
+        self.rules = [{'id': 'rule-%d' % i,
+                       'name': 'rule%d' % i,
+                       'comment': 'rule %d' % i,
+                       'rule': 'table%d(x) :- ds0:table%d(x)' % (i, i)}
+                      for i in range(rules)]
+        self.rows = [{'data': ['row%d' % row] +
+                      [row * column for column in range(1, columns)]}
+                     for row in range(rows)]
+        # bodies received by PUT, keyed by request path
+        self.updates = {}
+        # table bodies are the bulk of the traffic, encode them only once
+        self.rows_body = self._encode({'results': self.rows})
+        self._rows_body_gzip = gzip.compress(self.rows_body)
+
+    @staticmethod
+    def _encode(body):
+        return json.dumps(body).encode('utf-8')
+
+    def compress(self, body):
+        """Return body gzip compressed."""
+        if body is self.rows_body:
+            return self._rows_body_gzip
+        return gzip.compress(body)
+
+    def get(self, path, query):
+        """Return the JSON encoded response body for GET path, or None."""
+        parts = [part for part in path.split('/') if part]
+        if not parts:
+            return self._encode({'versions': [{'id': 'v1',
+                                               'status': 'CURRENT'}]})
+        if parts[0] != 'v1':
+            return None
+        parts = parts[1:]
+        if parts == ['policies']:
+            return self._encode({'results': [
+                {'id': 'id-%s' % name, 'name': name, 'owner_id': 'system',
+                 'kind': 'nonrecursive', 'description': ''}
+                for name in self.policies]})
+        if parts == ['data-sources']:
+            return self._encode({'results': [
+                {'id': 'id-%s' % name, 'name': name, 'driver': 'fake',
+                 'enabled': True, 'config': {}, 'description': ''}
+                for name in self.datasources]})
+        if len(parts) < 3:
+            return None
+        kind, rest = parts[0], parts[2:]
+        if kind == 'policies' and rest == ['rules']:
+            return self._encode({'results': self.rules})
+        if rest == ['tables']:
+            return self._encode({'results': [{'id': table}
+                                             for table in self.tables]})
+        if len(rest) == 3 and rest[0] == 'tables':
+            if rest[2] == 'rows':
+                if 'trace' in query:
+                    return self._encode({'results': self.rows,
+                                         'trace': 'Call %s(x)' % rest[1]})
+                return self.rows_body
+            if rest[2] == 'spec' and kind == 'data-sources':
+                return self._encode({'table_id': rest[1], 'columns': [
+                    {'name': column, 'description': 'None'}
+                    for column in self.columns]})
+        return None
+
+    def post(self, path, query, body):
+        """Return the JSON encoded response body for POST path, or None."""
+        if query.get('action') == ['simulate']:
+            return self._encode({'result': [
+                re.sub(r'\(.*', '(1)', body.get('query', ''))]})
+        if path == '/v1/policies':
+            return self._encode(dict(body, id='id-%s' % body.get('name'),
+                                     rules=body.get('rules', [])))
+        if path.endswith('/rules'):
+            return self._encode(dict(body, id='rule-new'))
+        if query.get('action') == ['request-refresh']:
+            return self._encode({})
+        return None
+
+
+class _Handler(server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, body):
+        if body is None:
+            body = json.dumps({'error': {'message': 'Not Found'}}).encode()
+            self.send_response(404)
+        else:
+            self.send_response(200)
+        if (len(body) >= 1024 and
+                'gzip' in self.headers.get('Accept-Encoding', '')):
+            body = self.server.data.compress(body)
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = parse.urlsplit(self.path)
+        self._reply(self.server.data.get(url.path, parse.parse_qs(url.query)))
+
+    def do_POST(self):
+        url = parse.urlsplit(self.path)
+        length = int(self.headers.get('Content-Length') or 0)
+        body = json.loads(self.rfile.read(length) or b'{}')
+        self._reply(self.server.data.post(url.path,
+                                          parse.parse_qs(url.query), body))
+
+    def _read_body(self):
+        if self.headers.get('Transfer-Encoding') == 'chunked':
+            parts = []
+            while True:
+                size = int(self.rfile.readline().split(b';')[0], 16)
+                parts.append(self.rfile.read(size))
+                self.rfile.readline()
+                if not size:
+                    break
+            body = b''.join(parts)
+        else:
+            body = self.rfile.read(int(self.headers.get('Content-Length') or
+                                       0))
+        if self.headers.get('Content-Encoding') == 'gzip':
+            body = gzip.decompress(body)
+        return body
+
+    def do_PUT(self):
+        self.server.data.updates[self.path] = json.loads(
+            self._read_body() or b'null')
+        self._reply(b'{}')
+
+    def do_DELETE(self):
+        self._reply(b'{}')
+
+
+class _ThreadingHTTPServer(socketserver.ThreadingMixIn, server.HTTPServer):
+    daemon_threads = True
+
+
+class FakeCongressServer(object):
+    """Serves FakeCongressData on an ephemeral localhost port.
+
+    Example
+    ::
+
+        with fake_server.FakeCongressServer(rows=10000) as fake:
+            congress = client.Client(session=session.Session(),
+                                     endpoint_override=fake.url)
+    """
+
+    def __init__(self, data=None, **kwargs):
+        self.data = data or FakeCongressData(**kwargs)
+        self._server = _ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self._server.data = self.data
+        self._thread = None
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:%d' % self._server.server_address[1]
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        kwargs={'poll_interval': 0.05})
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
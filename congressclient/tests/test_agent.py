@@ -0,0 +1,113 @@
+#   Licensed under the Apache License, Version 2.0 (the "License"); you may
+#   not use this file except in compliance with the License. You may obtain
+#   a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#   WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#   License for the specific language governing permissions and limitations
+#   under the License.
+#
+
+import json
+import os
+import tempfile
+import threading
+
+from cliff import commandmanager
+import mock
+
+from congressclient.osc import agent
+from congressclient.osc.v1 import policy
+from congressclient.tests import utils
+
+
+class TestAgent(utils.TestCase):
+
+    def setUp(self):
+        super(TestAgent, self).setUp()
+        self.client = mock.Mock()
+        self.client.list_policy.return_value = {
+            'results': [{'id': 'p1', 'name': 'classification',
+                         'owner_id': 'user', 'kind': 'nonrecursive',
+                         'description': ''}]}
+        manager = commandmanager.CommandManager('congressclient.tests')
+        manager.add_command('congress policy list', policy.ListPolicy)
+        manager.add_command('congress policy row list',
+                            policy.ListPolicyRows)
+        manager.add_command('congress policy simulate',
+                            policy.SimulatePolicy)
+        directory = tempfile.mkdtemp()
+        self.addCleanup(os.rmdir, directory)
+        self.socket_path = os.path.join(directory, 'agent.sock')
+        self.agent = agent.Agent(self.client, self.socket_path,
+                                 command_manager=manager, idle_timeout=10)
+        self.agent.listen()
+        self.thread = threading.Thread(target=self.agent.serve)
+        self.thread.start()
+        self.addCleanup(self._stop)
+
+    def _stop(self):
+        if self.thread.is_alive():
+            agent.send({'action': 'stop'}, self.socket_path)
+            self.thread.join()
+
+    def test_socket_is_private(self):
+        self.assertEqual(0o600, os.stat(self.socket_path).st_mode & 0o777)
+
+    def test_run_reuses_client(self):
+        for _ in range(2):
+            response = agent.send(
+                {'argv': ['policy', 'list', '-f', 'json']},
+                self.socket_path)
+            self.assertEqual(0, response['status'])
+            self.assertEqual('classification',
+                             json.loads(response['stdout'])[0]['name'])
+        self.assertEqual(2, self.client.list_policy.call_count)
+
+    def test_run_bad_arguments(self):
+        response = agent.send({'argv': ['policy', 'list', '--bogus']},
+                              self.socket_path)
+        self.assertEqual(2, response['status'])
+        self.assertIn('--bogus', response['stderr'])
+
+    def test_run_unknown_command(self):
+        response = agent.send({'argv': ['policy', 'frobnicate']},
+                              self.socket_path)
+        self.assertEqual(1, response['status'])
+        self.assertIn('Unknown command', response['stderr'])
+
+    def test_run_failing_command(self):
+        self.client.list_policy.side_effect = Exception('Service down')
+        response = agent.send({'argv': ['policy', 'list']}, self.socket_path)
+        self.assertEqual(1, response['status'])
+        self.assertEqual('Service down\n', response['stderr'])
+
+    def test_run_rejects_blocking_options(self):
+        for argv, option in (
+                (['policy', 'row', 'list', 'p', 't', '--watch', '5'],
+                 '--watch'),
+                (['policy', 'simulate', 'p', '--batch', '-'], '--batch -')):
+            response = agent.send({'argv': argv}, self.socket_path)
+            self.assertEqual(1, response['status'])
+            self.assertEqual('%s is not supported by the agent, run the '
+                             'command directly.\n' % option,
+                             response['stderr'])
+        self.assertFalse(self.client.method_calls)
+
+    def test_serve_after_socket_option(self):
+        with mock.patch.object(agent, '_serve', return_value=0) as serve:
+            self.assertEqual(0, agent.main(['--socket', '/tmp/s', 'serve',
+                                            '--idle-timeout', '5']))
+        serve.assert_called_once_with(['--socket', '/tmp/s',
+                                       '--idle-timeout', '5'])
+
+    def test_stop(self):
+        self.assertEqual(0, agent.main(['--socket', self.socket_path,
+                                        'stop']))
+        self.thread.join()
+        self.assertFalse(os.path.exists(self.socket_path))
+        self.assertEqual(1, agent.main(['--socket', self.socket_path,
+                                        'run', 'policy', 'list']))
@@ -0,0 +1,217 @@
+#   Licensed under the Apache License, Version 2.0 (the "License"); you may
+#   not use this file except in compliance with the License. You may obtain
+#   a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#   WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#   License for the specific language governing permissions and limitations
+#   under the License.
+#
+
+import datetime
+import os
+
+from cliff import command
+from cliff import commandmanager
+import fixtures
+from keystoneauth1 import access
+from keystoneauth1 import fixture
+from keystoneauth1.identity.generic import base as generic_base
+from keystoneauth1.identity import v3
+from keystoneauth1 import session
+import mock
+from osc_lib import clientmanager
+from osc_lib import shell
+
+from congressclient.common import auth_cache
+from congressclient.osc import osc_plugin
+from congressclient.osc.v1 import policy
+from congressclient.tests import utils
+
+ENDPOINT = 'http://congress:1789'
+
+
+def make_auth(expires_in=3600, authenticated=True, project='demo',
+              token_id='token-id'):
+    auth = v3.Password(auth_url='http://keystone/v3', username='admin',
+                       password='secret', project_name=project,
+                       user_domain_id='default', project_domain_id='default')
+    if authenticated:
+        token = fixture.V3Token(
+            expires=datetime.datetime.utcnow() +
+            datetime.timedelta(seconds=expires_in))
+        token.set_project_scope()
+        service = token.add_service('policy')
+        service.add_standard_endpoints(public=ENDPOINT, region='RegionOne')
+        auth.auth_ref = access.create(body=token, auth_token=token_id)
+    return auth
+
+
+class TestAuthCache(utils.TestCase):
+
+    def setUp(self):
+        super(TestAuthCache, self).setUp()
+        self.directory = self.useFixture(fixtures.TempDir()).path
+        self.cache = auth_cache.AuthCache(os.path.join(self.directory, 'c'))
+
+    def test_store_and_load(self):
+        auth = make_auth()
+        key = self.cache.key(auth, 'RegionOne', 'publicURL')
+        self.cache.store(key, auth, ENDPOINT)
+        path = os.path.join(self.cache.directory, key + '.json')
+        self.assertEqual(0o600, os.stat(path).st_mode & 0o777)
+        self.assertEqual(0o700,
+                         os.stat(self.cache.directory).st_mode & 0o777)
+        auth_state, endpoint = self.cache.load(key)
+        self.assertEqual(ENDPOINT, endpoint)
+        self.assertEqual(auth.get_auth_state(), auth_state)
+
+    def test_key_depends_on_options(self):
+        auth = make_auth()
+        key = self.cache.key(auth, 'RegionOne', 'publicURL')
+        self.assertEqual(key, self.cache.key(make_auth(), 'RegionOne',
+                                             'publicURL'))
+        self.assertNotEqual(key, self.cache.key(auth, 'RegionTwo',
+                                                'publicURL'))
+        self.assertNotEqual(key, self.cache.key(make_auth(project='other'),
+                                                'RegionOne', 'publicURL'))
+        self.assertIsNone(self.cache.key(object(), 'RegionOne', 'public'))
+
+    def test_expired_entry_is_dropped(self):
+        auth = make_auth(expires_in=30)
+        key = self.cache.key(auth)
+        self.cache.store(key, auth, ENDPOINT)
+        self.assertIsNone(self.cache.load(key))
+        self.assertEqual([], os.listdir(self.cache.directory))
+
+    def test_shared_entry_is_ignored(self):
+        auth = make_auth()
+        key = self.cache.key(auth)
+        self.cache.store(key, auth, ENDPOINT)
+        os.chmod(os.path.join(self.cache.directory, key + '.json'), 0o644)
+        self.assertIsNone(self.cache.load(key))
+
+    def test_missing_entry(self):
+        self.assertIsNone(self.cache.load('missing'))
+
+
+class TestMakeClient(utils.TestCase):
+
+    def setUp(self):
+        super(TestMakeClient, self).setUp()
+        directory = self.useFixture(fixtures.TempDir()).path
+        self.useFixture(fixtures.EnvironmentVariable('XDG_CACHE_HOME',
+                                                     directory))
+        self.useFixture(fixtures.EnvironmentVariable('OS_POLICY_TOKEN_CACHE'))
+
+    def make_instance(self, auth, token_cache=True):
+        instance = mock.Mock()
+        instance._api_version = {osc_plugin.API_NAME: '1'}
+        instance._region_name = 'RegionOne'
+        instance._cli_options.config = {'policy_token_cache': token_cache}
+        instance.session = session.Session(auth=auth)
+        return instance
+
+    def test_cached_token_and_endpoint_are_reused(self):
+        client = osc_plugin.make_client(self.make_instance(make_auth()))
+        self.assertIsNone(client.httpclient.endpoint_override)
+
+        auth = make_auth(authenticated=False)
+        client = osc_plugin.make_client(self.make_instance(auth))
+        self.assertEqual(ENDPOINT, client.httpclient.endpoint_override)
+        self.assertEqual('token-id', auth.auth_ref.auth_token)
+
+    def test_fresh_token_is_not_replaced(self):
+        osc_plugin.make_client(self.make_instance(make_auth()))
+
+        auth = make_auth(token_id='fresh-token-id')
+        client = osc_plugin.make_client(self.make_instance(auth))
+        self.assertIsNone(client.httpclient.endpoint_override)
+        self.assertEqual('fresh-token-id', auth.auth_ref.auth_token)
+
+    def test_disabled(self):
+        osc_plugin.make_client(self.make_instance(make_auth(),
+                                                  token_cache=False))
+        self.assertFalse(os.path.exists(auth_cache.default_directory()))
+
+
+class _Shell(shell.OpenStackShell):
+
+    def __init__(self):
+        manager = commandmanager.CommandManager('congressclient.tests')
+        super(_Shell, self).__init__(command_manager=manager)
+        self.api_version = {osc_plugin.API_NAME: '1'}
+
+    def build_option_parser(self, description, version):
+        parser = super(_Shell, self).build_option_parser(description,
+                                                         version)
+        return osc_plugin.build_option_parser(parser)
+
+    def _load_commands(self):
+        self.command_manager.add_command('congress policy list',
+                                         policy.ListPolicy)
+
+
+class TestOpenStackClient(utils.TestCase):
+    """Runs a congress command the way OpenStackClient does."""
+
+    def setUp(self):
+        super(TestOpenStackClient, self).setUp()
+        directory = self.useFixture(fixtures.TempDir()).path
+        self.useFixture(fixtures.EnvironmentVariable('XDG_CACHE_HOME',
+                                                     directory))
+        self.useFixture(fixtures.EnvironmentVariable('HOME', directory))
+        for name in list(os.environ):
+            if name.startswith('OS_'):
+                self.useFixture(fixtures.EnvironmentVariable(name))
+        for name, value in (('OS_AUTH_TYPE', 'password'),
+                            ('OS_AUTH_URL', 'http://keystone/v3'),
+                            ('OS_USERNAME', 'admin'),
+                            ('OS_PASSWORD', 'secret'),
+                            ('OS_PROJECT_NAME', 'demo'),
+                            ('OS_USER_DOMAIN_ID', 'default'),
+                            ('OS_PROJECT_DOMAIN_ID', 'default'),
+                            ('OS_REGION_NAME', 'RegionOne')):
+            self.useFixture(fixtures.EnvironmentVariable(name, value))
+        self.useFixture(fixtures.MockPatchObject(
+            command.Command, 'auth_required', False, create=True))
+        self.get_auth_ref = self.useFixture(fixtures.MockPatchObject(
+            generic_base.BaseGenericPlugin, 'get_auth_ref',
+            side_effect=lambda session: make_auth().auth_ref)).mock
+
+    def run_command(self, *options):
+        clients = []
+
+        def take_action(cmd, parsed_args):
+            clients.append(cmd.app.client_manager.congressclient)
+            return [], []
+
+        # ClientCache keeps the first client it makes
+        with mock.patch.object(
+                clientmanager.ClientManager, osc_plugin.API_NAME,
+                clientmanager.ClientCache(osc_plugin.make_client),
+                create=True), \
+                mock.patch.object(policy.ListPolicy, 'take_action',
+                                  take_action):
+            status = _Shell().run(list(options) +
+                                  ['congress', 'policy', 'list'])
+        self.assertEqual(0, status)
+        return clients[0]
+
+    def test_cached_token_is_used_before_authenticating(self):
+        client = self.run_command('--os-policy-token-cache')
+        self.assertEqual(1, self.get_auth_ref.call_count)
+        self.assertIsNone(client.httpclient.endpoint_override)
+
+        client = self.run_command('--os-policy-token-cache')
+        self.assertEqual(1, self.get_auth_ref.call_count)
+        self.assertEqual(ENDPOINT, client.httpclient.endpoint_override)
+
+    def test_disabled(self):
+        self.run_command()
+        self.run_command()
+        self.assertEqual(2, self.get_auth_ref.call_count)
+        self.assertFalse(os.path.exists(auth_cache.default_directory()))
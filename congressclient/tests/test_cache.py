@@ -0,0 +1,76 @@
+#   Licensed under the Apache License, Version 2.0 (the "License"); you may
+#   not use this file except in compliance with the License. You may obtain
+#   a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#   WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#   License for the specific language governing permissions and limitations
+#   under the License.
+#
+
+import mock
+
+from congressclient.common import cache
+from congressclient.tests import utils
+
+
+class TestResponseCache(utils.TestCase):
+
+    def test_uncached_endpoint(self):
+        response_cache = cache.ResponseCache(ttls={'driver': 10})
+        self.assertTrue(response_cache.caches('driver'))
+        self.assertFalse(response_cache.caches('datasource_rows'))
+
+    @mock.patch('time.monotonic')
+    def test_ttl(self, monotonic):
+        monotonic.return_value = 100
+        response_cache = cache.ResponseCache(ttls={'driver': 10})
+        response_cache.store('driver', '/d', {'a': 1}, 10)
+        self.assertEqual({'a': 1}, response_cache.get('/d'))
+        monotonic.return_value = 111
+        self.assertRaises(KeyError, response_cache.get, '/d')
+        self.assertIsNotNone(response_cache.lookup('/d'))
+        self.assertEqual({'a': 1}, response_cache.refresh('/d'))
+        self.assertEqual({'a': 1}, response_cache.get('/d'))
+        self.assertEqual(2, response_cache.hits)
+        self.assertEqual(1, response_cache.misses)
+
+    def test_returns_copies(self):
+        response_cache = cache.ResponseCache(ttls={'driver': 10})
+        body = {'results': []}
+        response_cache.store('driver', '/d', body, 10)
+        body['results'].append(1)
+        response_cache.get('/d')['results'].append(2)
+        self.assertEqual({'results': []}, response_cache.get('/d'))
+
+    def test_lru_eviction(self):
+        response_cache = cache.ResponseCache(ttls={'driver': 10},
+                                             max_bytes=25)
+        response_cache.store('driver', '/a', 'a', 10)
+        response_cache.store('driver', '/b', 'b', 10)
+        response_cache.get('/a')
+        response_cache.store('driver', '/c', 'c', 10)
+        self.assertEqual(20, response_cache.size)
+        self.assertEqual('a', response_cache.get('/a'))
+        self.assertEqual('c', response_cache.get('/c'))
+        self.assertIsNone(response_cache.lookup('/b'))
+
+    def test_oversized_not_stored(self):
+        response_cache = cache.ResponseCache(ttls={'driver': 10},
+                                             max_bytes=5)
+        response_cache.store('driver', '/a', 'a', 10)
+        self.assertIsNone(response_cache.lookup('/a'))
+        self.assertEqual(0, response_cache.size)
+
+    def test_invalidate(self):
+        response_cache = cache.ResponseCache(ttls={'driver': 10,
+                                                   'policies': 10})
+        response_cache.store('driver', '/a', 'a', 10)
+        response_cache.store('policies', '/b', 'b', 10)
+        response_cache.invalidate('policies')
+        self.assertIsNone(response_cache.lookup('/b'))
+        self.assertEqual('a', response_cache.get('/a'))
+        self.assertEqual(10, response_cache.size)
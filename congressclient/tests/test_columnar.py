@@ -0,0 +1,81 @@
+#   Licensed under the Apache License, Version 2.0 (the "License"); you may
+#   not use this file except in compliance with the License. You may obtain
+#   a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#   WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#   License for the specific language governing permissions and limitations
+#   under the License.
+#
+
+import array
+
+from congressclient.common import columnar
+from congressclient.tests import utils
+
+
+class TestColumnarRows(utils.TestCase):
+
+    def setUp(self):
+        super(TestColumnarRows, self).setUp()
+        self.rows = columnar.ColumnarRows.from_rows(
+            [{'data': ['vm1', 1, 0.5, True]},
+             {'data': ['vm2', 2, None, False]},
+             {'data': ['vm1', 3, 1.5, True]}],
+            ['name', 'id', 'load', 'active'])
+
+    def test_iteration(self):
+        self.assertEqual(3, len(self.rows))
+        self.assertEqual([('vm1', 1, 0.5, True), ('vm2', 2, None, False),
+                          ('vm1', 3, 1.5, True)], list(self.rows))
+
+    def test_typed_columns(self):
+        self.assertIsInstance(self.rows.column('id'), array.array)
+        self.assertIsInstance(self.rows.column('load'), list)
+        self.assertIsInstance(self.rows.column('active'), list)
+
+    def test_big_int_falls_back_to_list(self):
+        rows = columnar.ColumnarRows.from_rows([[1], [2 ** 70]])
+        self.assertEqual(['Col0'], rows.columns)
+        self.assertEqual([(1,), (2 ** 70,)], list(rows))
+
+    def test_mixed_numbers_round_trip(self):
+        data = [[1.5, 'a'], [2, 'b'], [3.0, 'c']]
+        rows = columnar.ColumnarRows.from_rows(data)
+        self.assertEqual([tuple(row) for row in data], list(rows))
+        self.assertIsInstance(rows[1][0], int)
+        self.assertIsInstance(rows.column('Col0'), list)
+
+    def test_indexing_and_slicing(self):
+        self.assertEqual(('vm2', 2, None, False), self.rows[1])
+        self.assertEqual(('vm1', 3, 1.5, True), self.rows[-1])
+        self.assertRaises(IndexError, self.rows.__getitem__, 3)
+        tail = self.rows[1:]
+        self.assertEqual(2, len(tail))
+        self.assertEqual(self.rows.columns, tail.columns)
+        self.assertEqual(('vm2', 2, None, False), tail[0])
+
+    def test_project(self):
+        projected = self.rows.project('id', 'name')
+        self.assertEqual(['id', 'name'], projected.columns)
+        self.assertEqual([(1, 'vm1'), (2, 'vm2'), (3, 'vm1')],
+                         list(projected))
+
+    def test_select(self):
+        selected = self.rows.select(name='vm1')
+        self.assertEqual([('vm1', 1, 0.5, True), ('vm1', 3, 1.5, True)],
+                         list(selected))
+        self.assertEqual(0, len(self.rows.select(name='vm1', id=2)))
+
+    def test_empty(self):
+        rows = columnar.ColumnarRows.from_rows([], ['a', 'b'])
+        self.assertEqual(0, len(rows))
+        self.assertEqual([], list(rows))
+        self.assertEqual(['a', 'b'], rows.columns)
+
+    def test_ragged_rows(self):
+        self.assertRaises(ValueError, columnar.ColumnarRows.from_rows,
+                          [[1, 2], [1]])
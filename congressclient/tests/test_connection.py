@@ -0,0 +1,81 @@
+#   Licensed under the Apache License, Version 2.0 (the "License"); you may
+#   not use this file except in compliance with the License. You may obtain
+#   a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#   WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#   License for the specific language governing permissions and limitations
+#   under the License.
+#
+
+import gzip
+
+from keystoneauth1 import adapter
+from keystoneauth1 import session
+import mock
+
+from congressclient.common import connection
+from congressclient.tests import utils
+
+
+class TestPooledHTTPAdapter(utils.TestCase):
+
+    @mock.patch('time.monotonic')
+    def test_idle_pools_are_cleared(self, monotonic):
+        http_adapter = connection.PooledHTTPAdapter(idle_timeout=10)
+        http_adapter.poolmanager = mock.Mock()
+        monotonic.return_value = 100
+        http_adapter._expire_idle()
+        monotonic.return_value = 105
+        http_adapter._expire_idle()
+        self.assertNotCalled(http_adapter.poolmanager.clear)
+        monotonic.return_value = 120
+        http_adapter._expire_idle()
+        http_adapter.poolmanager.clear.assert_called_once_with()
+
+    @mock.patch('time.monotonic')
+    def test_no_idle_timeout(self, monotonic):
+        http_adapter = connection.PooledHTTPAdapter()
+        http_adapter.poolmanager = mock.Mock()
+        monotonic.return_value = 100
+        http_adapter._expire_idle()
+        monotonic.return_value = 100000
+        http_adapter._expire_idle()
+        self.assertNotCalled(http_adapter.poolmanager.clear)
+
+
+class TestGzipChunks(utils.TestCase):
+
+    def test_gzip_chunks(self):
+        chunks = [b'{"results": [', b'1, ' * 10000, b'2]}']
+        compressed = b''.join(connection.gzip_chunks(iter(chunks)))
+        self.assertEqual(b''.join(chunks), gzip.decompress(compressed))
+        self.assertLess(len(compressed), 1000)
+
+
+class TestRetryAdapter(utils.TestCase):
+
+    def setUp(self):
+        super(TestRetryAdapter, self).setUp()
+        self.policy = mock.Mock()
+        self.retry_adapter = connection.RetryAdapter(
+            session=session.Session(), retry_policy=self.policy)
+        send = mock.patch.object(adapter.Adapter, 'request',
+                                 return_value='resp')
+        self.send = send.start()
+        self.addCleanup(send.stop)
+
+    def test_request_goes_through_policy(self):
+        self.policy.call.side_effect = lambda method, func: func()
+        self.assertEqual('resp', self.retry_adapter.get('/v1/policies'))
+        self.assertEqual('GET', self.policy.call.call_args[0][0])
+        self.assertEqual(1, self.send.call_count)
+
+    def test_streamed_body_not_retried(self):
+        self.retry_adapter.put('/v1/data-sources/x/tables/y/rows',
+                               data=iter([b'[]']))
+        self.assertNotCalled(self.policy.call)
+        self.assertEqual(1, self.send.call_count)
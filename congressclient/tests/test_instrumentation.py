@@ -0,0 +1,122 @@
+#   Licensed under the Apache License, Version 2.0 (the "License"); you may
+#   not use this file except in compliance with the License. You may obtain
+#   a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#   WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#   License for the specific language governing permissions and limitations
+#   under the License.
+#
+
+import mock
+
+from congressclient.common import instrumentation
+from congressclient.tests import utils
+from congressclient.v1 import client
+
+
+def _record(endpoint='datasource_rows', wall_time=0.02, status=200):
+    record = instrumentation.RequestRecord(endpoint, 'GET', '/x')
+    record.wall_time = wall_time
+    record.decode_time = 0.005
+    record.bytes = 100
+    record.status = status
+    return record
+
+
+class TestInstrumentation(utils.TestCase):
+
+    def setUp(self):
+        super(TestInstrumentation, self).setUp()
+        self.instrumentation = instrumentation.Instrumentation(
+            client.Client.url_templates())
+
+    def test_endpoint_for(self):
+        for url, endpoint in (
+                ('/v1/data-sources/nova/tables/servers/rows',
+                 'datasource_rows'),
+                ('/v1/data-sources/nova/tables/servers/spec',
+                 'datasource_table_schema'),
+                ('/v1/data-sources/nova/tables/servers',
+                 'datasource_table_path'),
+                ('/v1/data-sources', 'datasources'),
+                ('/v1/policies/p/tables/t/rows?trace=True', 'policy_rows'),
+                ('/v1/policies/p?action=simulate&trace=False',
+                 'policy_path'),
+                ('http://congress:1789/v1/policies/p/rules?limit=1',
+                 'policy_rules'),
+                ('/', 'policy_api_versions'),
+                ('/v2/unknown', '/v2/unknown')):
+            self.assertEqual(endpoint, self.instrumentation.endpoint_for(url))
+
+    def test_hooks(self):
+        self.assertFalse(self.instrumentation.enabled)
+        pre, post = mock.Mock(), mock.Mock()
+        self.instrumentation.add_pre_hook(pre)
+        self.instrumentation.add_post_hook(post)
+        self.assertTrue(self.instrumentation.enabled)
+        record = self.instrumentation.start('GET', '/v1/data-sources')
+        pre.assert_called_once_with(record)
+        self.assertEqual('datasources', record.endpoint)
+        self.instrumentation.finish(record)
+        post.assert_called_once_with(record)
+        self.instrumentation.remove_hook(pre)
+        self.instrumentation.remove_hook(post)
+        self.assertFalse(self.instrumentation.enabled)
+
+    def test_failing_hook_is_ignored(self):
+        self.instrumentation.add_post_hook(mock.Mock(side_effect=ValueError))
+        self.instrumentation.finish(_record())
+
+
+class TestHistogramCollector(utils.TestCase):
+
+    def test_snapshot(self):
+        collector = instrumentation.HistogramCollector(buckets=(0.01, 0.1))
+        collector(_record(wall_time=0.005))
+        collector(_record(wall_time=0.05))
+        record = _record(wall_time=5, status=503)
+        record.wire_bytes = 10
+        collector(record)
+        series = collector.snapshot()[('datasource_rows', 'GET')]
+        self.assertEqual([(0.01, 1), (0.1, 2), (float('inf'), 3)],
+                         series['buckets'])
+        self.assertEqual(3, series['count'])
+        self.assertEqual(300, series['bytes'])
+        self.assertEqual(210, series['wire_bytes'])
+        self.assertEqual({'200': 2, '503': 1}, series['statuses'])
+        collector.reset()
+        self.assertEqual({}, collector.snapshot())
+
+    def test_prometheus_text(self):
+        collector = instrumentation.HistogramCollector(buckets=(0.1,))
+        collector(_record())
+        text = instrumentation.prometheus_text(collector)
+        self.assertIn('# TYPE congressclient_request_duration_seconds '
+                      'histogram', text)
+        self.assertIn('congressclient_request_duration_seconds_bucket{'
+                      'endpoint="datasource_rows",method="GET",le="0.1"} 1',
+                      text)
+        self.assertIn('congressclient_request_duration_seconds_count{'
+                      'endpoint="datasource_rows",method="GET"} 1', text)
+        self.assertIn('congressclient_response_bytes_total{'
+                      'endpoint="datasource_rows",method="GET"} 100', text)
+
+
+class TestStatsdExporter(utils.TestCase):
+
+    def test_send(self):
+        exporter = instrumentation.StatsdExporter(prefix='cc')
+        self.addCleanup(exporter.close)
+        exporter._socket = mock.Mock()
+        exporter(_record())
+        payload = exporter._socket.sendto.call_args[0][0].decode()
+        self.assertEqual(['cc.datasource_rows.get.time:20.000|ms',
+                          'cc.datasource_rows.get.decode_time:5.000|ms',
+                          'cc.datasource_rows.get.bytes:100|c',
+                          'cc.datasource_rows.get.wire_bytes:100|c',
+                          'cc.datasource_rows.get.status.200:1|c'],
+                         payload.split('\n'))
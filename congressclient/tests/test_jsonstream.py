@@ -0,0 +1,101 @@
+#   Licensed under the Apache License, Version 2.0 (the "License"); you may
+#   not use this file except in compliance with the License. You may obtain
+#   a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#   WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#   License for the specific language governing permissions and limitations
+#   under the License.
+#
+
+import json
+
+from congressclient.common import jsonstream
+from congressclient.tests import utils
+
+
+def _chunks(text, size):
+    data = text.encode('utf-8')
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+class TestIterItems(utils.TestCase):
+
+    body = {'trace': 'Call p(x)\n', 'results': [
+        {'data': ['a', 1, 2.5, None, True]},
+        {'data': [u'été', 12345, -1e3, False]},
+        {'data': []}],
+        'links': [{'rel': 'next', 'href': '/x'}]}
+
+    def test_chunk_sizes(self):
+        text = json.dumps(self.body)
+        for size in (1, 2, 3, 7, 64, len(text)):
+            extra = {}
+            rows = list(jsonstream.iter_items(_chunks(text, size),
+                                              extra=extra))
+            self.assertEqual(self.body['results'], rows, size)
+            self.assertEqual({'trace': self.body['trace'],
+                              'links': self.body['links']}, extra)
+
+    def test_scalar_items(self):
+        text = '{"results": [1, 22, 333]}'
+        self.assertEqual([1, 22, 333],
+                         list(jsonstream.iter_items(_chunks(text, 1))))
+
+    def test_empty(self):
+        self.assertEqual([], list(jsonstream.iter_items(['{}'])))
+        self.assertEqual([], list(jsonstream.iter_items(
+            [' { "results" : [ ] } '])))
+
+    def test_rows_are_yielded_before_end_of_input(self):
+        def chunks():
+            yield b'{"results": [{"data": [1]}, '
+            raise AssertionError('read past the first row')
+        rows = jsonstream.iter_items(chunks())
+        self.assertEqual({'data': [1]}, next(rows))
+
+    def test_truncated(self):
+        rows = jsonstream.iter_items(['{"results": [{"data": [1]}, {"da'])
+        self.assertEqual({'data': [1]}, next(rows))
+        self.assertRaises(ValueError, next, rows)
+
+    def test_not_an_object(self):
+        self.assertRaises(ValueError, list, jsonstream.iter_items(['[1]']))
+
+
+class TestIterArray(utils.TestCase):
+
+    def test_iter_array(self):
+        rows = [['a', 1], [u'été', [2, 3]], []]
+        text = json.dumps(rows, indent=2)
+        for size in (1, 3, 1000):
+            self.assertEqual(rows,
+                             list(jsonstream.iter_array(_chunks(text, size))))
+        self.assertEqual([], list(jsonstream.iter_array([' [ ] '])))
+        self.assertRaises(ValueError, list, jsonstream.iter_array(['{}']))
+
+    def test_trailing_data(self):
+        for text in ('[]\n[1, 2]\n', '[[1, 2]]\n[3, 4]\n', '[1] x'):
+            self.assertRaises(ValueError, list,
+                              jsonstream.iter_array(_chunks(text, 2)))
+        self.assertEqual([[1]], list(jsonstream.iter_array(['[[1]]\n \n'])))
+
+
+class TestIterEncoded(utils.TestCase):
+
+    def test_iter_encoded(self):
+        rows = [['row%d' % i, i, u'été'] for i in range(100)]
+        progress = []
+        chunks = list(jsonstream.iter_encoded(iter(rows), chunk_size=200,
+                                              progress=progress.append))
+        self.assertGreater(len(chunks), 5)
+        self.assertEqual(rows, json.loads(b''.join(chunks).decode('utf-8')))
+        self.assertEqual(len(chunks), len(progress))
+        self.assertEqual(sorted(progress), progress)
+        self.assertEqual(100, progress[-1])
+
+    def test_empty(self):
+        self.assertEqual(b'[]', b''.join(jsonstream.iter_encoded([])))
@@ -0,0 +1,108 @@
+#   Licensed under the Apache License, Version 2.0 (the "License"); you may
+#   not use this file except in compliance with the License. You may obtain
+#   a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#   WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#   License for the specific language governing permissions and limitations
+#   under the License.
+#
+
+import os
+
+import fixtures
+
+from congressclient.common import policy_files
+from congressclient import exceptions
+from congressclient.tests import utils
+
+
+class TestPolicyFiles(utils.TestCase):
+
+    def setUp(self):
+        super(TestPolicyFiles, self).setUp()
+        self.root = self.useFixture(fixtures.TempDir()).path
+
+    def _write(self, name, content):
+        path = os.path.join(self.root, name)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, 'w') as f:
+            f.write(content)
+        return path
+
+    def test_find_files(self):
+        a = self._write('policies/b/a.yaml', '')
+        b = self._write('policies/a.yml', '')
+        self._write('policies/notes.txt', '')
+        other = self._write('other.txt', '')
+        self.assertEqual(
+            [other, b, a],
+            policy_files.find_files([other,
+                                     os.path.join(self.root, 'policies')]))
+
+    def test_load_policies_multi_document(self):
+        one = self._write('one.yaml',
+                          'name: p1\nrules:\n- rule: p(x) :- q(x)\n'
+                          '---\n'
+                          '---\nname: p2\n')
+        two = self._write('two.yaml', 'name: p3\n')
+        policies = policy_files.load_policies([one, two])
+        self.assertEqual([(one, 'p1'), (one, 'p2'), (two, 'p3')],
+                         [(path, body['name']) for path, body in policies])
+        self.assertEqual([{'rule': 'p(x) :- q(x)'}], policies[0][1]['rules'])
+
+    def test_load_policies_reports_every_problem(self):
+        self._write('a.yaml', 'name: p1\n---\nrules: {}\n')
+        self._write('b.yaml', 'name: p1\nrules:\n- comment: no rule\n')
+        self._write('c.yaml', 'name: [unclosed\n')
+        e = self.assertRaises(exceptions.ValidationError,
+                              policy_files.load_policies, [self.root])
+        message = str(e)
+        self.assertIn('a.yaml (document 2): policy has no name', message)
+        self.assertIn('a.yaml (document 2): rules must be a list', message)
+        self.assertIn('b.yaml (document 1): policy p1 is also defined in',
+                      message)
+        self.assertIn('b.yaml (document 1): rule 1 has no rule text',
+                      message)
+        self.assertIn('c.yaml', message)
+
+    def test_load_policies_empty(self):
+        self.assertRaises(exceptions.ValidationError,
+                          policy_files.load_policies,
+                          [self._write('empty.yaml', '---\n')])
+
+    def test_loader_is_safe(self):
+        path = self._write('unsafe.yaml',
+                           'name: !!python/object/apply:os.getcwd []\n')
+        self.assertRaises(exceptions.ValidationError,
+                          policy_files.load_policies, [path])
+
+
+class TestRuleDiff(utils.TestCase):
+
+    def test_normalize_rule(self):
+        self.assertEqual(
+            "p(x):-q(x,y),not r(x,'a  b')",
+            policy_files.normalize_rule(
+                "  p(x) :-\n  q( x , y ),  not r(x, 'a  b')  "))
+
+    def test_diff_rules(self):
+        current = [{'id': '1', 'name': 'a', 'rule': 'p(x) :- q(x)'},
+                   {'id': '2', 'name': '', 'rule': 'r(x) :- s(x)'},
+                   {'id': '3', 'name': 'c', 'rule': 't(x) :- u(x)'},
+                   {'id': '4', 'name': None, 'rule': 'v(1)'},
+                   {'id': '5', 'name': None, 'rule': 'v(1)'}]
+        desired = [{'name': 'a', 'rule': 'p(x):-q(x)', 'comment': 'new'},
+                   {'rule': 'r(x) :-  s(x)'},
+                   {'name': 'c', 'rule': 't(x) :- w(x)'},
+                   {'rule': 'v(1)'},
+                   {'rule': 'v(2)'}]
+        to_delete, to_create, unchanged = policy_files.diff_rules(
+            current, desired)
+        self.assertEqual(['3', '5'], [rule['id'] for rule in to_delete])
+        self.assertEqual([desired[2], desired[4]], to_create)
+        self.assertEqual(['1', '2', '4'], [rule['id'] for rule in unchanged])
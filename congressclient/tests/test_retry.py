@@ -0,0 +1,171 @@
+#   Licensed under the Apache License, Version 2.0 (the "License"); you may
+#   not use this file except in compliance with the License. You may obtain
+#   a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#   WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#   License for the specific language governing permissions and limitations
+#   under the License.
+#
+
+from keystoneauth1 import exceptions as ks_exceptions
+import mock
+import requests
+from urllib3 import exceptions as urllib3_exceptions
+
+from congressclient.common import retry
+from congressclient import exceptions
+from congressclient.tests import utils
+
+
+def http_error(status, retry_after=None):
+    response = mock.Mock(headers={})
+    if retry_after is not None:
+        response.headers['Retry-After'] = retry_after
+    return ks_exceptions.HttpError(http_status=status, response=response)
+
+
+def ks_error(cls, original):
+    """Return a keystoneauth error raised while handling original."""
+    try:
+        try:
+            raise original
+        except Exception:
+            raise cls()
+    except cls as e:
+        return e
+
+
+class TestRetryPolicy(utils.TestCase):
+
+    def setUp(self):
+        super(TestRetryPolicy, self).setUp()
+        self.sleep = mock.Mock()
+
+    def _policy(self, **kwargs):
+        return retry.RetryPolicy(sleep=self.sleep, **kwargs)
+
+    def test_retries_transient_errors(self):
+        func = mock.Mock(side_effect=[http_error(503), http_error(502),
+                                      'ok'])
+        self.assertEqual('ok', self._policy().call('GET', func))
+        self.assertEqual(3, func.call_count)
+        delays = [c[0][0] for c in self.sleep.call_args_list]
+        self.assertTrue(0 <= delays[0] <= 0.5)
+        self.assertTrue(0 <= delays[1] <= 1)
+
+    def test_gives_up(self):
+        func = mock.Mock(side_effect=http_error(503))
+        self.assertRaises(ks_exceptions.HttpError,
+                          self._policy(retries=2).call, 'GET', func)
+        self.assertEqual(3, func.call_count)
+
+    def test_other_errors_not_retried(self):
+        func = mock.Mock(side_effect=http_error(404))
+        self.assertRaises(ks_exceptions.HttpError,
+                          self._policy().call, 'GET', func)
+        self.assertEqual(1, func.call_count)
+
+    def test_non_idempotent_not_retried(self):
+        func = mock.Mock(side_effect=ks_exceptions.UnknownConnectionError(
+            'Connection reset', None))
+        self.assertRaises(ks_exceptions.ConnectionError,
+                          self._policy().call, 'POST', func)
+        self.assertEqual(1, func.call_count)
+
+    def test_unsent_request_retried_for_any_method(self):
+        refused = urllib3_exceptions.NewConnectionError(None, 'refused')
+        func = mock.Mock(side_effect=[
+            ks_error(ks_exceptions.ConnectFailure,
+                     requests.exceptions.ConnectionError(
+                         urllib3_exceptions.MaxRetryError(None, '/',
+                                                          refused))),
+            ks_error(ks_exceptions.ConnectTimeout,
+                     requests.exceptions.ConnectTimeout()),
+            'ok'])
+        self.assertEqual('ok', self._policy().call('POST', func))
+
+    def test_connect_failure_not_retried_for_post(self):
+        # raised too for connections reset after the request was sent
+        func = mock.Mock(side_effect=[
+            ks_error(ks_exceptions.ConnectFailure,
+                     requests.exceptions.ConnectionError('reset')),
+            ks_error(ks_exceptions.ConnectTimeout,
+                     requests.exceptions.ReadTimeout())])
+        for _ in range(2):
+            self.assertRaises(ks_exceptions.ConnectionError,
+                              self._policy().call, 'POST', func)
+        self.assertEqual(2, func.call_count)
+
+    def test_connect_failure_retried_for_get(self):
+        func = mock.Mock(side_effect=[ks_exceptions.ConnectFailure(), 'ok'])
+        self.assertEqual('ok', self._policy().call('GET', func))
+
+    def test_per_status_retries(self):
+        policy = self._policy(statuses={exceptions.ServiceUnavailable: 1,
+                                        exceptions.InternalServerError: 2})
+        func = mock.Mock(side_effect=http_error(503))
+        self.assertRaises(ks_exceptions.HttpError, policy.call, 'GET', func)
+        self.assertEqual(2, func.call_count)
+        func = mock.Mock(side_effect=[http_error(500), http_error(500), 'ok'])
+        self.assertEqual('ok', policy.call('PUT', func))
+
+    def test_retry_after(self):
+        func = mock.Mock(side_effect=[http_error(503, '7'), 'ok'])
+        self.assertEqual('ok', self._policy().call('GET', func))
+        self.sleep.assert_called_once_with(7)
+
+    def test_retry_after_date(self):
+        with mock.patch('time.time', return_value=784111767):
+            self.assertEqual(10, retry.retry_after(http_error(
+                503, 'Sun, 06 Nov 1994 08:49:37 GMT')))
+            # dates without a timezone are UTC
+            self.assertEqual(10, retry.retry_after(http_error(
+                503, 'Sun, 06 Nov 1994 08:49:37')))
+
+    def test_retry_after_invalid(self):
+        self.assertIsNone(retry.retry_after(http_error(503, 'soon')))
+        func = mock.Mock(side_effect=[http_error(503, 'soon'), 'ok'])
+        self.assertEqual('ok', self._policy().call('GET', func))
+
+    def test_retry_after_too_long(self):
+        func = mock.Mock(side_effect=http_error(503, '3600'))
+        self.assertRaises(ks_exceptions.HttpError,
+                          self._policy().call, 'GET', func)
+        self.assertNotCalled(self.sleep)
+
+
+class TestCircuitBreaker(utils.TestCase):
+
+    def test_opens_and_recovers(self):
+        breaker = retry.CircuitBreaker(failure_threshold=2, reset_timeout=30)
+        policy = retry.RetryPolicy(retries=0, circuit_breaker=breaker)
+        failing = mock.Mock(side_effect=http_error(503))
+        with mock.patch('time.monotonic', return_value=100):
+            for _ in range(2):
+                self.assertRaises(ks_exceptions.HttpError, policy.call,
+                                  'GET', failing)
+            self.assertEqual('open', breaker.state)
+            self.assertRaises(exceptions.CircuitOpen, policy.call, 'GET',
+                              failing)
+            self.assertEqual(2, failing.call_count)
+        with mock.patch('time.monotonic', return_value=130):
+            self.assertEqual('half-open', breaker.state)
+            # a failed trial request opens the circuit again
+            self.assertRaises(ks_exceptions.HttpError, policy.call, 'GET',
+                              failing)
+            self.assertRaises(exceptions.CircuitOpen, policy.call, 'GET',
+                              failing)
+        with mock.patch('time.monotonic', return_value=160):
+            self.assertEqual('ok', policy.call('GET', lambda: 'ok'))
+            self.assertEqual('closed', breaker.state)
+
+    def test_client_errors_do_not_open(self):
+        breaker = retry.CircuitBreaker(failure_threshold=1)
+        policy = retry.RetryPolicy(circuit_breaker=breaker)
+        self.assertRaises(ks_exceptions.HttpError, policy.call, 'GET',
+                          mock.Mock(side_effect=http_error(404)))
+        self.assertEqual('closed', breaker.state)
@@ -0,0 +1,71 @@
+#   Licensed under the Apache License, Version 2.0 (the "License"); you may
+#   not use this file except in compliance with the License. You may obtain
+#   a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#   WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#   License for the specific language governing permissions and limitations
+#   under the License.
+#
+
+import json
+import os
+
+import fixtures
+import mock
+
+from congressclient.common import schema_cache
+from congressclient.tests import utils
+
+SCOPE = 'http://congress:1789'
+
+
+class TestSchemaCache(utils.TestCase):
+
+    def setUp(self):
+        super(TestSchemaCache, self).setUp()
+        self.directory = os.path.join(
+            self.useFixture(fixtures.TempDir()).path, 'schemas')
+
+    def test_persisted_across_instances(self):
+        schema_cache.SchemaCache(self.directory).set(
+            SCOPE, 'nova', 'servers', ['id', 'name'])
+        cache = schema_cache.SchemaCache(self.directory)
+        self.assertEqual(['id', 'name'],
+                         cache.get(SCOPE, 'nova', 'servers'))
+        self.assertIsNone(cache.get(SCOPE, 'nova', 'flavors'))
+        self.assertIsNone(cache.get('http://other:1789', 'nova', 'servers'))
+
+    def test_invalidate(self):
+        cache = schema_cache.SchemaCache(self.directory)
+        cache.set(SCOPE, 'nova', 'servers', ['id'])
+        cache.invalidate(SCOPE, 'nova')
+        self.assertIsNone(cache.get(SCOPE, 'nova', 'servers'))
+        self.assertEqual([], os.listdir(self.directory))
+
+    def test_expired(self):
+        cache = schema_cache.SchemaCache(self.directory, ttl=60)
+        cache.set(SCOPE, 'nova', 'servers', ['id'])
+        with mock.patch('time.time', return_value=1e12):
+            self.assertIsNone(cache.get(SCOPE, 'nova', 'servers'))
+
+    def test_other_format_version_is_ignored(self):
+        schema_cache.SchemaCache(self.directory).set(
+            SCOPE, 'nova', 'servers', ['id'])
+        path = os.path.join(self.directory, os.listdir(self.directory)[0])
+        with open(path) as f:
+            document = json.load(f)
+        document['version'] = schema_cache.FORMAT_VERSION + 1
+        with open(path, 'w') as f:
+            json.dump(document, f)
+        cache = schema_cache.SchemaCache(self.directory)
+        self.assertIsNone(cache.get(SCOPE, 'nova', 'servers'))
+
+    def test_memory_only(self):
+        cache = schema_cache.SchemaCache()
+        cache.set(SCOPE, 'nova', 'servers', ['id'])
+        self.assertEqual(['id'], cache.get(SCOPE, 'nova', 'servers'))
+        self.assertFalse(os.path.exists(self.directory))
@@ -0,0 +1,62 @@
+#   Licensed under the Apache License, Version 2.0 (the "License"); you may
+#   not use this file except in compliance with the License. You may obtain
+#   a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#   WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#   License for the specific language governing permissions and limitations
+#   under the License.
+#
+
+import json
+import os
+import subprocess
+import sys
+
+from congressclient.common import utils
+from congressclient.tests import utils as test_utils
+
+# modules the CLI plugin and command modules must not load at import time
+DEFERRED = ('keystoneauth1', 'oslo_log', 'oslo_serialization',
+            'pkg_resources', 'requests', 'yaml')
+if sys.version_info < (3, 7):
+    # pbr resolves the package version through pkg_resources there
+    DEFERRED = tuple(name for name in DEFERRED if name != 'pkg_resources')
+
+COMMAND_MODULES = ('congressclient.osc.agent',
+                   'congressclient.osc.osc_plugin',
+                   'congressclient.osc.v1.api_versions',
+                   'congressclient.osc.v1.datasource',
+                   'congressclient.osc.v1.driver',
+                   'congressclient.osc.v1.policy')
+
+
+class TestStartup(test_utils.TestCase):
+
+    def test_heavy_modules_are_deferred(self):
+        code = ('import json, sys\n'
+                'for name in %r:\n'
+                '    __import__(name)\n'
+                'print(json.dumps(sorted(set(name.split(".")[0]\n'
+                '                            for name in sys.modules))))'
+                % (COMMAND_MODULES,))
+        root = os.path.dirname(os.path.dirname(os.path.dirname(
+            os.path.abspath(__file__))))
+        env = dict(os.environ, PYTHONPATH=root)
+        output = subprocess.check_output([sys.executable, '-c', code],
+                                         env=env)
+        loaded = set(json.loads(output.decode('utf-8')))
+        self.assertEqual([], sorted(loaded.intersection(DEFERRED)))
+
+
+class TestLazyModule(test_utils.TestCase):
+
+    def test_lazy_module(self):
+        module = utils.LazyModule('json')
+        self.assertIsNone(module._module)
+        self.assertEqual('[1]', module.dumps([1]))
+        self.assertIs(json, module._module)
+        self.assertRaises(AttributeError, getattr, module, 'missing')
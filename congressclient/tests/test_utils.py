@@ -0,0 +1,149 @@
+#   Licensed under the Apache License, Version 2.0 (the "License"); you may
+#   not use this file except in compliance with the License. You may obtain
+#   a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#   WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#   License for the specific language governing permissions and limitations
+#   under the License.
+#
+
+import mock
+
+from congressclient.common import utils
+from congressclient import exceptions
+from congressclient.tests import utils as test_utils
+
+
+RESULTS = {'results': [{'id': 'id-1', 'name': 'nova'},
+                       {'id': 'id-2', 'name': 'dup'},
+                       {'id': 'id-3', 'name': 'dup'},
+                       {'id': 'dup', 'name': 'other'}]}
+
+
+class TestGetResourceIdFromName(test_utils.TestCase):
+
+    def test_by_name(self):
+        self.assertEqual('id-1',
+                         utils.get_resource_id_from_name('nova', RESULTS))
+
+    def test_by_id(self):
+        self.assertEqual('id-2',
+                         utils.get_resource_id_from_name('id-2', RESULTS))
+
+    def test_duplicate_name_matching_id(self):
+        self.assertEqual('dup',
+                         utils.get_resource_id_from_name('dup', RESULTS))
+
+    def test_duplicate_name(self):
+        results = {'results': [{'id': 'id-2', 'name': 'dup'},
+                               {'id': 'id-3', 'name': 'dup'}]}
+        self.assertRaises(exceptions.Conflict,
+                          utils.get_resource_id_from_name, 'dup', results)
+
+    def test_not_found(self):
+        self.assertRaises(exceptions.NotFound,
+                          utils.get_resource_id_from_name, 'x', RESULTS)
+
+
+class TestNameResolver(test_utils.TestCase):
+
+    def test_listing_is_reused(self):
+        lister = mock.Mock(return_value=RESULTS)
+        resolver = utils.NameResolver()
+        self.assertEqual('id-1', resolver.resolve('datasources', 'nova',
+                                                  lister))
+        self.assertEqual('id-2', resolver.resolve('datasources', 'id-2',
+                                                  lister))
+        lister.assert_called_once_with()
+
+    def test_miss_relists(self):
+        lister = mock.Mock(side_effect=[
+            RESULTS, {'results': [{'id': 'id-9', 'name': 'new'}]}])
+        resolver = utils.NameResolver()
+        resolver.resolve('datasources', 'nova', lister)
+        self.assertEqual('id-9', resolver.resolve('datasources', 'new',
+                                                  lister))
+        self.assertEqual(2, lister.call_count)
+
+    def test_not_found_after_relist(self):
+        lister = mock.Mock(return_value=RESULTS)
+        resolver = utils.NameResolver()
+        self.assertRaises(exceptions.NotFound,
+                          resolver.resolve, 'datasources', 'x', lister)
+        lister.assert_called_once_with()
+
+    def test_resolve_many(self):
+        lister = mock.Mock(side_effect=[
+            RESULTS, {'results': RESULTS['results'] +
+                      [{'id': 'id-9', 'name': 'new'}]}])
+        resolver = utils.NameResolver()
+        self.assertEqual(['id-1', 'id-2'], resolver.resolve_many(
+            'datasources', ['nova', 'id-2'], lister))
+        self.assertEqual(['id-9', 'id-1'], resolver.resolve_many(
+            'datasources', ['new', 'nova'], lister))
+        self.assertEqual(2, lister.call_count)
+        self.assertRaises(exceptions.NotFound, resolver.resolve_many,
+                          'datasources', ['nova', 'x'], mock.Mock(
+                              return_value=RESULTS))
+
+    @mock.patch('time.monotonic')
+    def test_ttl(self, monotonic):
+        monotonic.return_value = 100
+        lister = mock.Mock(return_value=RESULTS)
+        resolver = utils.NameResolver(ttl=10)
+        resolver.resolve('datasources', 'nova', lister)
+        monotonic.return_value = 120
+        resolver.resolve('datasources', 'nova', lister)
+        self.assertEqual(2, lister.call_count)
+
+    def test_invalidate(self):
+        lister = mock.Mock(return_value=RESULTS)
+        resolver = utils.NameResolver()
+        resolver.resolve('datasources', 'nova', lister)
+        resolver.invalidate('datasources')
+        resolver.resolve('datasources', 'nova', lister)
+        self.assertEqual(2, lister.call_count)
+
+    def test_resolver_per_client(self):
+        client = mock.Mock()
+        self.assertIs(utils.get_resolver(client), utils.get_resolver(client))
+        self.assertIsNot(utils.get_resolver(client),
+                         utils.get_resolver(mock.Mock()))
+
+
+class TestWatchRows(test_utils.TestCase):
+
+    def _watch(self, snapshots, **kwargs):
+        snapshots = iter(snapshots)
+        sleep = mock.Mock()
+        changes = list(utils.watch_rows(lambda: next(snapshots), 1,
+                                        sleep=sleep, **kwargs))
+        return ([(change, row) for now, change, row in changes],
+                [call[0][0] for call in sleep.call_args_list])
+
+    def test_changes(self):
+        changes, delays = self._watch(
+            [[['a', 1], ['b', 2]], [['a', 1], ['b', 2]],
+             [['a', 1], ['c', [3]]]], count=3)
+        self.assertEqual([('+', ['a', 1]), ('+', ['b', 2]),
+                          ('+', ['c', [3]]), ('-', ['b', 2])], changes)
+        self.assertEqual([1, 2], delays)
+
+    def test_backoff(self):
+        changes, delays = self._watch([[['a']]] * 5 + [[]], count=6,
+                                      max_interval=5)
+        self.assertEqual([('+', ['a']), ('-', ['a'])], changes)
+        self.assertEqual([1, 2, 4, 5, 5], delays)
+
+    def test_interrupted(self):
+        sleep = mock.Mock(side_effect=KeyboardInterrupt())
+        changes = list(utils.watch_rows(lambda: [['a']], 1, sleep=sleep))
+        self.assertEqual(['+'], [change for now, change, row in changes])
+
+    def test_interval_must_be_positive(self):
+        self.assertRaises(ValueError, next,
+                          utils.watch_rows(lambda: [], 0, count=1))
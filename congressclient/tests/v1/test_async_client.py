@@ -0,0 +1,98 @@
+#   Licensed under the Apache License, Version 2.0 (the "License"); you may
+#   not use this file except in compliance with the License. You may obtain
+#   a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#   WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#   License for the specific language governing permissions and limitations
+#   under the License.
+#
+
+import asyncio
+import inspect
+
+from keystoneauth1 import session
+import mock
+
+from congressclient.tests import utils
+from congressclient.v1 import async_client
+from congressclient.v1 import client
+
+
+class TestAsyncClient(utils.TestCase):
+
+    def setUp(self):
+        super(TestAsyncClient, self).setUp()
+        self.congress = async_client.AsyncClient(session=session.Session(),
+                                                 service_type='policy',
+                                                 max_workers=4)
+        self.addCleanup(self.congress.close)
+
+    def _run(self, coro):
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(coro)
+        finally:
+            loop.close()
+
+    def test_mirrors_client_methods(self):
+        for name, func in inspect.getmembers(client.Client,
+                                             inspect.isfunction):
+            if name.startswith('_'):
+                continue
+            if inspect.isgeneratorfunction(func) or name.startswith('iter_'):
+                self.assertTrue(
+                    inspect.isasyncgenfunction(getattr(self.congress, name)),
+                    '%s is not an asynchronous generator' % name)
+            else:
+                self.assertTrue(
+                    asyncio.iscoroutinefunction(getattr(self.congress,
+                                                        name)),
+                    '%s is not a coroutine' % name)
+
+    def test_shares_session_and_pool(self):
+        self.assertEqual(4,
+                         self.congress.client.pool.pool_kwargs['pool_maxsize'])
+
+    def test_concurrent_calls(self):
+        body = {'results': [{'data': [1, 2]}]}
+        self.congress.client.httpclient = mock.Mock()
+        self.congress.client.httpclient.get.return_value = (None, body)
+
+        async def fetch():
+            return await asyncio.gather(*[
+                self.congress.list_policy_rows('classification', table)
+                for table in ('p', 'q', 'r')])
+
+        results = self._run(fetch())
+        self.assertEqual([body] * 3, results)
+        self.congress.client.httpclient.get.assert_has_calls(
+            [mock.call('/v1/policies/classification/tables/%s/rows' % t)
+             for t in ('p', 'q', 'r')], any_order=True)
+
+    def test_iterators_are_async_generators(self):
+        bodies = [{'results': [{'id': 'r1'}, {'id': 'r2'}],
+                   'links': [{'rel': 'next',
+                              'href': '/v1/policies/p/rules?marker=r2'}]},
+                  {'results': [{'id': 'r3'}]}]
+        self.congress.client.httpclient = mock.Mock()
+        self.congress.client.httpclient.get.side_effect = [
+            (None, body) for body in bodies]
+
+        async def fetch():
+            return [rule['id'] async for rule in
+                    self.congress.iter_policy_rules('p')]
+
+        self.assertEqual(['r1', 'r2', 'r3'], self._run(fetch()))
+        self.assertEqual(2, self.congress.client.httpclient.get.call_count)
+
+    def test_async_with_closes(self):
+        async def use():
+            async with self.congress:
+                pass
+
+        self._run(use())
+        self.assertRaises(RuntimeError, self.congress._executor.submit, id)
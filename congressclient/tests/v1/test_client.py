@@ -0,0 +1,666 @@
+#   Licensed under the Apache License, Version 2.0 (the "License"); you may
+#   not use this file except in compliance with the License. You may obtain
+#   a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#   WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#   License for the specific language governing permissions and limitations
+#   under the License.
+#
+
+import copy
+import json
+
+from keystoneauth1 import exceptions as ks_exceptions
+from keystoneauth1 import session
+import mock
+import requests
+
+from congressclient.common import connection
+from congressclient.common import schema_cache
+from congressclient import exceptions
+from congressclient.tests import utils
+from congressclient.v1 import client
+
+ENDPOINT = 'https://congress:1789'
+
+
+class TestClientConnectionPool(utils.TestCase):
+
+    def test_no_pool_options_leaves_session_alone(self):
+        sess = session.Session()
+        adapters = dict(sess.session.adapters)
+        congress = client.Client(session=sess, service_type='policy')
+        self.assertIsNone(congress.http_adapter)
+        self.assertEqual(adapters, sess.session.adapters)
+        self.assertEqual([], congress.pool_stats())
+
+    def _list_policy(self, congress):
+        response = requests.Response()
+        response.status_code = 200
+        response.url = ENDPOINT + '/v1/policies'
+        response.headers['Content-Type'] = 'application/json'
+        response._content = b'{"results": []}'
+        with mock.patch.object(connection.PooledHTTPAdapter, 'send',
+                               return_value=response) as send:
+            congress.list_policy()
+        return send
+
+    def test_pool_options_mount_adapter_on_endpoint(self):
+        sess = session.Session()
+        congress = client.Client(session=sess, service_type='policy',
+                                 endpoint_override=ENDPOINT,
+                                 pool_maxsize=32, pool_block=True,
+                                 pool_idle_timeout=30)
+        self.assertIsNone(congress.http_adapter)
+        self.assertEqual(1, self._list_policy(congress).call_count)
+
+        http_adapter = congress.http_adapter
+        self.assertIsInstance(http_adapter, connection.PooledHTTPAdapter)
+        self.assertIs(http_adapter,
+                      sess.session.get_adapter(ENDPOINT + '/v1/policies'))
+        self.assertIsNot(http_adapter,
+                         sess.session.get_adapter('https://keystone/v3'))
+        self.assertIsNot(http_adapter,
+                         sess.session.get_adapter(ENDPOINT + '0/'))
+        self.assertEqual(32, http_adapter._pool_maxsize)
+        self.assertTrue(http_adapter._pool_block)
+        self.assertEqual(30, http_adapter.idle_timeout)
+
+    def test_clients_share_endpoint_pool(self):
+        sess = session.Session()
+        congresses = [client.Client(session=sess, service_type='policy',
+                                    endpoint_override=ENDPOINT,
+                                    pool_maxsize=maxsize)
+                      for maxsize in (4, 8)]
+        for congress in congresses:
+            self._list_policy(congress)
+        self.assertIs(congresses[0].http_adapter,
+                      congresses[1].http_adapter)
+        self.assertEqual(4, congresses[1].http_adapter._pool_maxsize)
+
+    def test_pool_stats(self):
+        sess = session.Session()
+        congress = client.Client(session=sess, service_type='policy',
+                                 endpoint_override=ENDPOINT,
+                                 pool_maxsize=4)
+        self.assertEqual([], congress.pool_stats())
+        self._list_policy(congress)
+        congress.http_adapter.poolmanager.connection_from_url(ENDPOINT)
+        stats = congress.pool_stats()
+        self.assertEqual(1, len(stats))
+        self.assertEqual('congress', stats[0]['host'])
+        self.assertEqual(1789, stats[0]['port'])
+        self.assertEqual(4, stats[0]['maxsize'])
+        self.assertEqual(0, stats[0]['requests'])
+
+
+class TestFetchPolicySnapshot(utils.TestCase):
+
+    def setUp(self):
+        super(TestFetchPolicySnapshot, self).setUp()
+        self.congress = client.Client(session=session.Session(),
+                                      service_type='policy')
+        self.congress.httpclient = mock.Mock()
+
+        def get(url):
+            if url == '/v1/policies/classification/tables':
+                return None, {'results': [{'id': 'p'}, {'id': 'q'}]}
+            table = url.split('/')[-2]
+            return None, {'results': [{'data': [table, 1]}]}
+        self.congress.httpclient.get.side_effect = get
+
+    def test_fetch_all_tables(self):
+        snapshot = self.congress.fetch_policy_snapshot('classification',
+                                                       max_workers=2)
+        self.assertEqual(['p', 'q'], sorted(snapshot))
+        self.assertEqual([{'data': ['p', 1]}], snapshot['p']['results'])
+        self.assertEqual([{'data': ['q', 1]}], snapshot['q']['results'])
+        self.assertGreaterEqual(snapshot['p']['elapsed'], 0)
+        self.assertEqual(3, self.congress.httpclient.get.call_count)
+
+    def test_fetch_given_tables(self):
+        snapshot = self.congress.fetch_policy_snapshot('classification',
+                                                       tables=['q'])
+        self.assertEqual(['q'], list(snapshot))
+        self.congress.httpclient.get.assert_called_once_with(
+            '/v1/policies/classification/tables/q/rows')
+
+    def test_fetch_no_tables(self):
+        self.assertEqual({}, self.congress.fetch_policy_snapshot(
+            'classification', tables=[]))
+
+
+class TestClientResponseCache(utils.TestCase):
+
+    def setUp(self):
+        super(TestClientResponseCache, self).setUp()
+        self.congress = client.Client(session=session.Session(),
+                                      service_type='policy',
+                                      response_cache=True)
+        self.congress.httpclient = mock.Mock()
+
+    def _response(self, status_code=200, etag=None):
+        resp = mock.Mock(status_code=status_code, content=b'{}')
+        resp.headers = {'ETag': etag} if etag else {}
+        return resp
+
+    def test_cache_disabled_by_default(self):
+        congress = client.Client(session=session.Session(),
+                                 service_type='policy')
+        self.assertIsNone(congress.response_cache)
+
+    def test_cache_hit(self):
+        body = {'results': [{'id': 'nova'}]}
+        self.congress.httpclient.get.return_value = (self._response(), body)
+        self.assertEqual(body, self.congress.list_drivers())
+        self.assertEqual(body, self.congress.list_drivers())
+        self.congress.httpclient.get.assert_called_once_with(
+            '/v1/system/drivers')
+
+    def test_uncached_endpoint(self):
+        body = {'results': []}
+        self.congress.httpclient.get.return_value = (self._response(), body)
+        self.congress.list_datasource_rows('nova', 'servers')
+        self.congress.list_datasource_rows('nova', 'servers')
+        self.assertEqual(2, self.congress.httpclient.get.call_count)
+
+    @mock.patch('time.monotonic')
+    def test_revalidate_with_etag(self, monotonic):
+        monotonic.return_value = 100
+        body = {'columns': [{'name': 'id'}]}
+        url = '/v1/data-sources/nova/tables/servers/spec'
+        self.congress.httpclient.get.return_value = (
+            self._response(etag='"v1"'), body)
+        self.congress.show_datasource_table_schema('nova', 'servers')
+
+        monotonic.return_value = 1000
+        self.congress.httpclient.get.return_value = (
+            self._response(status_code=304), None)
+        self.assertEqual(body, self.congress.show_datasource_table_schema(
+            'nova', 'servers'))
+        self.congress.httpclient.get.assert_called_with(
+            url, headers={'If-None-Match': '"v1"'})
+        self.assertEqual(1, self.congress.response_cache.revalidations)
+
+    def test_create_invalidates(self):
+        self.congress.httpclient.get.return_value = (
+            self._response(), {'results': []})
+        self.congress.httpclient.post.return_value = (
+            self._response(), {'id': 'x'})
+        self.congress.list_policy()
+        self.congress.create_policy({'name': 'x'})
+        self.congress.list_policy()
+        self.assertEqual(2, self.congress.httpclient.get.call_count)
+
+    def test_delete_datasource_invalidates(self):
+        self.congress.httpclient.get.return_value = (
+            self._response(), {'tables': []})
+        self.congress.httpclient.delete.return_value = (
+            self._response(), None)
+        self.congress.show_datasource_schema('nova')
+        self.congress.delete_datasource('nova')
+        self.congress.show_datasource_schema('nova')
+        self.assertEqual(2, self.congress.httpclient.get.call_count)
+
+
+class TestClientSchemaCache(utils.TestCase):
+
+    def setUp(self):
+        super(TestClientSchemaCache, self).setUp()
+        self.congress = client.Client(
+            session=session.Session(), service_type='policy',
+            schema_cache=schema_cache.SchemaCache())
+        self.congress.httpclient = mock.Mock()
+        self.congress.httpclient.get_endpoint.return_value = 'http://c:1789'
+        self.congress.httpclient.get.return_value = (
+            None, {'columns': [{'name': 'id'}, {'name': 'name'}]})
+
+    def test_fetched_columns_are_cached(self):
+        self.assertIsNone(self.congress.cached_table_columns('nova', 'vms'))
+        self.assertEqual(['id', 'name'],
+                         self.congress.fetch_table_columns('nova', 'vms'))
+        self.assertEqual(['id', 'name'],
+                         self.congress.cached_table_columns('nova', 'vms'))
+        self.assertIsNone(self.congress.cached_table_columns('nova', 'ips'))
+
+    def test_delete_datasource_invalidates(self):
+        self.congress.fetch_table_columns('nova', 'vms')
+        self.congress.httpclient.delete.return_value = (None, None)
+        self.congress.delete_datasource('nova')
+        self.assertIsNone(self.congress.cached_table_columns('nova', 'vms'))
+
+    def test_create_datasource_invalidates(self):
+        self.congress.fetch_table_columns('nova', 'vms')
+        self.congress.httpclient.post.return_value = (
+            None, {'id': 'abc', 'name': 'nova'})
+        self.congress.create_datasource({'name': 'nova'})
+        self.assertIsNone(self.congress.cached_table_columns('nova', 'vms'))
+
+    def test_policy_table_columns(self):
+        self.congress.httpclient.get.return_value = (None, {'results': [
+            {'id': '1', 'rule': 'error(vm, "down") :- nova:servers(id=vm)'},
+            {'id': '2', 'rule': 'error(x, reason) :- q(x, reason)'},
+            {'id': '3', 'rule': 'q(1, 2)'},
+            {'id': '4', 'rule': 'execute[nova:servers.stop(x)] :- '
+                                'error(x, y)'}]})
+        self.assertEqual(['vm', 'reason'],
+                         self.congress.policy_table_columns('p', 'error'))
+        self.assertEqual(['Col0', 'Col1'],
+                         self.congress.policy_table_columns('p', 'q'))
+        self.assertEqual(1, self.congress.httpclient.get.call_count)
+        # tables without rules are only looked up once too
+        self.assertEqual([], self.congress.policy_table_columns('p', 'r'))
+        self.assertEqual([], self.congress.policy_table_columns('p', 'r'))
+        self.assertEqual(2, self.congress.httpclient.get.call_count)
+
+        self.congress.policy_table_columns('p', 'error', refresh=True)
+        self.assertEqual(3, self.congress.httpclient.get.call_count)
+
+    def test_create_policy_rule_invalidates_columns(self):
+        self.congress.httpclient.get.return_value = (None, {'results': [
+            {'id': '1', 'rule': 'error(x) :- q(x)'}]})
+        self.congress.policy_table_columns('p', 'error')
+        self.congress.httpclient.post.return_value = (None, {'id': '2'})
+        self.congress.create_policy_rule('p', {'rule': 'error(y) :- r(y)'})
+        self.congress.policy_table_columns('p', 'error')
+        self.assertEqual(2, self.congress.httpclient.get.call_count)
+
+    def test_no_cache(self):
+        self.congress.schema_cache = None
+        self.congress.fetch_table_columns('nova', 'vms')
+        self.assertIsNone(self.congress.cached_table_columns('nova', 'vms'))
+
+
+class TestRefreshDatasource(utils.TestCase):
+
+    def setUp(self):
+        super(TestRefreshDatasource, self).setUp()
+        self.congress = client.Client(session=session.Session(),
+                                      service_type='policy')
+        self.congress.request_refresh = mock.Mock()
+        self.sleep = mock.Mock()
+
+    def _statuses(self, *updates):
+        self.congress.list_datasource_status = mock.Mock(side_effect=[
+            {'number_of_updates': str(count), 'last_updated': 'now'}
+            for count in updates])
+
+    def test_wait_for_refresh(self):
+        self._statuses(3, 3, 3, 4)
+        status = self.congress.wait_for_refresh(
+            'nova', {'number_of_updates': '3', 'last_updated': 'now'},
+            sleep=self.sleep)
+        self.assertEqual('4', status['number_of_updates'])
+        self.assertEqual([0.5, 1, 2, 4],
+                         [c[0][0] for c in self.sleep.call_args_list])
+
+    def test_wait_for_refresh_timeout(self):
+        self._statuses(*[3] * 10)
+        with mock.patch('time.monotonic', side_effect=[0, 1, 2, 11]):
+            self.assertRaises(exceptions.WaitTimeout,
+                              self.congress.wait_for_refresh, 'nova',
+                              {'number_of_updates': '3',
+                               'last_updated': 'now'},
+                              timeout=10, sleep=self.sleep)
+        self.assertEqual(2, self.congress.list_datasource_status.call_count)
+
+    def test_refresh_datasources(self):
+        self._statuses(1, 2)
+        self.congress.wait_for_refresh = mock.Mock(
+            return_value={'number_of_updates': '2'})
+        outcomes = list(self.congress.refresh_datasources(['nova'],
+                                                          wait=True))
+        self.assertEqual([{'number_of_updates': '2'}],
+                         [outcome['result'] for outcome in outcomes])
+        self.congress.request_refresh.assert_called_with('nova', {})
+        self.congress.wait_for_refresh.assert_called_with(
+            'nova', {'number_of_updates': '1', 'last_updated': 'now'}, 300)
+
+
+class TestClientStreaming(utils.TestCase):
+
+    headers = {'Accept': 'application/json',
+               'Accept-Encoding': 'gzip, deflate'}
+
+    def setUp(self):
+        super(TestClientStreaming, self).setUp()
+        self.congress = client.Client(session=session.Session(),
+                                      service_type='policy')
+        self.congress.rawclient = mock.Mock()
+        self.resp = self.congress.rawclient.get.return_value
+        self.resp.iter_content.return_value = [
+            b'{"results": [{"data": [1, "a"]},', b' {"data": [2, "b"]}],',
+            b' "trace": "Call p(x)"}']
+
+    def test_iter_datasource_rows(self):
+        rows = self.congress.iter_datasource_rows('nova', 'servers')
+        self.assertNotCalled(self.congress.rawclient.get)
+        self.assertEqual([{'data': [1, 'a']}, {'data': [2, 'b']}],
+                         list(rows))
+        self.congress.rawclient.get.assert_called_once_with(
+            '/v1/data-sources/nova/tables/servers/rows', stream=True,
+            headers=self.headers)
+        self.resp.close.assert_called_once_with()
+
+    def test_iter_policy_rows_trace(self):
+        extra = {}
+        rows = list(self.congress.iter_policy_rows('classification', 'p',
+                                                   trace=True, extra=extra))
+        self.assertEqual(2, len(rows))
+        self.assertEqual({'trace': 'Call p(x)'}, extra)
+        self.congress.rawclient.get.assert_called_once_with(
+            '/v1/policies/classification/tables/p/rows?trace=True',
+            stream=True, headers=self.headers)
+
+
+class TestClientPaging(utils.TestCase):
+
+    rows = {'results': [{'data': ['a', 1]}, {'data': ['b', 2]},
+                        {'data': ['c', 1]}, {'data': ['d', 1]}]}
+
+    def setUp(self):
+        super(TestClientPaging, self).setUp()
+        self.congress = client.Client(session=session.Session(),
+                                      service_type='policy')
+        self.congress.httpclient = mock.Mock()
+
+    def _get_returns(self, body):
+        self.congress.httpclient.get.return_value = (None, copy.deepcopy(body))
+
+    def test_no_paging(self):
+        self._get_returns(self.rows)
+        self.assertEqual(self.rows, self.congress.list_policy_rows('p', 't'))
+        self.congress.httpclient.get.assert_called_once_with(
+            '/v1/policies/p/tables/t/rows')
+
+    def test_client_side_paging(self):
+        self._get_returns(self.rows)
+        body = self.congress.list_policy_rows('p', 't', trace=True, limit=2,
+                                              offset=1, filters={1: 1})
+        self.assertEqual([{'data': ['c', 1]}, {'data': ['d', 1]}],
+                         body['results'])
+        self.congress.httpclient.get.assert_called_once_with(
+            '/v1/policies/p/tables/t/rows?trace=True&limit=3&1=1')
+
+    def test_last_page_without_links(self):
+        # a paging server returning the first offset + limit rows
+        self._get_returns({'results': self.rows['results'][:3]})
+        body = self.congress.list_policy_rows('p', 't', limit=2, offset=1)
+        self.assertEqual([{'data': ['b', 2]}, {'data': ['c', 1]}],
+                         body['results'])
+        self.assertNotIn('policy_rows', self.congress.server_paging)
+
+    def test_offset_sent_once_server_pages(self):
+        self._get_returns({'results': self.rows['results'][:3],
+                           'links': []})
+        self.congress.list_policy_rows('p', 't', limit=2, offset=1)
+        self.assertTrue(self.congress.server_paging['policy_rows'])
+
+        self._get_returns({'results': self.rows['results'][2:]})
+        body = self.congress.list_policy_rows('p', 't', limit=2, offset=2)
+        self.assertEqual(self.rows['results'][2:], body['results'])
+        self.congress.httpclient.get.assert_called_with(
+            '/v1/policies/p/tables/t/rows?limit=2&offset=2')
+
+    def test_unpaged_server_detected(self):
+        self._get_returns(self.rows)
+        self.congress.list_policy_rows('p', 't', limit=2)
+        self.assertIs(False, self.congress.server_paging['policy_rows'])
+
+    def test_server_paging_known_per_endpoint(self):
+        rules = {'results': [{'id': 'r1'}], 'links': []}
+        self._get_returns(rules)
+        self.congress.list_policy_rules('p', limit=1)
+        self.assertEqual({'policy_rules': True}, self.congress.server_paging)
+
+        # a rows endpoint ignoring the offset
+        self._get_returns(self.rows)
+        body = self.congress.list_policy_rows('p', 't', limit=2, offset=1)
+        self.assertEqual(self.rows['results'][1:3], body['results'])
+        self.congress.httpclient.get.assert_called_with(
+            '/v1/policies/p/tables/t/rows?limit=3')
+
+    def test_rows_marker_needs_server_paging(self):
+        self._get_returns(self.rows)
+        self.assertRaises(exceptions.ValidationError,
+                          self.congress.list_datasource_rows, 'nova',
+                          'servers', marker='m1')
+        self._get_returns({'results': self.rows['results'][2:],
+                           'links': []})
+        body = self.congress.list_datasource_rows('nova', 'servers',
+                                                  marker='m1')
+        self.assertEqual(self.rows['results'][2:], body['results'])
+
+    def test_server_side_paging(self):
+        page = {'results': [{'data': ['a', 1]}], 'links': []}
+        self._get_returns(page)
+        body = self.congress.list_datasource_rows('nova', 'servers', limit=1,
+                                                  filters={'1': 1})
+        self.assertEqual(page, body)
+
+    def test_filter_by_column_name(self):
+        self._get_returns(self.rows)
+        self.congress.show_datasource_table_schema = mock.Mock(
+            return_value={'columns': [{'name': 'id'}, {'name': 'flavor'}]})
+        body = self.congress.list_datasource_rows(
+            'nova', 'servers', filters={'flavor': '2'})
+        self.assertEqual([{'data': ['b', 2]}], body['results'])
+
+    def test_filter_unknown_column(self):
+        self._get_returns(self.rows)
+        self.assertRaises(exceptions.ValidationError,
+                          self.congress.list_policy_rows, 'p', 't',
+                          filters={'flavor': '2'})
+
+    def test_rules_marker(self):
+        self._get_returns({'results': [{'id': 'r1', 'name': 'a'},
+                                       {'id': 'r2', 'name': 'b'},
+                                       {'id': 'r3', 'name': 'a'}]})
+        body = self.congress.list_policy_rules('p', marker='r1',
+                                               filters={'name': 'a'})
+        self.assertEqual([{'id': 'r3', 'name': 'a'}], body['results'])
+
+    def test_iter_policy_rules_follows_links(self):
+        self.congress.httpclient.get.side_effect = [
+            (None, {'results': [{'id': 'r1'}],
+                    'links': [{'rel': 'next', 'href': 'http://c/next'}]}),
+            (None, {'results': [{'id': 'r2'}], 'links': []})]
+        rules = list(self.congress.iter_policy_rules('p', page_size=1))
+        self.assertEqual([{'id': 'r1'}, {'id': 'r2'}], rules)
+        self.congress.httpclient.get.assert_has_calls([
+            mock.call('/v1/policies/p/rules?limit=1'),
+            mock.call('http://c/next')])
+
+    def test_iter_datasource_rows_follows_links(self):
+        self.congress.rawclient = mock.Mock()
+        first, second = mock.Mock(), mock.Mock()
+        first.iter_content.return_value = [
+            b'{"results": [{"data": ["a", 1]}, {"data": ["b", 2]}], '
+            b'"links": [{"rel": "next", "href": "http://c/next"}]}']
+        second.iter_content.return_value = [
+            b'{"results": [{"data": ["c", 1]}], "links": []}']
+        self.congress.rawclient.get.side_effect = [first, second]
+        rows = list(self.congress.iter_datasource_rows(
+            'nova', 'servers', filters={'1': '1'}, page_size=2))
+        self.assertEqual([{'data': ['a', 1]}, {'data': ['c', 1]}], rows)
+        self.assertEqual(
+            '/v1/data-sources/nova/tables/servers/rows?limit=2&1=1',
+            self.congress.rawclient.get.call_args_list[0][0][0])
+
+
+class TestClientColumnar(utils.TestCase):
+
+    def test_list_datasource_rows_columnar(self):
+        congress = client.Client(session=session.Session(),
+                                 service_type='policy')
+        congress.show_datasource_table_schema = mock.Mock(
+            return_value={'columns': [{'name': 'id'}, {'name': 'name'}]})
+        congress.iter_datasource_rows = mock.Mock(
+            return_value=iter([{'data': [1, 'a']}, {'data': [2, 'b']}]))
+        rows = congress.list_datasource_rows_columnar('nova', 'servers')
+        self.assertEqual(['id', 'name'], rows.columns)
+        self.assertEqual([(1, 'a'), (2, 'b')], list(rows))
+        congress.iter_datasource_rows.assert_called_once_with(
+            'nova', 'servers', filters=None)
+
+
+class TestSimulateMany(utils.TestCase):
+
+    def setUp(self):
+        super(TestSimulateMany, self).setUp()
+        self.congress = client.Client(session=session.Session(),
+                                      service_type='policy')
+        self.congress.httpclient = mock.Mock()
+
+        def post(url, body):
+            if body['query'] == 'boom(x)':
+                raise ValueError('boom')
+            return mock.Mock(), {'result': [body['query'].upper()],
+                                 'url': url}
+        self.congress.httpclient.post.side_effect = post
+
+    def test_simulate_many(self):
+        cases = [{'query': 'p(x)', 'sequence': 'q+(1)'},
+                 {'query': 'boom(x)', 'sequence': 'q+(1)'},
+                 {'query': 'r(x)', 'sequence': 'q+(1)', 'delta': True,
+                  'action_policy': 'action'}]
+        outcomes = sorted(self.congress.simulate_many('classification',
+                                                      iter(cases),
+                                                      max_workers=2),
+                          key=lambda outcome: outcome['index'])
+
+        self.assertEqual([0, 1, 2], [o['index'] for o in outcomes])
+        self.assertEqual(cases, [o['case'] for o in outcomes])
+        self.assertEqual(['P(X)'], outcomes[0]['result']['result'])
+        self.assertIsNone(outcomes[0]['error'])
+        self.assertIsNone(outcomes[1]['result'])
+        self.assertIsInstance(outcomes[1]['error'], ValueError)
+        self.assertEqual(
+            '/v1/policies/classification'
+            '?action=simulate&trace=False&delta=True',
+            outcomes[2]['result']['url'])
+        for outcome in outcomes:
+            self.assertGreaterEqual(outcome['elapsed'], 0)
+        self.congress.httpclient.post.assert_any_call(
+            '/v1/policies/classification'
+            '?action=simulate&trace=False&delta=True',
+            body={'query': 'r(x)', 'sequence': 'q+(1)',
+                  'action_policy': 'action'})
+
+    def test_simulate_many_consumes_cases_lazily(self):
+        consumed = []
+
+        def cases():
+            for i in range(10):
+                consumed.append(i)
+                yield {'query': 'p%d(x)' % i, 'sequence': 'q+(1)'}
+
+        outcomes = self.congress.simulate_many('classification', cases(),
+                                               max_workers=2)
+        next(outcomes)
+        self.assertLessEqual(len(consumed), 3)
+        self.assertEqual(9, len(list(outcomes)))
+        self.assertEqual(list(range(10)), consumed)
+
+
+class TestCreatePolicies(utils.TestCase):
+
+    def setUp(self):
+        super(TestCreatePolicies, self).setUp()
+        self.congress = client.Client(session=session.Session(),
+                                      service_type='policy')
+        self.congress.httpclient = mock.Mock()
+
+    def test_create_policies(self):
+        self.congress.httpclient.post.side_effect = [
+            (mock.Mock(), {'id': 'id-p1', 'name': 'p1'})]
+        outcomes = list(self.congress.create_policies([{'name': 'p1'}]))
+        self.assertEqual([{'index': 0, 'policy': {'name': 'p1'},
+                           'result': {'id': 'id-p1', 'name': 'p1'},
+                           'error': None,
+                           'elapsed': outcomes[0]['elapsed']}], outcomes)
+        self.congress.httpclient.post.assert_called_once_with(
+            '/v1/policies', body={'name': 'p1'})
+
+    def test_create_policy_rules(self):
+        self.congress.httpclient.post.return_value = (mock.Mock(),
+                                                      {'id': 'r1'})
+        outcomes = list(self.congress.create_policy_rules(
+            'p1', [{'rule': 'p(1)'}]))
+        self.assertEqual({'id': 'r1'}, outcomes[0]['result'])
+        self.assertEqual({'rule': 'p(1)'}, outcomes[0]['rule'])
+        self.congress.httpclient.post.assert_called_once_with(
+            '/v1/policies/p1/rules', body={'rule': 'p(1)'})
+
+    def test_delete_policy_rules(self):
+        self.congress.httpclient.delete.side_effect = [
+            (mock.Mock(), None), ValueError('gone')]
+        outcomes = sorted(self.congress.delete_policy_rules(
+            'p1', ['r1', 'r2'], max_workers=1),
+            key=lambda outcome: outcome['index'])
+        self.assertEqual(['r1', 'r2'], [o['rule'] for o in outcomes])
+        self.assertIsNone(outcomes[0]['error'])
+        self.assertIsInstance(outcomes[1]['error'], ValueError)
+        self.congress.httpclient.delete.assert_has_calls(
+            [mock.call('/v1/policies/p1/rules/r1'),
+             mock.call('/v1/policies/p1/rules/r2')])
+
+
+class TestDeltaRowUpdate(utils.TestCase):
+
+    def setUp(self):
+        super(TestDeltaRowUpdate, self).setUp()
+        self.congress = client.Client(session=session.Session(),
+                                      service_type='policy')
+        self.congress.httpclient = mock.Mock()
+        self.congress.iter_datasource_rows = mock.Mock(return_value=iter([
+            {'data': ['a', 1]}, {'data': ['b', [1, 2]]}, {'data': ['c', 3]}]))
+        self.url = '/v1/data-sources/push/tables/t/rows'
+        self.rows = [['a', 1], ['b', [1, 2]], ['d', 4], ['d', 4]]
+
+    def test_update_without_body_is_not_streamed(self):
+        self.congress.rawclient = mock.Mock()
+        self.congress.httpclient.put.return_value = (None, None)
+        self.congress.update_datasource_rows('push', 't')
+        self.congress.httpclient.put.assert_called_once_with(self.url,
+                                                             body=None)
+        self.assertFalse(self.congress.rawclient.put.called)
+
+    def test_delta(self):
+        result = self.congress.update_datasource_rows_delta('push', 't',
+                                                            self.rows)
+        delta = {'added': [['d', 4]], 'removed': [['c', 3]]}
+        self.congress.httpclient.patch.assert_called_once_with(
+            self.url, body=delta)
+        self.assertFalse(self.congress.httpclient.put.called)
+        self.assertEqual({'added': 1, 'removed': 1, 'mode': 'delta',
+                          'bytes_sent': len(json.dumps(delta)),
+                          'bytes_full': len(json.dumps(self.rows[:3]))},
+                         result)
+        self.assertTrue(self.congress.delta_updates)
+
+    def test_full_update_without_delta_support(self):
+        self.congress.httpclient.patch.side_effect = (
+            ks_exceptions.MethodNotAllowed())
+        result = self.congress.update_datasource_rows_delta('push', 't',
+                                                            self.rows)
+        self.congress.httpclient.put.assert_called_once_with(
+            self.url, body=self.rows[:3])
+        self.assertEqual('full', result['mode'])
+        self.assertEqual(result['bytes_full'], result['bytes_sent'])
+        self.assertIs(False, self.congress.delta_updates)
+
+        self.congress.iter_datasource_rows.return_value = iter([])
+        self.congress.update_datasource_rows_delta('push', 't', self.rows)
+        self.assertEqual(1, self.congress.httpclient.patch.call_count)
+
+    def test_unchanged(self):
+        result = self.congress.update_datasource_rows_delta(
+            'push', 't', [['c', 3], ['b', [1, 2]], ['a', 1]])
+        self.assertEqual('unchanged', result['mode'])
+        self.assertFalse(self.congress.httpclient.patch.called)
+        self.assertFalse(self.congress.httpclient.put.called)
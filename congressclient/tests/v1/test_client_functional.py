@@ -0,0 +1,85 @@
+#   Licensed under the Apache License, Version 2.0 (the "License"); you may
+#   not use this file except in compliance with the License. You may obtain
+#   a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#   WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#   License for the specific language governing permissions and limitations
+#   under the License.
+#
+
+from keystoneauth1 import session
+
+from congressclient.tests import fake_server
+from congressclient.tests import utils
+from congressclient.v1 import client
+
+
+class TestClientAgainstFakeServer(utils.TestCase):
+    """Exercise the client over HTTP against the local fake Congress."""
+
+    def setUp(self):
+        super(TestClientAgainstFakeServer, self).setUp()
+        self.fake = fake_server.FakeCongressServer(rows=50).start()
+        self.addCleanup(self.fake.stop)
+        self.congress = client.Client(session=session.Session(),
+                                      endpoint_override=self.fake.url)
+
+    def test_list_and_stream_rows_agree(self):
+        listed = self.congress.list_datasource_rows('ds0', 'table0')
+        streamed = list(self.congress.iter_datasource_rows('ds0', 'table0'))
+        self.assertEqual(50, len(streamed))
+        self.assertEqual(listed['results'], streamed)
+
+    def test_policy_rows_trace(self):
+        extra = {}
+        rows = list(self.congress.iter_policy_rows('policy0', 'table1',
+                                                   trace=True, extra=extra))
+        self.assertEqual(50, len(rows))
+        self.assertEqual('Call table1(x)', extra['trace'])
+
+    def test_simulate(self):
+        result = self.congress.execute_policy_action(
+            'policy0', 'simulate', False, False,
+            {'query': 'p(x)', 'sequence': 'q(1)', 'action_policy': 'a'})
+        self.assertEqual({'result': ['p(1)']}, result)
+
+    def test_streamed_upload(self):
+        rows_url = '/v1/data-sources/ds0/tables/table0/rows'
+        rows = [['row%d' % i, i] for i in range(20000)]
+        progress = []
+        for compress in (False, True):
+            del progress[:]
+            self.congress.update_datasource_rows(
+                'ds0', 'table0', iter(rows), compress=compress,
+                progress=lambda count, sent: progress.append((count, sent)))
+            self.assertEqual(rows, self.fake.data.updates[rows_url])
+            self.assertEqual(20000, progress[-1][0])
+        # about 20 bytes per row uncompressed
+        self.assertLess(progress[-1][1], 20000 * 5)
+        # the connection stays usable after chunked uploads
+        self.congress.update_datasource_rows('ds0', 'table0', [['a', 1]])
+        self.assertEqual([['a', 1]], self.fake.data.updates[rows_url])
+
+    def test_instrumentation(self):
+        records = []
+        self.congress.instrumentation.add_post_hook(records.append)
+        self.congress.list_datasource_rows('ds0', 'table0')
+        list(self.congress.iter_policy_rows('policy0', 'table0'))
+        self.assertRaises(Exception, self.congress.show_policy_table,
+                          'policy0', 'missing')
+        self.assertEqual(['datasource_rows', 'policy_rows',
+                          'policy_table_path'],
+                         [record.endpoint for record in records])
+        self.assertEqual([200, 200, 404],
+                         [record.status for record in records])
+        for record in records[:2]:
+            self.assertGreater(record.bytes, 1000)
+            # row bodies are served gzip compressed
+            self.assertLess(record.wire_bytes, record.bytes / 2)
+            self.assertGreater(record.wall_time, 0)
+            self.assertGreater(record.decode_time, 0)
+        self.assertIsNotNone(records[2].error)
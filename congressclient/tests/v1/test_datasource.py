@@ -11,10 +11,15 @@
 #   under the License.
 #
 
+import os
+
+import fixtures
 import mock
 from oslo_serialization import jsonutils
+import six
 
 from congressclient.common import utils
+from congressclient import exceptions
 from congressclient.osc.v1 import datasource
 from congressclient.tests import common
 
@@ -220,6 +225,11 @@ class TestShowDatasourceTableSchema(common.TestCongressBase):
 
 class TestListDatasourceRows(common.TestCongressBase):
 
+    def setUp(self):
+        super(TestListDatasourceRows, self).setUp()
+        client = self.app.client_manager.congressclient
+        client.cached_table_columns = mock.Mock(return_value=None)
+
     def test_list_datasource_row(self):
         datasource_name = 'neutron'
         table_name = 'ports'
@@ -234,24 +244,110 @@ class TestListDatasourceRows(common.TestCongressBase):
             "results": [{"data": ["69abc88b-c950-4625-801b-542e84381509",
                                   "default"]}]
         }
-        schema_response = {
-            'table_id': 'ports',
-            'columns': [{"name": "ID", "description": "None"},
-                        {"name": "name", "description": "None"}]
-        }
 
         client = self.app.client_manager.congressclient
-        lister = mock.Mock(return_value=response)
-        client.list_datasource_rows = lister
-        schema_lister = mock.Mock(return_value=schema_response)
-        client.show_datasource_table_schema = schema_lister
+        lister = mock.Mock(return_value=iter(response['results']))
+        client.iter_datasource_rows = lister
+        client.fetch_table_columns = mock.Mock(return_value=['ID', 'name'])
         cmd = datasource.ListDatasourceRows(self.app, self.namespace)
 
         parsed_args = self.check_parser(cmd, arglist, verifylist)
         result = cmd.take_action(parsed_args)
 
         lister.assert_called_with(datasource_name, table_name)
+        client.cached_table_columns.assert_called_with(datasource_name,
+                                                       table_name)
+        client.fetch_table_columns.assert_called_with(datasource_name,
+                                                      table_name)
         self.assertEqual(['ID', 'name'], result[0])
+        self.assertEqual([response['results'][0]['data']], list(result[1]))
+
+    def test_list_datasource_rows_empty(self):
+        client = self.app.client_manager.congressclient
+        client.iter_datasource_rows = mock.Mock(return_value=iter([]))
+        client.fetch_table_columns = mock.Mock(
+            side_effect=Exception('No such table'))
+        cmd = datasource.ListDatasourceRows(self.app, self.namespace)
+
+        parsed_args = self.check_parser(cmd, ['neutron', 'ports'], [])
+        result = cmd.take_action(parsed_args)
+
+        self.assertEqual([], list(result[1]))
+
+    def test_list_datasource_rows_paged(self):
+        client = self.app.client_manager.congressclient
+        lister = mock.Mock(return_value={'results': [{'data': ['a', 'b']}]})
+        client.list_datasource_rows = lister
+        client.fetch_table_columns = mock.Mock(return_value=['id', 'name'])
+        cmd = datasource.ListDatasourceRows(self.app, self.namespace)
+
+        arglist = ['neutron', 'ports', '--limit', '5', '--filter', 'name=b']
+        parsed_args = self.check_parser(cmd, arglist, [('limit', 5)])
+        result = cmd.take_action(parsed_args)
+
+        lister.assert_called_with('neutron', 'ports', limit=5,
+                                  filters={'name': 'b'})
+        self.assertEqual(['id', 'name'], result[0])
+        self.assertEqual([['a', 'b']], list(result[1]))
+
+    def _list_with_cached_columns(self, columns, arglist=()):
+        client = self.app.client_manager.congressclient
+        client.iter_datasource_rows = mock.Mock(
+            return_value=iter([{'data': ['a', 'b']}]))
+        client.cached_table_columns.return_value = columns
+        client.fetch_table_columns = mock.Mock(return_value=['id', 'name'])
+        cmd = datasource.ListDatasourceRows(self.app, self.namespace)
+        parsed_args = self.check_parser(
+            cmd, ['neutron', 'ports'] + list(arglist), [])
+        columns, rows = cmd.take_action(parsed_args)
+        self.assertEqual([['a', 'b']], list(rows))
+        return columns
+
+    def test_list_datasource_rows_cached_schema(self):
+        columns = self._list_with_cached_columns(['ID', 'NAME'])
+
+        self.assertEqual(['ID', 'NAME'], columns)
+        client = self.app.client_manager.congressclient
+        self.assertNotCalled(client.fetch_table_columns)
+
+    def test_list_datasource_rows_outdated_schema(self):
+        columns = self._list_with_cached_columns(['id', 'name', 'status'])
+
+        self.assertEqual(['id', 'name'], columns)
+
+    def test_list_datasource_rows_refresh_schema(self):
+        columns = self._list_with_cached_columns(['ID', 'NAME'],
+                                                 ['--refresh-schema'])
+
+        self.assertEqual(['id', 'name'], columns)
+        client = self.app.client_manager.congressclient
+        self.assertNotCalled(client.cached_table_columns)
+
+    def test_list_datasource_rows_watch_needs_positive_interval(self):
+        cmd = datasource.ListDatasourceRows(self.app, self.namespace)
+        for interval in ('0', '-1', 'nan', 'x'):
+            self.assertRaises(Exception, self.check_parser, cmd,
+                              ['neutron', 'ports', '--watch', interval], [])
+
+    def test_list_datasource_rows_watch(self):
+        client = self.app.client_manager.congressclient
+        client.iter_datasource_rows = mock.Mock(side_effect=[
+            iter([{'data': ['a', 'b']}]),
+            iter([{'data': ['a', 'b']}, {'data': ['c', 'd']}]),
+            iter([{'data': ['c', 'd']}])])
+        client.fetch_table_columns = mock.Mock(return_value=['id', 'name'])
+        cmd = datasource.ListDatasourceRows(self.app, self.namespace)
+        arglist = ['neutron', 'ports', '--watch', '0.001',
+                   '--watch-count', '3', '--filter', 'name=b']
+        parsed_args = self.check_parser(cmd, arglist, [('watch', 0.001)])
+
+        columns, rows = cmd.take_action(parsed_args)
+
+        self.assertEqual(['time', 'change', 'id', 'name'], columns)
+        self.assertEqual([['+', 'a', 'b'], ['+', 'c', 'd'], ['-', 'a', 'b']],
+                         [row[1:] for row in rows])
+        client.iter_datasource_rows.assert_called_with(
+            'neutron', 'ports', filters={'name': 'b'})
 
 
 class TestShowDatasourceTable(common.TestCongressBase):
@@ -364,7 +460,94 @@ class TestUpdateDatasourceRow(common.TestCongressBase):
         with mock.patch.object(utils, 'get_resource_id_from_name',
                                return_value="push"):
             cmd.take_action(parsed_args)
-        mocker.assert_called_with(driver, table_name, rows)
+        mocker.assert_called_with(driver, table_name, rows, compress=False,
+                                  progress=None)
+
+    def test_update_datasource_row_delta_from_file(self):
+        path = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                            'rows.jsonl')
+        with open(path, 'w') as f:
+            f.write('[["data1"], "data2"]\n\n["data3", "data4"]\n')
+        client = self.app.client_manager.congressclient
+        received = []
+
+        def update(datasource_name, table_name, rows):
+            received.append((datasource_name, table_name, list(rows)))
+            return {'added': 1, 'removed': 2, 'mode': 'delta',
+                    'bytes_sent': 40, 'bytes_full': 400}
+        client.update_datasource_rows_delta.side_effect = update
+        cmd = datasource.UpdateDatasourceRow(self.app, self.namespace)
+        parsed_args = self.check_parser(
+            cmd, ['push', 'table', '--from-file', path, '--jsonl',
+                  '--delta'],
+            [('rows', None), ('jsonl', True), ('delta', True)])
+
+        cmd.take_action(parsed_args)
+
+        self.assertEqual(
+            [('push', 'table', [[['data1'], 'data2'], ['data3', 'data4']])],
+            received)
+        self.assertFalse(client.update_datasource_rows.called)
+        self.app.stdout.write.assert_called_once_with(
+            '1 rows added, 2 removed (delta update): sent 40 bytes instead '
+            'of 400\n')
+
+    def test_update_datasource_row_compressed_from_file(self):
+        path = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                            'rows.json')
+        with open(path, 'w') as f:
+            f.write('[\n  ["data1", "data2"],\n  ["data3", "data4"]\n]\n')
+        client = self.app.client_manager.congressclient
+        received = []
+        client.update_datasource_rows.side_effect = (
+            lambda ds, table, rows, **kwargs: received.append(
+                (list(rows), kwargs)))
+        cmd = datasource.UpdateDatasourceRow(self.app, self.namespace)
+        parsed_args = self.check_parser(
+            cmd, ['push', 'table', '--from-file', path, '--compress'],
+            [('compress', True)])
+
+        cmd.take_action(parsed_args)
+
+        rows, kwargs = received[0]
+        self.assertEqual([['data1', 'data2'], ['data3', 'data4']], rows)
+        self.assertTrue(kwargs['compress'])
+        self.assertEqual(cmd._log_progress, kwargs['progress'])
+
+    def test_update_datasource_row_from_file_reports_progress(self):
+        path = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                            'rows.json')
+        with open(path, 'w') as f:
+            f.write('[["data1", "data2"]]\n')
+        client = self.app.client_manager.congressclient
+        received = []
+        client.update_datasource_rows.side_effect = (
+            lambda ds, table, rows, **kwargs: received.append(
+                (list(rows), kwargs)))
+        cmd = datasource.UpdateDatasourceRow(self.app, self.namespace)
+        parsed_args = self.check_parser(
+            cmd, ['push', 'table', '--from-file', path],
+            [('compress', False)])
+
+        cmd.take_action(parsed_args)
+
+        rows, kwargs = received[0]
+        self.assertEqual([['data1', 'data2']], rows)
+        self.assertFalse(kwargs['compress'])
+        self.assertEqual(cmd._log_progress, kwargs['progress'])
+
+    def test_iter_rows_rejects_invalid_files(self):
+        for text, jsonl in (('[]\n[1, 2]\n[3, 4]\n', False),
+                            ('[[1, 2], [3]]\n[4]\n', False),
+                            ('[1, 2]\n{"a": 1}\n', True),
+                            ('[1, 2]\n[3\n', True)):
+            self.assertRaises(ValueError, list,
+                              datasource._iter_rows(six.StringIO(text),
+                                                    jsonl))
+        self.assertEqual(
+            [[[1, 2], [3]], [[4]]],
+            list(datasource._iter_rows(six.StringIO('[[1, 2], [3]]\n'
+                                                    '[[4]]\n'), True)))
 
 
 class TestDatasourceRequestRefresh(common.TestCongressBase):
@@ -373,15 +556,41 @@ class TestDatasourceRequestRefresh(common.TestCongressBase):
         driver = 'neutronv2'
 
         arglist = [driver]
-        verifylist = [('datasource', driver), ]
+        verifylist = [('datasource', [driver]), ('wait', False)]
 
         mocker = mock.Mock(return_value=None)
         self.app.client_manager.congressclient.request_refresh = mocker
         self.app.client_manager.congressclient.list_datasources = mock.Mock()
         cmd = datasource.DatasourceRequestRefresh(self.app, self.namespace)
         parsed_args = self.check_parser(cmd, arglist, verifylist)
-        with mock.patch.object(utils, "get_resource_id_from_name",
+        with mock.patch.object(utils.NameResolver, "resolve",
                                return_value="id"):
             result = cmd.take_action(parsed_args)
         mocker.assert_called_with("id", {})
         self.assertIsNone(result)
+
+    def test_datasource_request_refresh_wait_many(self):
+        client = self.app.client_manager.congressclient
+        client.refresh_datasources = mock.Mock(return_value=iter([
+            {'index': 1, 'datasource': 'id2', 'result': {}, 'error': None,
+             'elapsed': 2.0},
+            {'index': 0, 'datasource': 'id1', 'result': None,
+             'error': exceptions.WaitTimeout('too slow'), 'elapsed': 5.0}]))
+        self.app.stdout = six.StringIO()
+        self.app.stderr = six.StringIO()
+        cmd = datasource.DatasourceRequestRefresh(self.app, self.namespace)
+        arglist = ['nova', 'neutron', '--wait', '--timeout', '5']
+        parsed_args = self.check_parser(
+            cmd, arglist, [('datasource', ['nova', 'neutron']),
+                           ('wait', True), ('timeout', 5)])
+        with mock.patch.object(utils.NameResolver, "resolve_many",
+                               return_value=["id1", "id2"]):
+            result = cmd.take_action(parsed_args)
+
+        self.assertEqual(1, result)
+        client.refresh_datasources.assert_called_with(
+            ['id1', 'id2'], wait=True, timeout=5, max_workers=8)
+        self.assertEqual('neutron refreshed in 2.0s\n',
+                         self.app.stdout.getvalue())
+        self.assertEqual('Failed to refresh nova: too slow\n',
+                         self.app.stderr.getvalue())
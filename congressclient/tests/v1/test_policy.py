@@ -12,11 +12,17 @@
 #
 import os
 
+import fixtures
+from keystoneauth1 import exceptions as ks_exceptions
+from keystoneauth1 import session
 import mock
+from oslo_serialization import jsonutils
 
 from congressclient.common import utils
+from congressclient import exceptions
 from congressclient.osc.v1 import policy
 from congressclient.tests import common
+from congressclient.v1 import client
 
 
 class TestCreatePolicy(common.TestCongressBase):
@@ -85,6 +91,129 @@ class TestCreatePolicyFromFile(common.TestCongressBase):
         self.assertEqual(filtered, result)
 
 
+class TestImportPolicies(common.TestCongressBase):
+
+    def test_import_policies(self):
+        root = self.useFixture(fixtures.TempDir()).path
+        path = os.path.join(root, 'policies.yaml')
+        with open(path, 'w') as f:
+            f.write('name: p1\n---\nname: p2\n')
+        outcomes = [
+            {'index': 1, 'policy': {'name': 'p2'}, 'result': None,
+             'error': Exception('Conflict'), 'elapsed': 0.2},
+            {'index': 0, 'policy': {'name': 'p1'}, 'result': {'id': 'id1'},
+             'error': None, 'elapsed': 0.1}]
+        creator = mock.Mock(return_value=iter(outcomes))
+        self.app.client_manager.congressclient.create_policies = creator
+        cmd = policy.ImportPolicies(self.app, self.namespace)
+        parsed_args = self.check_parser(cmd, [root, '--max-workers', '2'],
+                                        [('paths', [root]),
+                                         ('max_workers', 2)])
+
+        columns, data = cmd.take_action(parsed_args)
+
+        creator.assert_called_once_with([{'name': 'p1'}, {'name': 'p2'}],
+                                        max_workers=2)
+        self.assertEqual(['file', 'name', 'id', 'status', 'elapsed'],
+                         columns)
+        self.assertEqual([(path, 'p1', 'id1', 'created', '0.100'),
+                          (path, 'p2', None, 'error: Conflict', '0.200')],
+                         data)
+        self.assertIn('Imported 1 of 2 policies',
+                      self.app.stderr.write.call_args[0][0])
+
+        creator.return_value = iter(outcomes)
+        self.assertEqual(1, cmd.run(parsed_args))
+
+    def test_import_policies_validates_first(self):
+        root = self.useFixture(fixtures.TempDir()).path
+        with open(os.path.join(root, 'bad.yaml'), 'w') as f:
+            f.write('name: p1\n---\ndescription: no name\n')
+        creator = mock.Mock()
+        self.app.client_manager.congressclient.create_policies = creator
+        cmd = policy.ImportPolicies(self.app, self.namespace)
+        parsed_args = self.check_parser(cmd, [root], [])
+        self.assertRaises(exceptions.ValidationError, cmd.take_action,
+                          parsed_args)
+        self.assertFalse(creator.called)
+
+
+class TestSyncPolicy(common.TestCongressBase):
+
+    def setUp(self):
+        super(TestSyncPolicy, self).setUp()
+        root = self.useFixture(fixtures.TempDir()).path
+        self.path = os.path.join(root, 'policy.yaml')
+        with open(self.path, 'w') as f:
+            f.write('name: p1\n'
+                    'rules:\n'
+                    '- rule: p(x) :- q(x)\n'
+                    '- name: r2\n'
+                    '  rule: r(x) :- s(x)\n')
+        self.client = self.app.client_manager.congressclient
+        self.client.list_policy_rules.return_value = {'results': [
+            {'id': 'id1', 'name': '', 'rule': 'p(x) :-  q(x)'},
+            {'id': 'id2', 'name': 'r2', 'rule': 'r(x) :- t(x)'}]}
+
+    def _parse(self, *extra):
+        cmd = policy.SyncPolicy(self.app, self.namespace)
+        parsed_args = self.check_parser(cmd, [self.path] + list(extra),
+                                        [('policy_file_path', self.path)])
+        return cmd, parsed_args
+
+    def _run(self, *extra):
+        cmd, parsed_args = self._parse(*extra)
+        return cmd.take_action(parsed_args)
+
+    def test_sync_policy(self):
+        self.client.delete_policy_rules.return_value = iter([
+            {'index': 0, 'rule': 'id2', 'result': None, 'error': None,
+             'elapsed': 0.1}])
+        self.client.create_policy_rules.return_value = iter([
+            {'index': 0, 'rule': {}, 'result': {'id': 'id3'}, 'error': None,
+             'elapsed': 0.1}])
+
+        columns, data = self._run('--max-workers', '3')
+
+        self.client.delete_policy_rules.assert_called_once_with(
+            'p1', ['id2'], max_workers=3)
+        self.client.create_policy_rules.assert_called_once_with(
+            'p1', [{'name': 'r2', 'rule': 'r(x) :- s(x)'}], max_workers=3)
+        self.assertEqual(['action', 'id', 'name', 'rule', 'status'], columns)
+        self.assertEqual(
+            [('delete', 'id2', 'r2', 'r(x) :- t(x)', 'deleted'),
+             ('create', 'id3', 'r2', 'r(x) :- s(x)', 'created')], data)
+        self.assertIn('1 rules deleted, 1 created, 1 unchanged',
+                      self.app.stderr.write.call_args[0][0])
+
+    def test_sync_policy_failure_status(self):
+        self.client.delete_policy_rules.return_value = iter([
+            {'index': 0, 'rule': 'id2', 'result': None, 'error': None,
+             'elapsed': 0.1}])
+        self.client.create_policy_rules.return_value = iter([
+            {'index': 0, 'rule': {}, 'result': None,
+             'error': Exception('Conflict'), 'elapsed': 0.1}])
+        cmd, parsed_args = self._parse()
+        self.assertEqual(1, cmd.run(parsed_args))
+
+    def test_sync_policy_dry_run(self):
+        columns, data = self._run('--dry-run')
+        self.assertFalse(self.client.delete_policy_rules.called)
+        self.assertFalse(self.client.create_policy_rules.called)
+        self.assertEqual(
+            [('delete', 'id2', 'r2', 'r(x) :- t(x)', 'pending'),
+             ('create', None, 'r2', 'r(x) :- s(x)', 'pending')], data)
+
+    def test_sync_policy_creates_missing_policy(self):
+        self.client.list_policy_rules.side_effect = (
+            ks_exceptions.NotFound())
+        columns, data = self._run()
+        self.client.create_policy.assert_called_once_with(
+            {'name': 'p1', 'rules': [{'rule': 'p(x) :- q(x)'},
+                                     {'name': 'r2', 'rule': 'r(x) :- s(x)'}]})
+        self.assertEqual(['created', 'created'], [row[4] for row in data])
+
+
 class TestShowPolicy(common.TestCongressBase):
     def test_show_policy(self):
         policy_id = "14f2897a-155a-4c9d-b3de-ef85c0a171d8"
@@ -105,7 +234,7 @@ class TestShowPolicy(common.TestCongressBase):
         self.app.client_manager.congressclient.list_policy = mock.Mock()
         cmd = policy.ShowPolicy(self.app, self.namespace)
         parsed_args = self.check_parser(cmd, arglist, verifylist)
-        with mock.patch.object(utils, "get_resource_id_from_name",
+        with mock.patch.object(utils.NameResolver, "resolve",
                                return_value="name"):
             result = list(cmd.take_action(parsed_args))
         filtered = [('abbreviation', 'description', 'id', 'kind', 'name',
@@ -188,6 +317,48 @@ class TestCreatePolicyRule(common.TestCongressBase):
                      rule)]
         self.assertEqual(filtered, result)
 
+    def test_create_policy_rules_from_file(self):
+        root = self.useFixture(fixtures.TempDir()).path
+        path = os.path.join(root, 'rules.yaml')
+        with open(path, 'w') as f:
+            f.write('- rule: p(x) :- q(x)\n'
+                    '  name: r1\n'
+                    '  comment: first\n'
+                    '---\n'
+                    'rule: p(x) :- r(x)\n')
+        client = self.app.client_manager.congressclient
+        client.create_policy_rules.return_value = iter([
+            {'index': 1, 'rule': {}, 'result': None,
+             'error': Exception('Conflict'), 'elapsed': 0.1},
+            {'index': 0, 'rule': {}, 'result': {'id': 'id1'},
+             'error': None, 'elapsed': 0.1}])
+        cmd = policy.CreatePolicyRule(self.app, self.namespace)
+        parsed_args = self.check_parser(
+            cmd, ['classification', '--from-file', path], [('rule', None)])
+
+        columns, values = cmd.take_action(parsed_args)
+
+        client.create_policy_rules.assert_called_once_with(
+            'classification',
+            [{'rule': 'p(x) :- q(x)', 'name': 'r1', 'comment': 'first'},
+             {'rule': 'p(x) :- r(x)'}], max_workers=8)
+        result = dict(zip(columns, values))
+        self.assertEqual(1, result['created'])
+        self.assertEqual(1, result['failed'])
+        self.assertEqual('id1', result['ids'])
+        self.assertEqual('rule 2: Conflict', result['errors'])
+
+        client.create_policy_rules.return_value = iter([
+            {'index': 0, 'rule': {}, 'result': None,
+             'error': Exception('Conflict'), 'elapsed': 0.1}])
+        self.assertEqual(1, cmd.run(parsed_args))
+
+        client.create_policy_rules.return_value = iter([
+            {'index': 0, 'rule': {}, 'result': {'id': 'id1'},
+             'error': None, 'elapsed': 0.1}])
+        cmd = policy.CreatePolicyRule(self.app, self.namespace)
+        self.assertEqual(0, cmd.run(parsed_args))
+
 
 class TestDeletePolicyRule(common.TestCongressBase):
     def test_delete_policy_rule(self):
@@ -198,7 +369,7 @@ class TestDeletePolicyRule(common.TestCongressBase):
         ]
         verifylist = [
             ('policy_name', policy_name),
-            ('rule_id', rule_id)
+            ('rule_id', [rule_id])
         ]
         mocker = mock.Mock(return_value=None)
         self.app.client_manager.congressclient.delete_policy_rule = mocker
@@ -206,13 +377,49 @@ class TestDeletePolicyRule(common.TestCongressBase):
         cmd = policy.DeletePolicyRule(self.app, self.namespace)
 
         parsed_args = self.check_parser(cmd, arglist, verifylist)
-        with mock.patch.object(utils, "get_resource_id_from_name",
-                               return_value=rule_id):
+        with mock.patch.object(utils.NameResolver, "resolve_many",
+                               return_value=[rule_id]):
             result = cmd.take_action(parsed_args)
 
         mocker.assert_called_with(policy_name, rule_id)
         self.assertIsNone(result)
 
+    def test_delete_policy_rules(self):
+        client = self.app.client_manager.congressclient
+        client.list_policy_rules.return_value = {'results': [
+            {'id': 'id1', 'name': 'r1'}, {'id': 'id2', 'name': 'r2'},
+            {'id': 'id3', 'name': 'r3'}]}
+        client.delete_policy_rules.return_value = iter([
+            {'index': 1, 'rule': 'id2', 'result': None, 'error': None,
+             'elapsed': 0.1},
+            {'index': 0, 'rule': 'id1', 'result': None,
+             'error': Exception('boom'), 'elapsed': 0.1}])
+        cmd = policy.DeletePolicyRule(self.app, self.namespace)
+        parsed_args = self.check_parser(
+            cmd, ['classification', 'r1', 'id2', '--max-workers', '4'],
+            [('rule_id', ['r1', 'id2']), ('max_workers', 4)])
+
+        result = cmd.take_action(parsed_args)
+
+        self.assertEqual(1, result)
+        client.list_policy_rules.assert_called_once_with('classification')
+        client.delete_policy_rules.assert_called_once_with(
+            'classification', ['id1', 'id2'], max_workers=4)
+        self.app.stderr.write.assert_called_once_with(
+            'Failed to delete rule r1: boom\n')
+
+    def test_delete_policy_rules_unknown_names(self):
+        client = self.app.client_manager.congressclient
+        client.list_policy_rules.return_value = {'results': [
+            {'id': 'id1', 'name': 'r1'}]}
+        cmd = policy.DeletePolicyRule(self.app, self.namespace)
+        parsed_args = self.check_parser(
+            cmd, ['classification', 'r1', 'r2', 'r3'], [])
+        e = self.assertRaises(exceptions.NotFound, cmd.take_action,
+                              parsed_args)
+        self.assertIn('r2, r3', str(e))
+        self.assertFalse(client.delete_policy_rules.called)
+
 
 class TestListPolicyRules(common.TestCongressBase):
     def test_list_policy_rules(self):
@@ -239,6 +446,28 @@ class TestListPolicyRules(common.TestCongressBase):
 
         lister.assert_called_with(policy_name)
 
+    def test_list_policy_rules_paged(self):
+        policy_name = 'classification'
+        arglist = [
+            policy_name, '--limit', '10', '--marker', 'r1',
+            '--filter', 'name=r2'
+        ]
+        verifylist = [
+            ('policy_name', policy_name),
+            ('limit', 10),
+            ('marker', 'r1'),
+            ('filters', {'name': 'r2'}),
+        ]
+        lister = mock.Mock(return_value={"results": []})
+        self.app.client_manager.congressclient.list_policy_rules = lister
+        cmd = policy.ListPolicyRules(self.app, self.namespace)
+
+        parsed_args = self.check_parser(cmd, arglist, verifylist)
+        cmd.take_action(parsed_args)
+
+        lister.assert_called_with(policy_name, limit=10, marker='r1',
+                                  filters={'name': 'r2'})
+
 
 class TestListPolicy(common.TestCongressBase):
     def test_list_policy_rules(self):
@@ -293,6 +522,11 @@ class TestListPolicyTables(common.TestCongressBase):
 
 class TestListPolicyRows(common.TestCongressBase):
 
+    def setUp(self):
+        super(TestListPolicyRows, self).setUp()
+        client = self.app.client_manager.congressclient
+        client.policy_table_columns = mock.Mock(return_value=[])
+
     def test_list_policy_rules(self):
         policy_name = 'classification'
         table_name = 'port_security_group'
@@ -307,14 +541,42 @@ class TestListPolicyRows(common.TestCongressBase):
                     [{"data": ["69abc88b-c950-4625-801b-542e84381509",
                                "default"]}]}
 
-        lister = mock.Mock(return_value=response)
-        self.app.client_manager.congressclient.list_policy_rows = lister
+        lister = mock.Mock(return_value=iter(response['results']))
+        self.app.client_manager.congressclient.iter_policy_rows = lister
         cmd = policy.ListPolicyRows(self.app, self.namespace)
 
         parsed_args = self.check_parser(cmd, arglist, verifylist)
+        result = cmd.take_action(parsed_args)
+
+        lister.assert_called_with(policy_name, table_name)
+        self.assertEqual(['Col0', 'Col1'], result[0])
+        self.assertEqual([response['results'][0]['data']], list(result[1]))
+
+    def test_list_policy_rows_filtered(self):
+        arglist = ['classification', 'p', '--filter', '1=default']
+        lister = mock.Mock(return_value=iter([]))
+        self.app.client_manager.congressclient.iter_policy_rows = lister
+        cmd = policy.ListPolicyRows(self.app, self.namespace)
+
+        parsed_args = self.check_parser(cmd, arglist, [])
         cmd.take_action(parsed_args)
 
-        lister.assert_called_with(policy_name, table_name, False)
+        lister.assert_called_with('classification', 'p',
+                                  filters={'1': 'default'})
+
+    def test_list_policy_rows_paged(self):
+        arglist = ['classification', 'p', '--limit', '1', '--offset', '2']
+        response = {"results": [{"data": ["x", "default"]}]}
+        lister = mock.Mock(return_value=response)
+        self.app.client_manager.congressclient.list_policy_rows = lister
+        cmd = policy.ListPolicyRows(self.app, self.namespace)
+
+        parsed_args = self.check_parser(cmd, arglist, [])
+        result = cmd.take_action(parsed_args)
+
+        lister.assert_called_with('classification', 'p', False, limit=1,
+                                  offset=2)
+        self.assertEqual([["x", "default"]], list(result[1]))
 
     def test_list_policy_rules_trace(self):
         policy_name = 'classification'
@@ -342,6 +604,98 @@ class TestListPolicyRows(common.TestCongressBase):
 
         lister.assert_called_with(policy_name, table_name, True)
 
+    def _list(self, arglist, columns):
+        client = self.app.client_manager.congressclient
+        client.iter_policy_rows = mock.Mock(
+            return_value=iter([{'data': ['a', 'b', 'c']}]))
+        client.policy_table_columns.side_effect = columns
+        cmd = policy.ListPolicyRows(self.app, self.namespace)
+        parsed_args = self.check_parser(cmd, ['classification', 'p'] +
+                                        arglist, [])
+        columns, rows = cmd.take_action(parsed_args)
+        return columns, list(rows)
+
+    def test_list_policy_rows_named_columns(self):
+        columns, rows = self._list([], [['id', 'name', 'status']])
+
+        self.assertEqual(['id', 'name', 'status'], columns)
+        self.assertEqual([['a', 'b', 'c']], rows)
+        client = self.app.client_manager.congressclient
+        client.policy_table_columns.assert_called_once_with(
+            'classification', 'p', refresh=False)
+
+    def test_list_policy_rows_outdated_columns(self):
+        columns, rows = self._list([], [['id', 'name'],
+                                        ['id', 'name', 'status']])
+
+        self.assertEqual(['id', 'name', 'status'], columns)
+        client = self.app.client_manager.congressclient
+        client.policy_table_columns.assert_called_with(
+            'classification', 'p', refresh=True)
+
+    def test_list_policy_rows_projection(self):
+        columns, rows = self._list(['-c', 'status', '-c', 'id'],
+                                   [['id', 'name', 'status']])
+
+        self.assertEqual(['status', 'id'], columns)
+        self.assertEqual([['c', 'a']], rows)
+
+    def test_list_policy_rows_projection_by_position(self):
+        columns, rows = self._list(['-c', 'Col1'], [['id', 'name', 'status']])
+
+        self.assertEqual(['Col1'], columns)
+        self.assertEqual([['b']], rows)
+
+    def test_list_policy_rows_watch(self):
+        client = self.app.client_manager.congressclient
+        client.iter_policy_rows = mock.Mock(side_effect=[
+            iter([]), iter([{'data': ['a']}])])
+        client.policy_table_columns.return_value = ['vm']
+        cmd = policy.ListPolicyRows(self.app, self.namespace)
+        arglist = ['classification', 'error', '--watch', '0.001',
+                   '--watch-count', '2']
+        parsed_args = self.check_parser(cmd, arglist, [])
+
+        columns, rows = cmd.take_action(parsed_args)
+
+        self.assertEqual(['time', 'change', 'vm'], columns)
+        self.assertEqual([['+', 'a']], [row[1:] for row in rows])
+
+    def test_list_policy_rows_watch_facts_appearing(self):
+        client = self.app.client_manager.congressclient
+        client.iter_policy_rows = mock.Mock(side_effect=[
+            iter([]), iter([{'data': ['a', 'b']}])])
+        client.policy_table_columns.side_effect = (
+            ks_exceptions.Forbidden())
+        cmd = policy.ListPolicyRows(self.app, self.namespace)
+        arglist = ['classification', 'q', '--watch', '0.001',
+                   '--watch-count', '2']
+        parsed_args = self.check_parser(cmd, arglist, [])
+
+        columns, rows = cmd.take_action(parsed_args)
+
+        self.assertEqual(['time', 'change', 'Col0', 'Col1'], columns)
+        self.assertEqual([['+', 'a', 'b']], [row[1:] for row in rows])
+
+    def test_list_policy_rows_watch_empty(self):
+        client = self.app.client_manager.congressclient
+        client.iter_policy_rows = mock.Mock(return_value=iter([]))
+        cmd = policy.ListPolicyRows(self.app, self.namespace)
+        parsed_args = self.check_parser(
+            cmd, ['classification', 'q', '--watch', '0.001', '--watch-count',
+                  '1'], [])
+
+        columns, rows = cmd.take_action(parsed_args)
+
+        self.assertEqual(['time', 'change'], columns)
+        self.assertEqual([], list(rows))
+
+    def test_list_policy_rows_watch_trace(self):
+        cmd = policy.ListPolicyRows(self.app, self.namespace)
+        parsed_args = self.check_parser(
+            cmd, ['classification', 'error', '--watch', '5', '--trace'], [])
+        self.assertRaises(Exception, cmd.take_action, parsed_args)
+
 
 class TestSimulatePolicy(common.TestCongressBase):
 
@@ -444,6 +798,93 @@ class TestSimulatePolicy(common.TestCongressBase):
                                   delta=False,
                                   body=body)
 
+    def _write_cases(self, name, content):
+        path = os.path.join(self.useFixture(fixtures.TempDir()).path, name)
+        with open(path, 'w') as f:
+            f.write(content)
+        return path
+
+    def _run_batch(self, path, *extra):
+        arglist = ['classification', '--batch', path] + list(extra)
+        cmd = policy.SimulatePolicy(self.app, self.namespace)
+        parsed_args = self.check_parser(cmd, arglist,
+                                        [('batch', path), ('query', None)])
+        status = cmd.take_action(parsed_args)
+        lines = [jsonutils.loads(call[0][0])
+                 for call in self.app.stdout.write.call_args_list]
+        return status, sorted(lines, key=lambda line: line['index'])
+
+    def test_simulate_policy_batch_jsonl(self):
+        path = self._write_cases(
+            'cases.jsonl',
+            '{"query": "p(x)", "sequence": "q+(1)"}\n\n'
+            '{"query": "r(x)", "sequence": "q+(2)", "action_policy": "a"}\n')
+        outcomes = [
+            {'index': 1, 'case': {'query': 'r(x)'}, 'error': None,
+             'result': {'result': ['r(2)'], 'trace': 'T'}, 'elapsed': 0.2},
+            {'index': 0, 'case': {'query': 'p(x)'}, 'error': None,
+             'result': {'result': ['p(1)']}, 'elapsed': 0.1}]
+        simulate = mock.Mock(return_value=iter(outcomes))
+        self.app.client_manager.congressclient.simulate_many = simulate
+
+        status, lines = self._run_batch(path, '--trace', '--max-workers', '4')
+
+        self.assertEqual(0, status)
+        self.assertEqual(
+            [{'index': 0, 'query': 'p(x)', 'result': ['p(1)'],
+              'elapsed': 0.1},
+             {'index': 1, 'query': 'r(x)', 'result': ['r(2)'], 'trace': 'T',
+              'elapsed': 0.2}], lines)
+        args, kwargs = simulate.call_args
+        self.assertEqual('classification', args[0])
+        self.assertEqual({'trace': True, 'delta': False, 'max_workers': 4},
+                         kwargs)
+
+    def test_simulate_policy_batch_invalid_case(self):
+        path = self._write_cases(
+            'cases.jsonl', '["bad"]\n{"query": "p(x)", "sequence": "q+(1)"}\n')
+        congress = client.Client(session=session.Session(),
+                                 service_type='policy')
+        congress.execute_policy_action = mock.Mock(
+            return_value={'result': ['p(1)']})
+        self.app.client_manager.congressclient.simulate_many = (
+            congress.simulate_many)
+
+        status, lines = self._run_batch(path)
+
+        self.assertEqual(1, status)
+        self.assertEqual(2, len(lines))
+        self.assertIsNone(lines[0]['query'])
+        self.assertIn('must be an object', lines[0]['error'])
+        self.assertEqual(['p(1)'], lines[1]['result'])
+
+    def test_simulate_policy_batch_yaml(self):
+        path = self._write_cases(
+            'cases.yaml',
+            '- query: p(x)\n  sequence: q+(1)\n'
+            '- query: r(x)\n  sequence: q+(2)\n'
+            '---\nquery: s(x)\nsequence: q+(3)\n')
+        cases = []
+
+        def simulate(policy_name, batch, **kwargs):
+            for index, case in enumerate(batch):
+                cases.append(case)
+                yield {'index': index, 'case': case, 'elapsed': 0.1,
+                       'result': None, 'error': Exception('failed')}
+        self.app.client_manager.congressclient.simulate_many = simulate
+
+        status, lines = self._run_batch(path)
+
+        self.assertEqual(1, status)
+        self.assertEqual(['p(x)', 'r(x)', 's(x)'],
+                         [case['query'] for case in cases])
+        self.assertEqual(['failed'] * 3, [line['error'] for line in lines])
+
+    def test_simulate_policy_requires_query_without_batch(self):
+        cmd = policy.SimulatePolicy(self.app, self.namespace)
+        parsed_args = self.check_parser(cmd, ['classification'], [])
+        self.assertRaises(Exception, cmd.take_action, parsed_args)
+
 
 class TestGet(common.TestCongressBase):
 
@@ -466,7 +907,7 @@ class TestGet(common.TestCongressBase):
         self.app.client_manager.congressclient.list_policy_rules = mock.Mock()
         cmd = policy.ShowPolicyRule(self.app, self.namespace)
         parsed_args = self.check_parser(cmd, arglist, verifylist)
-        with mock.patch.object(utils, "get_resource_id_from_name",
+        with mock.patch.object(utils.NameResolver, "resolve",
                                return_value="id"):
             result = list(cmd.take_action(parsed_args))
         filtered = [('comment', 'id', 'rule'),
@@ -0,0 +1,122 @@
+#   Licensed under the Apache License, Version 2.0 (the "License"); you may
+#   not use this file except in compliance with the License. You may obtain
+#   a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#   WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#   License for the specific language governing permissions and limitations
+#   under the License.
+
+import asyncio
+from concurrent import futures
+import functools
+import inspect
+
+from congressclient.v1 import client
+
+DEFAULT_MAX_WORKERS = 16
+
+
+class AsyncClient(object):
+    """Asyncio client for the Congress v1 API.
+
+    Every public method of :class:`congressclient.v1.client.Client` is
+    available as a coroutine with the same arguments, except the methods
+    returning an iterator, such as iter_policy_rows or simulate_many,
+    which are asynchronous generators: each item is pulled from the
+    blocking iterator in a worker thread.  Requests go through
+    a wrapped :class:`~congressclient.v1.client.Client`, so the URL
+    templates, keystone session and authentication are shared with the
+    blocking client.  At most ``max_workers`` requests are in flight at a
+    time; further calls wait for a free slot.
+
+    Example
+    ::
+
+        congress = async_client.AsyncClient(session=sess,
+                                            service_type='policy',
+                                            max_workers=32)
+        async with congress:
+            rows = await asyncio.gather(*[
+                congress.list_policy_rows('classification', table)
+                for table in tables])
+            async for rule in congress.iter_policy_rules('classification'):
+                print(rule['rule'])
+
+    """
+
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS, **kwargs):
+        super(AsyncClient, self).__init__()
+
+        # one keep-alive connection per worker thread
+        kwargs.setdefault('pool_maxsize', max_workers)
+        self.client = client.Client(**kwargs)
+        self._executor = futures.ThreadPoolExecutor(max_workers=max_workers)
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    async def _call(self, name, *args, **kwargs):
+        return await self._run(functools.partial(getattr(self.client, name),
+                                                 *args, **kwargs))
+
+    async def _iterate(self, name, *args, **kwargs):
+        iterator = iter(await self._call(name, *args, **kwargs))
+        done = object()
+        try:
+            while True:
+                item = await self._run(next, iterator, done)
+                if item is done:
+                    return
+                yield item
+        finally:
+            close = getattr(iterator, 'close', None)
+            if close is not None:
+                await self._run(close)
+
+    def close(self):
+        """Wait for pending requests and release the worker threads."""
+        self._executor.shutdown(wait=True)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        # pending requests are waited for without blocking the event loop
+        await asyncio.get_event_loop().run_in_executor(None, self.close)
+
+
+# methods returning an iterator without being generator functions
+_ITERATOR_METHODS = ('iter_datasource_rows', 'iter_policy_rows')
+
+
+def _make_coroutine(name, func):
+    async def method(self, *args, **kwargs):
+        return await self._call(name, *args, **kwargs)
+    method.__name__ = name
+    method.__qualname__ = 'AsyncClient.%s' % name
+    method.__doc__ = func.__doc__
+    return method
+
+
+def _make_async_generator(name, func):
+    async def method(self, *args, **kwargs):
+        async for item in self._iterate(name, *args, **kwargs):
+            yield item
+    method.__name__ = name
+    method.__qualname__ = 'AsyncClient.%s' % name
+    method.__doc__ = func.__doc__
+    return method
+
+
+for _name, _func in inspect.getmembers(client.Client, inspect.isfunction):
+    if _name.startswith('_'):
+        continue
+    if inspect.isgeneratorfunction(_func) or _name in _ITERATOR_METHODS:
+        setattr(AsyncClient, _name, _make_async_generator(_name, _func))
+    else:
+        setattr(AsyncClient, _name, _make_coroutine(_name, _func))
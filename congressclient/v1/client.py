@@ -12,7 +12,215 @@
 #   License for the specific language governing permissions and limitations
 #   under the License.
 
-from keystoneauth1 import adapter
+from concurrent import futures
+import json
+import re
+import time
+from urllib import parse
+
+from keystoneauth1 import exceptions as ks_exceptions
+
+from congressclient.common import cache
+from congressclient.common import columnar
+from congressclient.common import connection
+from congressclient.common import instrumentation
+from congressclient.common import jsonstream
+from congressclient.common import retry
+from congressclient.common import schema_cache as schemas
+from congressclient.common import utils
+from congressclient import exceptions
+
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_REFRESH_TIMEOUT = 300
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def _listing_url(url, limit=None, offset=None, marker=None, filters=None):
+    params = [(name, value) for name, value in
+              (('limit', limit), ('offset', offset), ('marker', marker))
+              if value is not None]
+    params.extend(sorted((filters or {}).items()))
+    if not params:
+        return url
+    return url + ('&' if '?' in url else '?') + parse.urlencode(params)
+
+
+def _next_link(body):
+    for link in body.get('links') or ():
+        if link.get('rel') == 'next':
+            return link['href']
+    return None
+
+
+def _row_matcher(filters, get_columns=None):
+    """Return a predicate applying column equality filters to a row.
+
+    Filter keys are column positions or, when get_columns is given, column
+    names.  Values are compared as strings since they usually come from
+    the command line.
+    """
+    if not filters:
+        return None
+    columns = None
+    positions = []
+    for column, value in filters.items():
+        if isinstance(column, int) or str(column).isdigit():
+            position = int(column)
+        else:
+            if columns is None:
+                if get_columns is None:
+                    raise exceptions.ValidationError(
+                        "Column %s must be given by position" % column)
+                columns = get_columns()
+            try:
+                position = columns.index(column)
+            except ValueError:
+                raise exceptions.ValidationError(
+                    "Unknown column %s" % column)
+        positions.append((position, str(value)))
+
+    def matches(row):
+        data = row['data']
+        try:
+            return all(str(data[position]) == value
+                       for position, value in positions)
+        except IndexError:
+            return False
+    return matches
+
+
+def _field_matcher(filters):
+    if not filters:
+        return None
+
+    def matches(item):
+        return all(str(item.get(field)) == str(value)
+                   for field, value in filters.items())
+    return matches
+
+
+def _page_locally(body, matches, limit=None, offset=None, marker=None,
+                  marker_key=None):
+    """Filter and slice a listing the server may not have paged.
+
+    Filtering and limiting a listing the server already filtered and
+    limited changes nothing, and a marker the server honoured is not
+    found among the results, so they are always applied.  The offset must
+    only be given when the server was not sent it.
+    """
+    if matches is None and limit is None and not offset and marker is None:
+        return body
+    results = body['results']
+    if matches is not None:
+        results = [item for item in results if matches(item)]
+    if marker is not None and marker_key is not None:
+        for index, item in enumerate(results):
+            if item.get(marker_key) == marker:
+                results = results[index + 1:]
+                break
+    start = offset or 0
+    end = None if limit is None else start + limit
+    body['results'] = results[start:end]
+    return body
+
+
+def _metered(chunks, record, read_time):
+    """Count the bytes of streamed chunks and the time spent reading them."""
+    chunks = iter(chunks)
+    while True:
+        start = time.perf_counter()
+        try:
+            chunk = next(chunks)
+        except StopIteration:
+            return
+        finally:
+            read_time[0] += time.perf_counter() - start
+        record.bytes += len(chunk)
+        yield chunk
+
+
+_RULE_HEAD = re.compile(r'^\s*([\w.:-]+)\s*\((.*)\)\s*$', re.DOTALL)
+_HEAD_ARGUMENT = re.compile(
+    r"""\s*("(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*'|[^,]*)""")
+_VARIABLE = re.compile(r'^[A-Za-z_]\w*$')
+
+
+def _rule_head_columns(rule):
+    """Return the table and column names defined by the head of a rule.
+
+    Columns are named after the variables of the head, e.g. ``error(id,
+    name) :- ...`` defines the columns id and name of error; arguments
+    that are not variables give None.  Returns None for rules without a
+    plain head, such as execute[] actions.
+    """
+    match = _RULE_HEAD.match(rule.split(':-', 1)[0])
+    if match is None:
+        return None
+    table, arguments = match.groups()
+    columns = []
+    position = 0
+    while True:
+        argument = _HEAD_ARGUMENT.match(arguments, position)
+        value = argument.group(1).strip()
+        columns.append(value if _VARIABLE.match(value) else None)
+        position = argument.end()
+        if position >= len(arguments) or arguments[position] != ',':
+            break
+        position += 1
+    if columns == [None] and not arguments.strip():
+        columns = []
+    return table, columns
+
+
+def _merge_columns(heads):
+    """Name each column after the first variable found at its position."""
+    width = max(len(columns) for columns in heads)
+    names = []
+    for index in range(width):
+        name = next((columns[index] for columns in heads
+                     if len(columns) == width and columns[index]), None)
+        if name is None or name in names:
+            name = 'Col%d' % index
+        names.append(name)
+    return names
+
+
+def _refresh_marker(status):
+    """Return what changes in a datasource status when it polls."""
+    return tuple(status.get(field) for field in
+                 ('number_of_updates', 'last_updated', 'last_error'))
+
+
+def _run_concurrently(func, items, max_workers):
+    """Call func on every item with at most max_workers calls in flight.
+
+    Items are consumed lazily.  Yields (index, item, result, error,
+    elapsed) tuples in completion order; exceptions raised by func are
+    returned as error instead of being raised.
+    """
+    def call(item):
+        start = time.monotonic()
+        try:
+            result, error = func(item), None
+        except Exception as e:
+            result, error = None, e
+        return result, error, time.monotonic() - start
+
+    items = enumerate(items)
+    with futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = {}
+        while True:
+            for index, item in items:
+                pending[executor.submit(call, item)] = (index, item)
+                if len(pending) >= max_workers:
+                    break
+            if not pending:
+                return
+            done, _ = futures.wait(pending,
+                                   return_when=futures.FIRST_COMPLETED)
+            for future in done:
+                index, item = pending.pop(future)
+                yield (index, item) + future.result()
 
 
 class Client(object):
@@ -34,6 +242,66 @@ class Client(object):
                                  region_name='RegionOne')
         congress.create_policy_rule(..)
 
+    A single instance may be shared between threads.  To avoid paying
+    for TCP/TLS handshakes on every call, size the HTTP connection pool
+    to the number of worker threads::
+
+        congress = client.Client(session=sess, service_type='policy',
+                                 pool_maxsize=32, pool_block=True,
+                                 pool_idle_timeout=60)
+        congress.pool_stats()
+
+    The pool options are:
+
+    * ``pool_connections`` - number of per-host pools to keep
+    * ``pool_maxsize`` - maximum number of keep-alive connections per host
+    * ``pool_block`` - wait for a free connection instead of opening an
+      extra, non-reusable one when all connections are busy
+    * ``pool_idle_timeout`` - seconds after which idle connections are
+      dropped rather than reused
+
+    When none of them is given the transport of the session is left
+    untouched.  Otherwise the pool is mounted on the session for the
+    policy endpoint only, before the first request, so the requests of
+    the other clients sharing the session keep their own transport.
+
+    Responses of the rarely changing schema, driver, version and listing
+    endpoints can be cached by passing ``response_cache=True`` or a
+    :class:`congressclient.common.cache.ResponseCache` with custom
+    per-endpoint TTLs and memory bound.  Stale entries are revalidated
+    with ``If-None-Match`` when the server sent an ``ETag``, and entries
+    are invalidated by the matching ``create_*``/``delete_*`` calls.
+
+    The column names of datasource tables, needed to label rows, can be
+    kept across processes by passing ``schema_cache=True`` or a
+    :class:`congressclient.common.schema_cache.SchemaCache`; see
+    :meth:`cached_table_columns`.
+
+    Requests failing with a transient error, such as a 503 or a reset
+    connection, are retried with jittered exponential backoff when the
+    client is created with ``retry_policy=True`` or a
+    :class:`congressclient.common.retry.RetryPolicy`, whose circuit
+    breaker fails requests fast while the API is down::
+
+        policy = retry.RetryPolicy(
+            retries=5, statuses={exceptions.ServiceUnavailable: 5,
+                                 exceptions.InternalServerError: 1},
+            circuit_breaker=retry.CircuitBreaker())
+        congress = client.Client(session=sess, service_type='policy',
+                                 retry_policy=policy)
+
+    Only GET, HEAD, OPTIONS and PUT requests are retried, unless they
+    failed to connect.
+
+    Every request is reported to the hooks registered on
+    ``congress.instrumentation`` (see
+    :mod:`congressclient.common.instrumentation`), e.g. to collect
+    latency histograms per URL template::
+
+        collector = instrumentation.HistogramCollector()
+        congress.instrumentation.add_post_hook(collector)
+        ...
+        print(instrumentation.prometheus_text(collector))
     """
     policy_path = '/v1/policies/%s'
     policy_rules = '/v1/policies/%s/rules'
@@ -59,21 +327,240 @@ class Client(object):
     driver_path = '/v1/system/drivers/%s'
     policy_api_versions = '/'
 
+    # Client keyword argument -> connection.mount_pool keyword argument
+    pool_options = {'pool_connections': 'pool_connections',
+                    'pool_maxsize': 'pool_maxsize',
+                    'pool_block': 'pool_block',
+                    'pool_idle_timeout': 'idle_timeout'}
+
     def __init__(self, **kwargs):
         super(Client, self).__init__()
 
+        response_cache = kwargs.pop('response_cache', None)
+        if response_cache is True:
+            response_cache = cache.ResponseCache()
+        self.response_cache = response_cache or None
+        schema_cache = kwargs.pop('schema_cache', None)
+        if schema_cache is True:
+            schema_cache = schemas.SchemaCache(schemas.default_directory())
+        self.schema_cache = schema_cache or None
+        retry_policy = kwargs.pop('retry_policy', None)
+        if retry_policy is True:
+            retry_policy = retry.RetryPolicy(
+                circuit_breaker=retry.CircuitBreaker())
+        self.retry_policy = retry_policy or None
+
+        pool_kwargs = {}
+        for option, pool_option in self.pool_options.items():
+            value = kwargs.pop(option, None)
+            if value is not None:
+                pool_kwargs[pool_option] = value
+
         kwargs.setdefault('user_agent', 'python-congressclient')
-        self.httpclient = adapter.LegacyJsonAdapter(**kwargs)
+        self.pool = None
+        if pool_kwargs:
+            self.pool = connection.EndpointPool(kwargs['session'].session,
+                                                **pool_kwargs)
+        self.instrumentation = instrumentation.Instrumentation(
+            self.url_templates())
+        self.httpclient = connection.JsonAdapter(
+            instrumentation=self.instrumentation,
+            retry_policy=self.retry_policy, pool=self.pool, **kwargs)
+        # same session and endpoint, but leaves the body undecoded
+        self.rawclient = connection.RetryAdapter(
+            retry_policy=self.retry_policy, pool=self.pool, **kwargs)
+        # whether the server accepts PATCH of datasource rows, None until
+        # known
+        self.delta_updates = None
+        # whether the server pages each listing endpoint, by endpoint
+        # name; missing until known
+        self.server_paging = {}
+
+    @classmethod
+    def url_templates(cls):
+        """Return the (name, URL template) pairs of the API endpoints."""
+        return [(name, getattr(cls, name)) for name in dir(cls)
+                if isinstance(getattr(cls, name), str) and
+                getattr(cls, name).startswith('/')]
+
+    @property
+    def http_adapter(self):
+        """The pool of the policy endpoint, None until the first request."""
+        return self.pool.http_adapter if self.pool is not None else None
+
+    def pool_stats(self):
+        """Return connection pool statistics.
+
+        Only available when the client was created with pool options.
+
+        :rtype: a list of dicts, one per (scheme, host, port) pool
+        """
+        if self.pool is None:
+            return []
+        return self.pool.pool_stats()
+
+    def _get_listing(self, endpoint, url, matches, limit, offset, marker,
+                     filters, marker_key=None):
+        """Get a listing, paging and filtering it when the server does not.
+
+        Servers paging listings return a 'links' member, but may leave it
+        out of their last page, so a response without links does not mean
+        the server ignored the paging parameters.  Until the server is
+        known to page, the offset is applied by the client, which asks
+        for offset + limit items: the result is the same whether the
+        server pages or not.  Markers are looked up in the results when
+        marker_key identifies the items; otherwise they are opaque to the
+        client, which rejects them unless the server pages the listing.
+        Whether the server pages is tracked per endpoint, as it may page
+        some listings but not others.
+        """
+        server_paging = self.server_paging.get(endpoint)
+        if server_paging:
+            resp, body = self.httpclient.get(_listing_url(
+                url, limit, offset, marker, filters))
+            return _page_locally(body, matches, limit)
+        server_limit = limit
+        if limit is not None and offset:
+            server_limit = offset + limit
+        resp, body = self.httpclient.get(_listing_url(
+            url, server_limit, None, marker, filters))
+        if 'links' in body:
+            server_paging = self.server_paging[endpoint] = True
+        elif server_limit is not None and (
+                len(body['results']) > server_limit):
+            self.server_paging[endpoint] = False
+        if marker is not None and marker_key is None and not server_paging:
+            raise exceptions.ValidationError(
+                'The server does not page listings, markers cannot be '
+                'used')
+        return _page_locally(body, matches, limit, offset, marker,
+                             marker_key)
+
+    def _cached_get(self, endpoint, url):
+        response_cache = self.response_cache
+        if response_cache is None or not response_cache.caches(endpoint):
+            resp, body = self.httpclient.get(url)
+            return body
+        try:
+            return response_cache.get(url)
+        except KeyError:
+            pass
+
+        entry = response_cache.lookup(url)
+        if entry is not None and entry.etag:
+            resp, body = self.httpclient.get(
+                url, headers={'If-None-Match': entry.etag})
+            if resp.status_code == 304:
+                try:
+                    return response_cache.refresh(url)
+                except KeyError:
+                    # evicted meanwhile, fetch it unconditionally
+                    pass
+                resp, body = self.httpclient.get(url)
+        else:
+            resp, body = self.httpclient.get(url)
+        response_cache.store(endpoint, url, body, len(resp.content),
+                             etag=resp.headers.get('ETag'))
+        return body
+
+    def _stream_results(self, url, extra=None, matches=None):
+        """Stream the results of a listing, following 'next' links."""
+        while url:
+            page_extra = {}
+            if self.instrumentation.enabled:
+                items = self._timed_stream(url, page_extra)
+            else:
+                items = self._stream_page(url, page_extra)
+            for item in items:
+                if matches is None or matches(item):
+                    yield item
+            if extra is not None:
+                extra.update(page_extra)
+            url = _next_link(page_extra)
+
+    def _stream_page(self, url, extra, record=None, read_time=None):
+        resp = self.rawclient.get(
+            url, stream=True,
+            headers={'Accept': 'application/json',
+                     'Accept-Encoding': connection.ACCEPT_ENCODING})
+        # compressed bodies are decompressed chunk by chunk
+        chunks = resp.iter_content(STREAM_CHUNK_SIZE)
+        if record is not None:
+            record.status = resp.status_code
+            chunks = _metered(chunks, record, read_time)
+        try:
+            for item in jsonstream.iter_items(chunks, extra=extra):
+                yield item
+        finally:
+            if record is not None:
+                record.wire_bytes = connection.wire_bytes(resp)
+            resp.close()
+
+    def _timed_stream(self, url, extra):
+        """Stream one page, reporting it to the instrumentation hooks.
+
+        The wall time of a streamed request includes the time the caller
+        spends between rows.
+        """
+        record = self.instrumentation.start('GET', url)
+        start = time.perf_counter()
+        busy = 0.0
+        read_time = [0.0]
+        items = self._stream_page(url, extra, record, read_time)
+        try:
+            while True:
+                resumed = time.perf_counter()
+                try:
+                    item = next(items)
+                finally:
+                    busy += time.perf_counter() - resumed
+                yield item
+        except StopIteration:
+            pass
+        except Exception as e:
+            record.error = e
+            record.status = getattr(e, 'http_status', record.status)
+            raise
+        finally:
+            record.wall_time = time.perf_counter() - start
+            record.decode_time = max(busy - read_time[0], 0.0)
+            self.instrumentation.finish(record)
+
+    def _invalidate(self, *endpoints):
+        if self.response_cache is not None:
+            self.response_cache.invalidate(*endpoints)
 
     def create_policy(self, body, library_policy_id=None):
         url = self.policies
         if library_policy_id:
             url = url + "?library_policy=%s" % library_policy_id
         resp, body = self.httpclient.post(url, body=body)
+        self._invalidate('policies')
         return body
 
+    def create_policies(self, bodies, max_workers=DEFAULT_MAX_WORKERS):
+        """Create many policies concurrently.
+
+        Args:
+            bodies: Iterable of policy bodies, as taken by create_policy
+            max_workers: Maximum number of requests in flight.
+
+        Returns:
+            A generator yielding, in completion order, one dict per policy
+            holding its position in bodies under 'index', the body under
+            'policy', the created policy under 'result' (None on failure),
+            the exception raised under 'error' (None on success) and the
+            time spent on the request, in seconds, under 'elapsed'.
+        """
+        for index, body, result, error, elapsed in _run_concurrently(
+                self.create_policy, bodies, max_workers):
+            yield {'index': index, 'policy': body, 'result': result,
+                   'error': error, 'elapsed': elapsed}
+
     def delete_policy(self, policy):
         resp, body = self.httpclient.delete(self.policy_path % policy)
+        self._invalidate('policies')
+        self._invalidate_policy_columns(policy)
         return body
 
     def show_policy(self, policy):
@@ -98,33 +585,236 @@ class Client(object):
     def create_policy_rule(self, policy_name, body=None):
         resp, body = self.httpclient.post(
             self.policy_rules % policy_name, body=body)
+        self._invalidate_policy_columns(policy_name)
         return body
 
     def delete_policy_rule(self, policy_name, rule_id):
         resp, body = self.httpclient.delete(
             self.policy_rules_path % (policy_name, rule_id))
+        self._invalidate_policy_columns(policy_name)
         return body
 
+    def create_policy_rules(self, policy_name, bodies,
+                            max_workers=DEFAULT_MAX_WORKERS):
+        """Create many rules of a policy concurrently.
+
+        Args:
+            policy_name: Name or id of the policy
+            bodies: Iterable of rule bodies, as taken by create_policy_rule
+            max_workers: Maximum number of requests in flight.
+
+        Returns:
+            A generator yielding, in completion order, one dict per rule
+            holding its position in bodies under 'index', the body under
+            'rule', the created rule under 'result' (None on failure), the
+            exception raised under 'error' (None on success) and the time
+            spent on the request, in seconds, under 'elapsed'.
+        """
+        for index, body, result, error, elapsed in _run_concurrently(
+                lambda body: self.create_policy_rule(policy_name, body),
+                bodies, max_workers):
+            yield {'index': index, 'rule': body, 'result': result,
+                   'error': error, 'elapsed': elapsed}
+
+    def delete_policy_rules(self, policy_name, rule_ids,
+                            max_workers=DEFAULT_MAX_WORKERS):
+        """Delete many rules of a policy concurrently.
+
+        Args:
+            policy_name: Name or id of the policy
+            rule_ids: Iterable of rule ids
+            max_workers: Maximum number of requests in flight.
+
+        Returns:
+            A generator yielding, in completion order, one dict per rule
+            holding its position in rule_ids under 'index', the id under
+            'rule', the response body under 'result', the exception raised
+            under 'error' (None on success) and the time spent on the
+            request, in seconds, under 'elapsed'.
+        """
+        for index, rule_id, result, error, elapsed in _run_concurrently(
+                lambda rule_id: self.delete_policy_rule(policy_name,
+                                                        rule_id),
+                rule_ids, max_workers):
+            yield {'index': index, 'rule': rule_id, 'result': result,
+                   'error': error, 'elapsed': elapsed}
+
     def show_policy_rule(self, policy_name, rule_id):
         resp, body = self.httpclient.get(
             self.policy_rules_path % (policy_name, rule_id))
         return body
 
-    def list_policy_rows(self, policy_name, table, trace=None):
+    def list_policy_rows(self, policy_name, table, trace=None, limit=None,
+                         offset=None, marker=None, filters=None):
+        """List the rows of a policy table.
+
+        Args:
+            policy_name: Name or id of the policy
+            table: Name of the table
+            trace: Request a trace of the computation
+            limit: Maximum number of rows to return
+            offset: Number of rows to skip
+            marker: Paging marker returned by the server
+            filters: Dict mapping column positions to required values
+
+        Paging and filtering are applied by the client when the server
+        does not support them.
+        """
         if trace:
             query = self.policy_rows_trace
         else:
             query = self.policy_rows
-        resp, body = self.httpclient.get(query % (policy_name, table))
-        return body
+        return self._get_listing('policy_rows', query % (policy_name, table),
+                                 _row_matcher(filters), limit, offset,
+                                 marker, filters)
 
-    def list_policy_rules(self, policy_name):
-        resp, body = self.httpclient.get(self.policy_rules % (policy_name))
-        return body
+    def iter_policy_rows(self, policy_name, table, trace=None, extra=None,
+                         filters=None, page_size=None, marker=None):
+        """Iterate over the rows of a policy table as they are downloaded.
+
+        Unlike list_policy_rows, only one row is decoded and held in
+        memory at a time.  The request is sent when iteration starts and
+        further pages are requested as iteration goes on.
+
+        Args:
+            policy_name: Name or id of the policy
+            table: Name of the table
+            trace: Request a trace of the computation
+            extra: Optional dict receiving the other members of the
+                response, such as 'trace', once iteration is complete.
+            filters: Dict mapping column positions to required values
+            page_size: Number of rows to request per page
+            marker: Paging marker to resume from
+        """
+        if trace:
+            query = self.policy_rows_trace
+        else:
+            query = self.policy_rows
+        url = _listing_url(query % (policy_name, table), page_size,
+                           marker=marker, filters=filters)
+        return self._stream_results(url, extra, _row_matcher(filters))
+
+    def policy_table_columns(self, policy_name, table, refresh=False):
+        """Return the column names of a policy table.
+
+        Columns are named after the variables of the heads of the rules
+        defining the table, falling back to Col0..ColN for positions only
+        holding constants.  The names of all the tables of the policy are
+        cached in the schema cache, if any, until a rule of the policy is
+        created or deleted through this client.
+
+        Args:
+            policy_name: Name or id of the policy
+            table: Name of the table
+            refresh: Fetch the rules even if the names are cached
+
+        Returns:
+            A list of column names, empty when no rule defines the table,
+            e.g. for tables only holding facts.
+        """
+        cache = self.schema_cache
+        scope = self._schema_scope() + '#policies' if cache else None
+        if cache is not None and not refresh:
+            columns = cache.get(scope, policy_name, table)
+            if columns is not None:
+                return columns
+        heads = {}
+        for rule in self.list_policy_rules(policy_name)['results']:
+            head = _rule_head_columns(rule.get('rule', ''))
+            if head is not None:
+                heads.setdefault(head[0], []).append(head[1])
+        tables = dict((name, _merge_columns(columns))
+                      for name, columns in heads.items())
+        tables.setdefault(table, [])
+        if cache is not None:
+            cache.set_tables(scope, policy_name, tables)
+        return tables[table]
+
+    def _invalidate_policy_columns(self, policy_name):
+        if self.schema_cache is not None:
+            self.schema_cache.invalidate(
+                self._schema_scope() + '#policies', policy_name)
+
+    def list_policy_rows_columnar(self, policy_name, table, filters=None):
+        """List the rows of a policy table in compact columnar form.
+
+        Rows are streamed into a
+        :class:`congressclient.common.columnar.ColumnarRows` whose
+        columns are named Col0..ColN.
+        """
+        return columnar.ColumnarRows.from_rows(
+            self.iter_policy_rows(policy_name, table, filters=filters))
+
+    def fetch_policy_snapshot(self, policy_name, tables=None,
+                              max_workers=DEFAULT_MAX_WORKERS):
+        """Fetch the rows of many tables of a policy concurrently.
+
+        Args:
+            policy_name: Name or id of the policy
+            tables: Names of the tables to fetch; all tables of the policy
+                when not given.
+            max_workers: Maximum number of requests in flight.
+
+        Returns:
+            A dict keyed by table name whose values are dicts holding the
+            table rows under 'results' and the time spent fetching them, in
+            seconds, under 'elapsed'.
+        """
+        if tables is None:
+            tables = [table['id'] for table in
+                      self.list_policy_tables(policy_name)['results']]
+
+        def fetch(table):
+            start = time.monotonic()
+            rows = self.list_policy_rows(policy_name, table)['results']
+            return {'results': rows, 'elapsed': time.monotonic() - start}
+
+        snapshot = {}
+        if not tables:
+            return snapshot
+        with futures.ThreadPoolExecutor(
+                max_workers=min(max_workers, len(tables))) as executor:
+            pending = dict((executor.submit(fetch, table), table)
+                           for table in tables)
+            for future in futures.as_completed(pending):
+                snapshot[pending[future]] = future.result()
+        return snapshot
+
+    def list_policy_rules(self, policy_name, limit=None, offset=None,
+                          marker=None, filters=None):
+        """List the rules of a policy.
+
+        Args:
+            policy_name: Name or id of the policy
+            limit: Maximum number of rules to return
+            offset: Number of rules to skip
+            marker: ID of the last rule of the previous page
+            filters: Dict mapping rule fields, such as 'name', to
+                required values
+
+        Paging and filtering are applied by the client when the server
+        does not support them.
+        """
+        return self._get_listing('policy_rules',
+                                 self.policy_rules % (policy_name),
+                                 _field_matcher(filters), limit, offset,
+                                 marker, filters, marker_key='id')
+
+    def iter_policy_rules(self, policy_name, filters=None, page_size=None,
+                          marker=None):
+        """Iterate over the rules of a policy, following server pages."""
+        matches = _field_matcher(filters)
+        url = _listing_url(self.policy_rules % (policy_name), page_size,
+                           marker=marker, filters=filters)
+        while url:
+            resp, body = self.httpclient.get(url)
+            for rule in body['results']:
+                if matches is None or matches(rule):
+                    yield rule
+            url = _next_link(body)
 
     def list_policy(self):
-        resp, body = self.httpclient.get(self.policies)
-        return body
+        return self._cached_get('policies', self.policies)
 
     def list_library_policy(self, include_rules=True):
         query = "?include_rules=%s" % include_rules
@@ -141,14 +831,53 @@ class Client(object):
             (self.policy_path % policy_name) + str(uri), body=body)
         return body
 
+    def simulate_many(self, policy_name, cases, trace=False, delta=False,
+                      max_workers=DEFAULT_MAX_WORKERS):
+        """Run many simulations of a policy concurrently.
+
+        Cases are consumed lazily and at most max_workers simulations are
+        in flight at any time, so cases may come from an arbitrarily large
+        iterable.  A failing case does not stop the others.
+
+        Args:
+            policy_name: Name or id of the policy
+            cases: Iterable of dicts holding the 'query', 'sequence' and
+                optional 'action_policy' of each simulation.  A case may
+                also set 'trace' or 'delta' to override the defaults.
+            trace: Include a trace of the computation in each result
+            delta: Return the difference caused by the update sequence
+            max_workers: Maximum number of requests in flight.
+
+        Returns:
+            A generator yielding, in completion order, one dict per case
+            holding its position in cases under 'index', the case itself
+            under 'case', the simulation response under 'result' (None on
+            failure), the exception raised under 'error' (None on success)
+            and the time spent on the request, in seconds, under 'elapsed'.
+        """
+        def simulate(case):
+            if not isinstance(case, dict):
+                raise exceptions.ValidationError(
+                    'A simulation case must be an object, not %r' % (case,))
+            body = {'query': case.get('query'),
+                    'sequence': case.get('sequence'),
+                    'action_policy': case.get('action_policy')}
+            return self.execute_policy_action(
+                policy_name, 'simulate', case.get('trace', trace),
+                case.get('delta', delta), body)
+
+        for index, case, result, error, elapsed in _run_concurrently(
+                simulate, cases, max_workers):
+            yield {'index': index, 'case': case, 'result': result,
+                   'error': error, 'elapsed': elapsed}
+
     def show_policy_table(self, policy_name, table_id):
         resp, body = self.httpclient.get(self.policy_table_path %
                                          (policy_name, table_id))
         return body
 
     def list_datasources(self):
-        resp, body = self.httpclient.get(self.datasources)
-        return body
+        return self._cached_get('datasources', self.datasources)
 
     def show_datasource(self, datasource_name):
         """Get a single datasource
@@ -164,23 +893,202 @@ class Client(object):
                                          (datasource_name))
         return body
 
-    def list_datasource_rows(self, datasource_name, table_name):
-        resp, body = self.httpclient.get(self.datasource_rows %
-                                         (datasource_name, table_name))
-        return body
+    def list_datasource_rows(self, datasource_name, table_name, limit=None,
+                             offset=None, marker=None, filters=None):
+        """List the rows of a datasource table.
+
+        Args:
+            datasource_name: Name or id of the datasource
+            table_name: Name of the table
+            limit: Maximum number of rows to return
+            offset: Number of rows to skip
+            marker: Paging marker returned by the server
+            filters: Dict mapping column names or positions to required
+                values
+
+        Paging and filtering are applied by the client when the server
+        does not support them.
+        """
+        return self._get_listing(
+            'datasource_rows',
+            self.datasource_rows % (datasource_name, table_name),
+            self._datasource_row_matcher(datasource_name, table_name,
+                                         filters),
+            limit, offset, marker, filters)
+
+    def iter_datasource_rows(self, datasource_name, table_name,
+                             filters=None, page_size=None, marker=None):
+        """Iterate over the rows of a datasource table as they are downloaded.
+
+        Unlike list_datasource_rows, only one row is decoded and held in
+        memory at a time.  The request is sent when iteration starts and
+        further pages are requested as iteration goes on.
+
+        Args:
+            datasource_name: Name or id of the datasource
+            table_name: Name of the table
+            filters: Dict mapping column names or positions to required
+                values
+            page_size: Number of rows to request per page
+            marker: Paging marker to resume from
+        """
+        url = _listing_url(self.datasource_rows %
+                           (datasource_name, table_name), page_size,
+                           marker=marker, filters=filters)
+        return self._stream_results(
+            url, matches=self._datasource_row_matcher(datasource_name,
+                                                      table_name, filters))
+
+    def list_datasource_rows_columnar(self, datasource_name, table_name,
+                                      filters=None):
+        """List the rows of a datasource table in compact columnar form.
 
-    def update_datasource_rows(self, datasource_name, table_name, body=None):
+        Rows are streamed into a
+        :class:`congressclient.common.columnar.ColumnarRows` whose
+        columns are named after the table schema.
+        """
+        schema = self.show_datasource_table_schema(datasource_name,
+                                                   table_name)
+        return columnar.ColumnarRows.from_rows(
+            self.iter_datasource_rows(datasource_name, table_name,
+                                      filters=filters),
+            [column['name'] for column in schema['columns']])
+
+    def _datasource_row_matcher(self, datasource_name, table_name, filters):
+        def get_columns():
+            schema = self.show_datasource_table_schema(datasource_name,
+                                                       table_name)
+            return [column['name'] for column in schema['columns']]
+        return _row_matcher(filters, get_columns)
+
+    def update_datasource_rows(self, datasource_name, table_name, body=None,
+                               compress=False, progress=None):
         """Update rows in a table of a datasource.
 
+        When body is not a list, or compress or progress is given, the rows
+        are serialized while they are sent, using chunked transfer
+        encoding, so that a large row set never has to be held in memory.
+
         Args:
             datasource_name: Name or id of the datasource
             table_name: Table name for updating
-            body: Rows for update.
+            body: Rows for update, a list or any iterable of rows.  None
+                is sent as is, never as an empty row set.
+            compress: Send the body gzip compressed.
+            progress: Callable called with the number of rows and the
+                number of bytes sent so far as the upload proceeds.
         """
-        resp, body = self.httpclient.put(self.datasource_rows %
-                                         (datasource_name, table_name),
-                                         body=body)
-        return body
+        url = self.datasource_rows % (datasource_name, table_name)
+        if body is None or (isinstance(body, list) and not compress and
+                            progress is None):
+            resp, body = self.httpclient.put(url, body=body)
+            return body
+        return self._upload_rows(url, body, compress, progress)
+
+    def _upload_rows(self, url, rows, compress, progress):
+        sent = [0, 0]
+
+        def count_rows(count):
+            sent[0] = count
+
+        chunks = jsonstream.iter_encoded(rows, STREAM_CHUNK_SIZE,
+                                         count_rows)
+        headers = {'Accept': 'application/json',
+                   'Content-Type': 'application/json'}
+        if compress:
+            chunks = connection.gzip_chunks(chunks)
+            headers['Content-Encoding'] = 'gzip'
+
+        def report(chunks):
+            for chunk in chunks:
+                sent[1] += len(chunk)
+                yield chunk
+                if progress is not None:
+                    progress(sent[0], sent[1])
+
+        record = None
+        if self.instrumentation.enabled:
+            record = self.instrumentation.start('PUT', url)
+        start = time.perf_counter()
+        try:
+            resp = self.rawclient.put(url, data=report(chunks),
+                                      headers=headers)
+            if record is not None:
+                record.status = resp.status_code
+                record.bytes = len(resp.content)
+                record.wire_bytes = connection.wire_bytes(resp)
+            try:
+                return resp.json()
+            except ValueError:
+                return None
+        except Exception as e:
+            if record is not None:
+                record.error = e
+                record.status = getattr(e, 'http_status', None)
+            raise
+        finally:
+            if record is not None:
+                record.wall_time = time.perf_counter() - start
+                self.instrumentation.finish(record)
+
+    def update_datasource_rows_delta(self, datasource_name, table_name,
+                                     rows):
+        """Update the rows of a datasource table sending only the changes.
+
+        The current rows are streamed from the server and compared with
+        rows by hashing, as tables are sets of rows.  Servers supporting
+        delta updates receive a PATCH of the added and removed rows; other
+        servers receive the full row set.  Nothing is sent when no row
+        changed.
+
+        Args:
+            datasource_name: Name or id of the datasource
+            table_name: Table name for updating
+            rows: Iterable of the new rows, each a list of values
+
+        Returns:
+            A dict holding the number of 'added' and 'removed' rows, the
+            update 'mode' ('delta', 'full' or 'unchanged'), the bytes of
+            the request body sent under 'bytes_sent' and the bytes a full
+            update would have sent under 'bytes_full'.
+        """
+        desired = {}
+        for row in rows:
+            desired.setdefault(utils.row_key(row), row)
+        current = {}
+        for row in self.iter_datasource_rows(datasource_name, table_name):
+            current.setdefault(utils.row_key(row['data']), row['data'])
+        added = [row for key, row in desired.items() if key not in current]
+        removed = [row for key, row in current.items() if key not in desired]
+
+        full = list(desired.values())
+        bytes_full = len(json.dumps(full))
+        result = {'added': len(added), 'removed': len(removed),
+                  'mode': 'unchanged', 'bytes_sent': 0,
+                  'bytes_full': bytes_full}
+        if not added and not removed:
+            return result
+
+        url = self.datasource_rows % (datasource_name, table_name)
+        if self.delta_updates is not False:
+            delta = {'added': added, 'removed': removed}
+            try:
+                self.httpclient.patch(url, body=delta)
+            except (ks_exceptions.NotFound, ks_exceptions.MethodNotAllowed,
+                    ks_exceptions.HttpNotImplemented):
+                pass
+            else:
+                self.delta_updates = True
+                result.update(mode='delta',
+                              bytes_sent=len(json.dumps(delta)))
+                return result
+
+        self.httpclient.put(url, body=full)
+        if self.delta_updates is None:
+            # the table exists, so PATCH itself is not supported
+            self.delta_updates = False
+        result.update(mode='full', bytes_sent=bytes_full)
+        return result
 
     def list_datasource_status(self, datasource_name):
         resp, body = self.httpclient.get(self.datasource_status %
@@ -193,14 +1101,38 @@ class Client(object):
         return body
 
     def show_datasource_schema(self, datasource_name):
-        resp, body = self.httpclient.get(self.datasource_schema %
-                                         datasource_name)
-        return body
+        return self._cached_get('datasource_schema',
+                                self.datasource_schema % datasource_name)
 
     def show_datasource_table_schema(self, datasource_name, table_name):
-        resp, body = self.httpclient.get(self.datasource_table_schema %
-                                         (datasource_name, table_name))
-        return body
+        return self._cached_get('datasource_table_schema',
+                                self.datasource_table_schema %
+                                (datasource_name, table_name))
+
+    def _schema_scope(self):
+        return self.httpclient.get_endpoint() or ''
+
+    def cached_table_columns(self, datasource_name, table_name):
+        """Return the cached column names of a table, None if unknown."""
+        if self.schema_cache is None:
+            return None
+        return self.schema_cache.get(self._schema_scope(), datasource_name,
+                                     table_name)
+
+    def fetch_table_columns(self, datasource_name, table_name):
+        """Fetch the column names of a table and cache them."""
+        columns = [column['name'] for column in
+                   self.show_datasource_table_schema(
+                       datasource_name, table_name)['columns']]
+        if self.schema_cache is not None:
+            self.schema_cache.set(self._schema_scope(), datasource_name,
+                                  table_name, columns)
+        return columns
+
+    def _invalidate_schemas(self, datasource_name):
+        if self.schema_cache is not None and datasource_name:
+            self.schema_cache.invalidate(self._schema_scope(),
+                                         datasource_name)
 
     def show_datasource_table(self, datasource_name, table_id):
         resp, body = self.httpclient.get(self.datasource_table_path %
@@ -210,11 +1142,18 @@ class Client(object):
     def create_datasource(self, body=None):
         resp, body = self.httpclient.post(
             self.datasources, body=body)
+        self._invalidate('datasources', 'datasource_schema',
+                         'datasource_table_schema')
+        for name in set((body or {}).get(key) for key in ('id', 'name')):
+            self._invalidate_schemas(name)
         return body
 
     def delete_datasource(self, datasource):
         resp, body = self.httpclient.delete(
             self.datasource_path % datasource)
+        self._invalidate('datasources', 'datasource_schema',
+                         'datasource_table_schema')
+        self._invalidate_schemas(datasource)
         return body
 
     def execute_datasource_action(self, service_name, action, body):
@@ -224,13 +1163,10 @@ class Client(object):
         return body
 
     def list_drivers(self):
-        resp, body = self.httpclient.get(self.driver)
-        return body
+        return self._cached_get('driver', self.driver)
 
     def show_driver(self, driver):
-        resp, body = self.httpclient.get(self.driver_path %
-                                         (driver))
-        return body
+        return self._cached_get('driver_path', self.driver_path % (driver))
 
     def request_refresh(self, driver, body=None):
         resp, body = self.httpclient.post(self.datasource_path %
@@ -238,6 +1174,83 @@ class Client(object):
                                           body=body)
         return body
 
+    def wait_for_refresh(self, datasource_name, previous,
+                         timeout=DEFAULT_REFRESH_TIMEOUT, interval=0.5,
+                         max_interval=10, sleep=time.sleep):
+        """Wait until a datasource has polled its data source.
+
+        The status of the datasource is polled with exponential backoff
+        until its number of updates, last update time or last error
+        differs from previous.
+
+        Args:
+            datasource_name: Name or id of the datasource
+            previous: Status returned by list_datasource_status before the
+                refresh was requested
+            timeout: Seconds after which to give up
+            interval: Seconds before the first status check, doubled after
+                each check up to max_interval
+
+        Returns:
+            The new status of the datasource.
+
+        Raises:
+            congressclient.exceptions.WaitTimeout: the datasource did not
+                poll within timeout seconds.
+        """
+        marker = _refresh_marker(previous)
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise exceptions.WaitTimeout(
+                    'Datasource %s did not refresh within %s seconds' %
+                    (datasource_name, timeout))
+            sleep(min(interval, remaining))
+            status = self.list_datasource_status(datasource_name)
+            if _refresh_marker(status) != marker:
+                return status
+            interval = min(interval * 2, max_interval)
+
+    def refresh_datasource(self, datasource_name, wait=False,
+                           timeout=DEFAULT_REFRESH_TIMEOUT):
+        """Request a datasource to poll, optionally waiting until it did.
+
+        Returns:
+            The new status of the datasource when wait is true, else the
+            response to the refresh request.
+        """
+        if not wait:
+            return self.request_refresh(datasource_name, {})
+        previous = self.list_datasource_status(datasource_name)
+        self.request_refresh(datasource_name, {})
+        return self.wait_for_refresh(datasource_name, previous, timeout)
+
+    def refresh_datasources(self, datasource_names, wait=False,
+                            timeout=DEFAULT_REFRESH_TIMEOUT,
+                            max_workers=DEFAULT_MAX_WORKERS):
+        """Refresh many datasources concurrently.
+
+        Args:
+            datasource_names: Iterable of datasource names or ids
+            wait: Wait until each datasource has polled
+            timeout: Seconds to wait for each datasource
+            max_workers: Maximum number of datasources refreshed at once.
+
+        Returns:
+            A generator yielding, in completion order, one dict per
+            datasource holding its position in datasource_names under
+            'index', the name under 'datasource', the result of
+            refresh_datasource under 'result', the exception raised under
+            'error' (None on success) and the time spent, in seconds,
+            under 'elapsed'.
+        """
+        for index, name, result, error, elapsed in _run_concurrently(
+                lambda name: self.refresh_datasource(name, wait, timeout),
+                datasource_names, max_workers):
+            yield {'index': index, 'datasource': name, 'result': result,
+                   'error': error, 'elapsed': elapsed}
+
     def list_api_versions(self):
-        resp, body = self.httpclient.get(self.policy_api_versions)
-        return body
+        return self._cached_get('policy_api_versions',
+                                self.policy_api_versions)
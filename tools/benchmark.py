@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+#   Licensed under the Apache License, Version 2.0 (the "License"); you may
+#   not use this file except in compliance with the License. You may obtain
+#   a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#   WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#   License for the specific language governing permissions and limitations
+#   under the License.
+
+"""Benchmark the client and CLI hot paths against a local fake Congress.
+
+Runs entirely offline: a FakeCongressServer serving synthetic policies,
+rules and tables is started on localhost and every benchmark talks to it
+over HTTP.  Results are printed as JSON so they can be stored and
+compared between revisions, e.g.::
+
+    python tools/benchmark.py --rows 10000 --output bench.json
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+from keystoneauth1 import session
+
+from congressclient.common import utils
+from congressclient.osc.v1 import datasource
+from congressclient.osc.v1 import policy
+from congressclient.tests import fake_server
+from congressclient.tests import fakes
+from congressclient.v1 import client
+
+
+def _measure(func, iterations, items=None):
+    func()  # warm up connections and caches
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    result = {
+        'iterations': iterations,
+        'min': timings[0],
+        'max': timings[-1],
+        'mean': statistics.mean(timings),
+        'p50': timings[len(timings) // 2],
+        'p95': timings[min(len(timings) - 1, int(len(timings) * 0.95))],
+        'calls_per_second': iterations / sum(timings),
+    }
+    if items:
+        result['items_per_second'] = items * iterations / sum(timings)
+    return result
+
+
+def _run_command(congress, command_class, arglist):
+    stdout = io.StringIO()
+    app = fakes.FakeApp(stdout)
+    app.client_manager = fakes.FakeClientManager()
+    app.client_manager.congressclient = congress
+    cmd = command_class(app, argparse.Namespace())
+    parsed_args = cmd.get_parser('benchmark').parse_args(arglist)
+
+    def run():
+        stdout.seek(0)
+        stdout.truncate()
+        cmd.run(parsed_args)
+    return run
+
+
+# what an 'openstack congress ...' invocation imports before running
+STARTUP_MODULES = ('congressclient.osc.osc_plugin',
+                   'congressclient.osc.v1.policy',
+                   'congressclient.osc.v1.datasource')
+
+
+def measure_startup(runs):
+    """Time importing the CLI plugin and command modules in new processes.
+
+    The time of a bare interpreter start is measured too and subtracted,
+    so the result is what the client adds to every CLI invocation.
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=root)
+
+    def run(code):
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            subprocess.check_call([sys.executable, '-c', code], env=env)
+            timings.append(time.perf_counter() - start)
+        return statistics.median(timings)
+
+    baseline = run('pass')
+    imports = run('; '.join('import %s' % name for name in STARTUP_MODULES))
+    return {'runs': runs, 'interpreter_p50': baseline,
+            'imports_p50': imports, 'client_overhead': imports - baseline}
+
+
+def run_benchmarks(congress, data, iterations):
+    policy_name = data.policies[0]
+    datasource_name = data.datasources[0]
+    table = data.tables[0]
+    rows = len(data.rows)
+    listing = congress.list_policy_rules(policy_name)
+    last_rule = data.rules[-1]['name']
+    simulate_body = {'query': 'table0(x)', 'sequence': 'ds0:table0+(1)',
+                     'action_policy': 'action'}
+
+    benchmarks = {
+        'list_datasource_rows': (
+            lambda: congress.list_datasource_rows(datasource_name, table),
+            rows),
+        'iter_datasource_rows': (
+            lambda: sum(1 for _ in congress.iter_datasource_rows(
+                datasource_name, table)),
+            rows),
+        'list_policy_rows': (
+            lambda: congress.list_policy_rows(policy_name, table),
+            rows),
+        'list_policy_rows_trace': (
+            lambda: congress.list_policy_rows(policy_name, table, True),
+            rows),
+        'execute_policy_action_simulate': (
+            lambda: congress.execute_policy_action(
+                policy_name, 'simulate', False, False, simulate_body),
+            None),
+        'get_resource_id_from_name': (
+            lambda: utils.get_resource_id_from_name(last_rule, listing),
+            None),
+        'name_resolver_cached': (
+            lambda: utils.get_resolver(congress).resolve(
+                ('policy_rules', policy_name), last_rule,
+                lambda: congress.list_policy_rules(policy_name)),
+            None),
+        'cli_datasource_row_list_table': (
+            _run_command(congress, datasource.ListDatasourceRows,
+                         [datasource_name, table]),
+            rows),
+        'cli_datasource_row_list_csv': (
+            _run_command(congress, datasource.ListDatasourceRows,
+                         [datasource_name, table, '-f', 'csv']),
+            rows),
+        'cli_policy_row_list_table': (
+            _run_command(congress, policy.ListPolicyRows,
+                         [policy_name, table]),
+            rows),
+        'cli_policy_row_list_csv': (
+            _run_command(congress, policy.ListPolicyRows,
+                         [policy_name, table, '-f', 'csv']),
+            rows),
+    }
+    return dict((name, _measure(func, iterations, items))
+                for name, (func, items) in sorted(benchmarks.items()))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--rows', type=int, default=1000,
+                        help='Rows per table')
+    parser.add_argument('--columns', type=int, default=4,
+                        help='Columns per table')
+    parser.add_argument('--rules', type=int, default=200,
+                        help='Rules per policy')
+    parser.add_argument('--iterations', type=int, default=20,
+                        help='Timed iterations per benchmark')
+    parser.add_argument('--startup-runs', type=int, default=10,
+                        help='Processes started to measure CLI import time')
+    parser.add_argument('--output', metavar='<file>',
+                        help='Write the JSON results to a file too')
+    args = parser.parse_args(argv)
+
+    data = fake_server.FakeCongressData(rules=args.rules, rows=args.rows,
+                                        columns=args.columns)
+    with fake_server.FakeCongressServer(data) as fake:
+        congress = client.Client(session=session.Session(),
+                                 endpoint_override=fake.url)
+        results = {
+            'config': {'rows': args.rows, 'columns': args.columns,
+                       'rules': args.rules, 'iterations': args.iterations,
+                       'python': platform.python_version()},
+            'results': run_benchmarks(congress, data, args.iterations),
+            'startup': measure_startup(args.startup_runs),
+        }
+
+    output = json.dumps(results, indent=2, sort_keys=True)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())